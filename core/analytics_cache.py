@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+from functools import wraps
+from uuid import uuid4
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.response import Response
+
+from core.utils.cache import count_cache_access, get_cache_access_stats
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'analytics'
+STATS_NAME = 'analytics:{}'
+
+DASHBOARD_STATISTICS_TIMEOUT = 60
+
+# names of actions decorated with cache_analytics_response
+CACHED_ENDPOINTS = set()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_org_version_key(org_content_type_id, org_id):
+    return f'analytics:version:{org_content_type_id}:{org_id}'
+
+
+def get_version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+
+    return version
+
+
+def get_org_version(org):
+    """Return token of the current state of the organization analytics data."""
+    return get_version(
+        get_org_version_key(ContentType.objects.get_for_model(org).id, org.pk)
+    )
+
+
+def invalidate_analytics_cache(org_content_type_id, org_id):
+    """Drop cached analytics responses of the organization."""
+    if org_content_type_id is None or org_id is None:
+        return
+
+    get_cache().set(get_org_version_key(org_content_type_id, org_id), uuid4().hex, None)
+
+
+def invalidate_org_analytics_cache(org):
+    if org is not None:
+        invalidate_analytics_cache(ContentType.objects.get_for_model(org).id, org.pk)
+
+
+def get_dashboard_version_key(org_content_type_id, org_id):
+    return f'dashboard:version:{org_content_type_id}:{org_id}'
+
+
+def invalidate_dashboard_cache(org_content_type_id, org_id):
+    """Drop cached dashboard statistics of members of the organization."""
+    if org_content_type_id is None or org_id is None:
+        return
+
+    get_cache().set(
+        get_dashboard_version_key(org_content_type_id, org_id), uuid4().hex, None
+    )
+
+
+def get_dashboard_statistics_key(profile):
+    """
+    Return cache key of the dashboard statistics of the User.
+
+    Statistics depend on Jobs and Proposals available to the User,
+    so they are not shared with other members of the organization.
+    """
+    org = profile.org
+    version = get_version(
+        get_dashboard_version_key(ContentType.objects.get_for_model(org).id, org.pk)
+    )
+
+    return f'dashboard:statistics:{version}:{profile.user_id}'
+
+
+def get_response_key(profile, endpoint, params):
+    """
+    Return cache key of the analytics response.
+
+    Responses are shared by Users of the same organization and role,
+    stats of ongoing periods are refreshed daily.
+    """
+    normalized_params = json.dumps(params, sort_keys=True, default=str)
+    params_hash = hashlib.sha256(normalized_params.encode()).hexdigest()
+
+    return 'analytics:response:{}:{}:{}:{}:{}'.format(
+        get_org_version(profile.org),
+        type(profile).__name__,
+        endpoint,
+        timezone.now().date().isoformat(),
+        params_hash,
+    )
+
+
+def record_cache_access(endpoint, hit):
+    count_cache_access(STATS_NAME.format(endpoint), hit)
+
+    logger.debug('Analytics cache %s: %s', 'hit' if hit else 'miss', endpoint)
+
+
+def get_analytics_cache_stats():
+    """Return numbers of cache hits and misses of each cached endpoint."""
+    endpoints = sorted(CACHED_ENDPOINTS)
+    stats = get_cache_access_stats(
+        [STATS_NAME.format(endpoint) for endpoint in endpoints]
+    )
+    return {endpoint: stats[STATS_NAME.format(endpoint)] for endpoint in endpoints}
+
+
+def cache_analytics_response(query_serializer_class, timeout=60 * 60):
+    """
+    Cache successful responses of analytics ViewSet action.
+
+    Cached response is keyed by the organization, role of the User,
+    action name and validated query parameters. Requests with invalid
+    parameters are passed to the action to get the usual error response.
+    """
+
+    def decorator(func):
+        endpoint = func.__name__
+        CACHED_ENDPOINTS.add(endpoint)
+
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            profile = getattr(request.user, 'profile', None)
+            query_serializer = query_serializer_class(
+                data=request.query_params, context={'request': request}
+            )
+            if profile is None or not query_serializer.is_valid():
+                return func(view, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = get_response_key(profile, endpoint, query_serializer.validated_data)
+
+            data = cache.get(key)
+            record_cache_access(endpoint, hit=data is not None)
+            if data is not None:
+                return Response(data)
+
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout)
+
+            return response
+
+        return wrapper
+
+    return decorator
@@ -7,12 +7,12 @@ from django.db.models import (
     Case,
     When,
     F,
+    FilteredRelation,
     IntegerField,
     FloatField,
 )
-from django.db.models.functions import Least
+from django.db.models.functions import Coalesce, Least
 from django.contrib.contenttypes.models import ContentType
-from djmoney.contrib.exchange.models import Rate as CurrencyRate
 
 from core import models as m
 from core.utils import org_filter
@@ -72,79 +72,37 @@ def annotate_job_live_proposals(qs, profile):
     ).order_by('-created_at')
 
 
-def job_proposal_visible_to_org_filter(org):
-    org_type = ContentType.objects.get_for_model(org)
-
-    return Q(org_id=org.id, org_content_type=org_type) | Q(
-        proposals__candidate__org_id=org.id,
-        proposals__candidate__org_content_type=org_type,
-    )
-
-
-def job_proposal_stage_filter(stage):
-    return Q(proposals__status__stage=stage, proposals__is_rejected=False)
+def pipeline_counter_field(field):
+    return Coalesce(F(f'org_pipeline_counter__{field}'), 0)
 
 
 def annotate_job_proposal_pipeline(qs, profile):
-    visible_to_org = job_proposal_visible_to_org_filter(profile.org)
+    """Add numbers of proposals in pipeline stages seen by the organization."""
+    org_content_type = ContentType.objects.get_for_model(profile.org)
 
-    return qs.annotate(
-        proposals_count=Count(
-            'proposals',
-            distinct=True,
-            filter=Q(
-                proposals__status__stage__in=m.ProposalStatusStage.get_shortlist_keys()
+    return (
+        qs.annotate(
+            org_pipeline_counter=FilteredRelation(
+                'pipeline_counters',
+                condition=Q(
+                    pipeline_counters__org_content_type=org_content_type,
+                    pipeline_counters__org_id=profile.org.id,
+                ),
             )
-            & visible_to_org,
-        ),
-        proposals_associated_count=Count(
-            'proposals',
-            filter=job_proposal_stage_filter(m.ProposalStatusStage.ASSOCIATED.key)
-            & visible_to_org,
-            distinct=True,
-        ),
-        proposals_pre_screening_count=Count(
-            'proposals',
-            filter=job_proposal_stage_filter(m.ProposalStatusStage.PRE_SCREENING.key)
-            & visible_to_org,
-            distinct=True,
-        ),
-        proposals_submissions_count=Count(
-            'proposals',
-            filter=job_proposal_stage_filter(m.ProposalStatusStage.SUBMISSIONS.key)
-            & visible_to_org,
-            distinct=True,
-        ),
-        proposals_screening_count=Count(
-            'proposals',
-            filter=job_proposal_stage_filter(m.ProposalStatusStage.SCREENING.key)
-            & visible_to_org,
-            distinct=True,
-        ),
-        proposals_interviewing_count=Count(
-            'proposals',
-            filter=job_proposal_stage_filter(m.ProposalStatusStage.INTERVIEWING.key)
-            & visible_to_org,
-            distinct=True,
-        ),
-        proposals_offering_count=Count(
-            'proposals',
-            filter=job_proposal_stage_filter(m.ProposalStatusStage.OFFERING.key)
-            & visible_to_org,
-            distinct=True,
-        ),
-        proposals_hired_count=Count(
-            'proposals',
-            filter=job_proposal_stage_filter(m.ProposalStatusStage.HIRED.key)
-            & visible_to_org,
-            distinct=True,
-        ),
-        proposals_rejected_count=Count(
-            'proposals',
-            filter=Q(proposals__is_rejected=True) & visible_to_org,
-            distinct=True,
-        ),
-    ).order_by('-created_at')
+        )
+        .annotate(
+            proposals_count=pipeline_counter_field('proposals_count'),
+            proposals_associated_count=pipeline_counter_field('associated_count'),
+            proposals_pre_screening_count=pipeline_counter_field('pre_screening_count'),
+            proposals_submissions_count=pipeline_counter_field('submissions_count'),
+            proposals_screening_count=pipeline_counter_field('screening_count'),
+            proposals_interviewing_count=pipeline_counter_field('interviewing_count'),
+            proposals_offering_count=pipeline_counter_field('offering_count'),
+            proposals_hired_count=pipeline_counter_field('hired_count'),
+            proposals_rejected_count=pipeline_counter_field('rejected_count'),
+        )
+        .order_by('-created_at')
+    )
 
 
 def annotate_job_hired_count(queryset):
@@ -157,6 +115,22 @@ def annotate_job_hired_count(queryset):
     ).order_by('-created_at')
 
 
+def annotate_job_candidate_proposed(qs, candidate):
+    return qs.annotate(
+        checked_candidate_proposed=Exists(
+            m.Proposal.objects.filter(job=OuterRef('pk'), candidate=candidate)
+        )
+    )
+
+
+def annotate_job_user_has_access(qs, profile):
+    return qs.annotate(
+        checked_user_has_access=Exists(
+            profile.apply_jobs_filter(m.Job.objects.filter(pk=OuterRef('pk')))
+        )
+    )
+
+
 def aggregate_proposals_stats(qs):
     # TODO(ZOO-829)
     return qs.aggregate(
@@ -193,6 +167,14 @@ def annotate_candidate_has_jobs_proposed_to(qs):
     )
 
 
+def annotate_candidate_proposed_to(qs, job_id):
+    return qs.annotate(
+        proposed_to_checked_job=Exists(
+            m.Proposal.objects.filter(candidate=OuterRef('pk'), job_id=job_id)
+        )
+    )
+
+
 def annotate_count_by_date(qs, counted_field, date_field, trunc):
     return (
         qs.values(counted_field)
@@ -222,19 +204,8 @@ def annotate_proposal_deal_pipeline_metrics(qs, agency):
             )
         )
         .annotate(
-            exchange_rate=Subquery(
-                CurrencyRate.objects.filter(
-                    currency=OuterRef('candidate__current_salary_currency')
-                ).values('value'),
-                output_field=FloatField(),
-            ),
-        )
-        .annotate(
-            converted_current_salary=Case(
-                When(candidate__current_salary=None, then=0),
-                When(exchange_rate=None, then=F('candidate__current_salary')),
-                default=F('candidate__current_salary') / F('exchange_rate'),
-                output_field=FloatField(),
+            converted_current_salary=Coalesce(
+                F('candidate__current_salary_base'), 0, output_field=FloatField()
             )
         )
         .order_by('-org_status_order', '-converted_current_salary', 'pk')
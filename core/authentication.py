@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+User = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend loading the session User with profile and organization.
+
+    Profile of the request User is resolved by most views, access policies
+    and serializers, selecting it with the User saves a query per profile
+    relation and one for the organization on every authenticated request.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = User.objects.with_profile().get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+
+        return user if self.user_can_authenticate(user) else None
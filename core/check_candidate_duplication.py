@@ -1,9 +1,52 @@
-from django.db.models import Q, Value, BooleanField, Max, Case, When
-
-from core.models import Candidate
+from django.db import connection
+from django.db.models import (
+    Q,
+    Value,
+    BooleanField,
+    Case,
+    When,
+    Exists,
+    OuterRef,
+    Subquery,
+    Max,
+)
+
+from core.constants import CandidateDuplicationKeyType
+from core.models import (
+    Candidate,
+    CandidateDuplicationKey,
+    CandidateFuzzyName,
+    Proposal,
+)
+from core.utils import get_candidate_duplication_keys, get_candidate_fuzzy_names
 
 boolean_field = BooleanField()
 
+POSSIBLE_DUPLICATES_LIMIT = 10
+
+# best similarity of fuzzy names of every Candidate to the names of each
+# new Candidate in the batch, with the same trigram index and thresholds
+# as CandidateFuzzyName.get_similar
+BATCH_POSSIBLE_DUPLICATES_SQL = '''
+    SELECT
+        name.candidate_index,
+        candidate.id,
+        candidate.first_name,
+        candidate.last_name,
+        candidate.email,
+        candidate.linkedin_url,
+        max(similarity(fuzzy_name.value, name.value))::double precision
+    FROM unnest(%s::integer[], %s::text[], %s::text[], %s::real[])
+        AS name (candidate_index, key_type, value, threshold)
+    JOIN core_candidatefuzzyname fuzzy_name
+        ON fuzzy_name.key_type = name.key_type AND fuzzy_name.value %% name.value
+    JOIN core_candidate candidate ON candidate.id = fuzzy_name.candidate_id
+    WHERE
+        similarity(fuzzy_name.value, name.value) >= name.threshold
+        AND candidate.id IN ({candidate_ids})
+    GROUP BY name.candidate_index, candidate.id
+'''
+
 
 def flag(condition):
     return Case(
@@ -12,96 +55,373 @@ def flag(condition):
     )
 
 
-def get_possible_condition(new_candidate):
-    cond_is_possible = Q(
-        first_name=new_candidate['first_name'], last_name=new_candidate['last_name']
-    )
+def get_keys_condition(keys):
+    """Return filter matching CandidateDuplicationKey rows with given keys."""
+    values_by_type = {}
+    for key_type, value in keys:
+        values_by_type.setdefault(key_type, []).append(value)
 
-    first_name_kanji = new_candidate.get('first_name_kanji', None)
-    last_name_kanji = new_candidate.get('last_name_kanji', None)
+    condition = Q()
+    for key_type, values in values_by_type.items():
+        condition |= Q(key_type=key_type, value__in=values)
 
-    if first_name_kanji and last_name_kanji:
-        cond_is_possible = cond_is_possible | Q(
-            first_name_kanji=first_name_kanji, last_name_kanji=last_name_kanji,
-        )
+    return condition
 
-    id = new_candidate.get('id', None)
-    if id:
-        cond_is_possible = cond_is_possible & ~Q(id=id)
 
-    return cond_is_possible
+def has_any_key(keys):
+    if not keys:
+        return Value(False, boolean_field)
 
+    return Exists(
+        CandidateDuplicationKey.objects.filter(
+            get_keys_condition(keys), candidate=OuterRef('pk')
+        )
+    )
 
-def email_match(field, new_candidate, data_field):
-    return Q(**{field: new_candidate.get(data_field, '')})
 
+def get_duplication_candidates(new_candidate, profile):
+    """
+    Return info on every Candidate sharing a duplication key with the new one.
 
-def one_of_emails(field, new_candidate):
-    return (
-        email_match(field, new_candidate, 'email')
-        | email_match(field, new_candidate, 'secondary_email')
-    ) & ~Q(**{f'{field}__exact': ''})
+    All matches are resolved in a single query over the indexed
+    CandidateDuplicationKey table, including archived Candidates and
+    Candidates of other organizations.
+    """
+    keys = get_candidate_duplication_keys(new_candidate)
+    absolute_keys = {
+        key for key in keys if key[0] in CandidateDuplicationKeyType.get_absolute_keys()
+    }
+    possible_keys = keys - absolute_keys
 
+    if not keys:
+        return []
 
-def get_absolute_condition(new_candidate):
-    cond_is_absolute = one_of_emails('email', new_candidate) | one_of_emails(
-        'secondary_email', new_candidate
+    queryset = Candidate.archived_objects.filter(
+        id__in=CandidateDuplicationKey.objects.filter(get_keys_condition(keys)).values(
+            'candidate_id'
+        )
     )
 
-    linkedin_url = new_candidate.get('linkedin_url', '')
-    if linkedin_url != '':
-        cond_is_absolute = cond_is_absolute | Q(linkedin_url=linkedin_url)
-
-    zoho_id = new_candidate.get('zoho_id', '')
-    if zoho_id != '':
-        cond_is_absolute = cond_is_absolute | Q(zoho_id=zoho_id)
-
     id = new_candidate.get('id', None)
     if id:
-        cond_is_absolute = cond_is_absolute & ~Q(id=id) & Q(original__isnull=True)
+        queryset = queryset.exclude(id=id)
+
+    job = new_candidate.get('job', None)
+    job_proposals = Proposal.objects.filter(candidate=OuterRef('pk'), job=job)
+
+    return queryset.annotate(
+        has_absolute_key=has_any_key(absolute_keys),
+        has_possible_key=has_any_key(possible_keys),
+        is_owned=Exists(
+            profile.apply_own_candidates_filter(
+                Candidate.archived_objects.filter(pk=OuterRef('pk'))
+            )
+        ),
+        last_submitted=Subquery(
+            job_proposals.order_by('-created_at').values('created_at')[:1]
+        ),
+    ).values(
+        'id',
+        'archived',
+        'original_id',
+        'has_absolute_key',
+        'has_possible_key',
+        'is_owned',
+        'last_submitted',
+    )
 
-    return cond_is_absolute
 
+def resolve_duplication(new_candidate, matches):
+    """
+    Classify Candidates matched by duplication keys of the new Candidate.
 
-def check_candidate_duplication(new_candidate, profile):
-    cond_is_absolute = get_absolute_condition(new_candidate)
-    cond_is_possible = get_possible_condition(new_candidate)
+    Every match is a dict with `id`, `archived`, `original_id`,
+    `has_absolute_key`, `has_possible_key`, `is_owned` and `last_submitted`
+    (creation time of the latest proposal to the checked job, if any).
+    """
+    restrict_absolute_to_originals = bool(new_candidate.get('id', None))
 
-    queryset = Candidate.objects.filter(cond_is_absolute | cond_is_possible)
+    absolute_ids = set()
+    possible_ids = set()
+    submitted_ids = set()
+    owned_ids = set()
+    archived_ids = set()
+    last_submitted_by_id = {}
 
-    qs_on_job = Candidate.objects.filter(
-        proposals__job=new_candidate.get('job'), proposals__job_id__isnull=False
-    )
+    for candidate in matches:
+        id = candidate['id']
+        is_absolute = candidate['has_absolute_key'] and not (
+            restrict_absolute_to_originals and candidate['original_id']
+        )
 
-    qs_owned = profile.apply_own_candidates_filter(queryset)
+        if is_absolute:
+            absolute_ids.add(id)
+        elif candidate['has_possible_key']:
+            possible_ids.add(id)
+        else:
+            continue
 
-    qs_not_owned = qs_on_job.exclude(id__in=qs_owned.values('id'))
+        if candidate['archived']:
+            archived_ids.add(id)
+        elif candidate['last_submitted'] is not None:
+            submitted_ids.add(id)
+            last_submitted_by_id[id] = candidate['last_submitted']
 
+        if candidate['is_owned']:
+            owned_ids.add(id)
+
+    not_owned_submitted_ids = submitted_ids - owned_ids
     submitted_by_others = None
-    if qs_not_owned.filter(cond_is_absolute).exists():
+    if not_owned_submitted_ids & absolute_ids:
         submitted_by_others = 'ABSOLUTE'
-    elif qs_not_owned.filter(cond_is_possible).exists():
+    elif not_owned_submitted_ids & possible_ids:
         submitted_by_others = 'POSSIBLE'
 
-    qs_on_job_owned = profile.apply_own_candidates_filter(qs_on_job)
+    owned_submitted_ids = submitted_ids & owned_ids
+    same_group_ids = owned_submitted_ids & absolute_ids
+    if not same_group_ids:
+        same_group_ids = owned_submitted_ids & possible_ids
+
+    return {
+        'duplicate_ids': owned_ids - archived_ids,
+        'absolute_ids': absolute_ids,
+        'submitted_ids': submitted_ids,
+        'to_restore_ids': owned_ids & archived_ids & absolute_ids,
+        'submitted_by_others': submitted_by_others,
+        'last_submitted': max(
+            (last_submitted_by_id[id] for id in same_group_ids), default=None
+        ),
+    }
+
 
-    qs_on_job_same_group = qs_on_job_owned.filter(cond_is_absolute)
+def get_possible_duplicates(new_candidate, profile, exclude_ids=()):
+    """
+    Return Candidates of the organization with names similar to the new one.
 
-    qs_owned_include_archived = profile.apply_own_candidates_filter(
-        Candidate.archived_objects.filter(cond_is_absolute & Q(archived=True))
+    Candidates are annotated with `similarity` of the closest name
+    and ordered by it, `exclude_ids` are usually the exact duplicates.
+    """
+    names = get_candidate_fuzzy_names(new_candidate)
+    if not names:
+        return Candidate.objects.none()
+
+    exclude_ids = set(exclude_ids)
+    id = new_candidate.get('id', None)
+    if id:
+        exclude_ids.add(id)
+
+    queryset = profile.apply_own_candidates_filter(Candidate.objects.all())
+    return (
+        queryset.filter(
+            id__in=CandidateFuzzyName.get_similar(names).values('candidate_id')
+        )
+        .exclude(id__in=exclude_ids)
+        .annotate(similarity=CandidateFuzzyName.get_similarity(names))
+        .order_by('-similarity', 'id')[:POSSIBLE_DUPLICATES_LIMIT]
     )
 
-    if not qs_on_job_same_group.exists():
-        qs_on_job_same_group = qs_on_job_owned.filter(cond_is_possible)
+
+def check_candidate_duplication(new_candidate, profile):
+    resolved = resolve_duplication(
+        new_candidate, get_duplication_candidates(new_candidate, profile)
+    )
 
     return {
-        'queryset': qs_owned.annotate(
-            is_absolute=flag(cond_is_absolute),
-            is_submitted=flag(Q(id__in=qs_on_job.values('id'))),
+        'queryset': Candidate.objects.filter(id__in=resolved['duplicate_ids']).annotate(
+            is_absolute=flag(Q(id__in=resolved['absolute_ids'])),
+            is_submitted=flag(Q(id__in=resolved['submitted_ids'])),
+        ),
+        'submitted_by_others': resolved['submitted_by_others'],
+        'last_submitted': resolved['last_submitted'],
+        'to_restore': Candidate.archived_objects.filter(
+            id__in=resolved['to_restore_ids']
+        ),
+        'possible_duplicates': get_possible_duplicates(
+            new_candidate, profile, exclude_ids=resolved['duplicate_ids']
         ),
-        'submitted_by_others': submitted_by_others,
-        'last_submitted': qs_on_job_same_group.aggregate(
-            Max('proposals__created_at')
-        ).get('proposals__created_at__max'),
-        'to_restore': qs_owned_include_archived,
     }
+
+
+DUPLICATE_FIELDS = ('first_name', 'last_name', 'email', 'linkedin_url')
+
+
+def get_batch_possible_duplicates(new_candidates, profile, exclude_ids_by_index):
+    """
+    Return lists of Candidates with names similar to each of the new ones.
+
+    Same as `get_possible_duplicates` for every new Candidate, but with
+    a single query for the whole batch. Candidates are dicts with `id`,
+    `similarity` and DUPLICATE_FIELDS.
+    """
+    names = [
+        (index, key_type, name, CandidateFuzzyName.SIMILARITY_THRESHOLDS[key_type])
+        for index, new_candidate in enumerate(new_candidates)
+        for key_type, name in get_candidate_fuzzy_names(new_candidate).items()
+    ]
+    possible_duplicates = [[] for _ in new_candidates]
+    if not names:
+        return possible_duplicates
+
+    candidate_ids_sql, candidate_ids_params = (
+        profile.apply_own_candidates_filter(Candidate.objects.all())
+        .values('id')
+        .query.sql_with_params()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            BATCH_POSSIBLE_DUPLICATES_SQL.format(candidate_ids=candidate_ids_sql),
+            [*(list(values) for values in zip(*names)), *candidate_ids_params],
+        )
+        rows = cursor.fetchall()
+
+    for index, id, *values, similarity in rows:
+        if id in exclude_ids_by_index[index] or id == new_candidates[index].get('id'):
+            continue
+
+        possible_duplicates[index].append(
+            {'id': id, **dict(zip(DUPLICATE_FIELDS, values)), 'similarity': similarity}
+        )
+
+    return [
+        sorted(
+            candidates,
+            key=lambda candidate: (-candidate['similarity'], candidate['id']),
+        )[:POSSIBLE_DUPLICATES_LIMIT]
+        for candidates in possible_duplicates
+    ]
+
+
+def check_candidates_duplication(new_candidates, profile):
+    """
+    Check a batch of new Candidates for duplicates.
+
+    Uses a constant number of queries regardless of the batch size:
+    one over duplication keys of all Candidates, one for their
+    proposals to the checked jobs and one over fuzzy names for possible
+    duplicates. Returns a list of results in order of `new_candidates`,
+    with `duplicates`, `to_restore` and `possible_duplicates` as lists
+    of dicts instead of querysets.
+    """
+    keys_by_index = [
+        get_candidate_duplication_keys(new_candidate)
+        for new_candidate in new_candidates
+    ]
+    all_keys = set().union(*keys_by_index)
+
+    matched_keys = []
+    if all_keys:
+        matched_keys = (
+            CandidateDuplicationKey.objects.filter(get_keys_condition(all_keys))
+            .annotate(
+                is_owned=Exists(
+                    profile.apply_own_candidates_filter(
+                        Candidate.archived_objects.filter(pk=OuterRef('candidate_id'))
+                    )
+                ),
+            )
+            .values(
+                'candidate_id',
+                'key_type',
+                'value',
+                'candidate__archived',
+                'candidate__original_id',
+                'is_owned',
+                *(f'candidate__{field}' for field in DUPLICATE_FIELDS),
+            )
+        )
+
+    candidates_by_key = {}
+    candidates_by_id = {}
+    for row in matched_keys:
+        candidate_id = row['candidate_id']
+        candidates_by_key.setdefault((row['key_type'], row['value']), set()).add(
+            candidate_id
+        )
+        candidates_by_id[candidate_id] = {
+            'id': candidate_id,
+            'archived': row['candidate__archived'],
+            'original_id': row['candidate__original_id'],
+            'is_owned': row['is_owned'],
+            **{field: row[f'candidate__{field}'] for field in DUPLICATE_FIELDS},
+        }
+
+    job_ids = {
+        getattr(new_candidate.get('job'), 'pk', new_candidate.get('job'))
+        for new_candidate in new_candidates
+    } - {None}
+    last_submitted_by_job = {}
+    if candidates_by_id and job_ids:
+        for proposal in (
+            Proposal.objects.filter(
+                candidate__in=list(candidates_by_id), job__in=job_ids
+            )
+            .values('job_id', 'candidate_id')
+            .annotate(last_submitted=Max('created_at'))
+        ):
+            last_submitted_by_job[
+                proposal['job_id'], proposal['candidate_id']
+            ] = proposal['last_submitted']
+
+    results = []
+    for new_candidate, keys in zip(new_candidates, keys_by_index):
+        job = new_candidate.get('job')
+        job_id = getattr(job, 'pk', job)
+        absolute_keys = {
+            key
+            for key in keys
+            if key[0] in CandidateDuplicationKeyType.get_absolute_keys()
+        }
+
+        matches = {}
+        for key in keys:
+            for candidate_id in candidates_by_key.get(key, ()):
+                if candidate_id == new_candidate.get('id', None):
+                    continue
+                match = matches.setdefault(
+                    candidate_id,
+                    {
+                        **candidates_by_id[candidate_id],
+                        'has_absolute_key': False,
+                        'has_possible_key': False,
+                        'last_submitted': last_submitted_by_job.get(
+                            (job_id, candidate_id)
+                        ),
+                    },
+                )
+                if key in absolute_keys:
+                    match['has_absolute_key'] = True
+                else:
+                    match['has_possible_key'] = True
+
+        resolved = resolve_duplication(new_candidate, matches.values())
+
+        duplicates = [
+            {
+                **matches[id],
+                'is_absolute': id in resolved['absolute_ids'],
+                'is_submitted': id in resolved['submitted_ids'],
+            }
+            for id in sorted(resolved['duplicate_ids'])
+        ]
+        duplicates.sort(key=lambda duplicate: not duplicate['is_absolute'])
+
+        results.append(
+            {
+                'duplicates': duplicates,
+                'submitted_by_others': resolved['submitted_by_others'],
+                'last_submitted': resolved['last_submitted'],
+                'to_restore': [
+                    matches[id] for id in sorted(resolved['to_restore_ids'])
+                ],
+            }
+        )
+
+    possible_duplicates = get_batch_possible_duplicates(
+        new_candidates,
+        profile,
+        [{duplicate['id'] for duplicate in result['duplicates']} for result in results],
+    )
+    for result, candidates in zip(results, possible_duplicates):
+        result['possible_duplicates'] = candidates
+
+    return results
@@ -229,6 +229,27 @@ class ProposalInterviewStatus(StatusEnum):
         return [item.key for item in cls.get_closed_statuses()]
 
 
+class CandidateDuplicationKeyType(StatusEnum):
+    EMAIL = _('Email')
+    LINKEDIN = _('LinkedIn')
+    ZOHO = _('Zoho ID')
+    NAME = _('Name')
+    NAME_KANJI = _('Name (Kanji)')
+    NAME_KATAKANA = _('Name (Katakana)')
+
+    @classmethod
+    def get_absolute_keys(cls):
+        return [cls.EMAIL.key, cls.LINKEDIN.key, cls.ZOHO.key]
+
+    @classmethod
+    def get_possible_keys(cls):
+        return [cls.NAME.key, cls.NAME_KANJI.key]
+
+    @classmethod
+    def get_fuzzy_keys(cls):
+        return [cls.NAME.key, cls.NAME_KANJI.key, cls.NAME_KATAKANA.key]
+
+
 class QuickActionVerb(StatusEnum):
     CHANGE_STATUS = 'Change Status'
     REJECT = 'Reject Candidate'
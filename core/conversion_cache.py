@@ -0,0 +1,122 @@
+import hashlib
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from core import models as m
+from core.utils.cache import count_cache_access, get_cache_access_stats
+
+logger = logging.getLogger(__name__)
+
+STATS_NAME = 'conversion'
+
+
+def get_content_hash(input_file):
+    content_hash = hashlib.sha256()
+    with input_file.open('rb'):
+        for chunk in input_file.chunks():
+            content_hash.update(chunk)
+
+    return content_hash.hexdigest()
+
+
+def record_cache_access(operation, hit):
+    count_cache_access(STATS_NAME, hit)
+
+    logger.debug('Conversion cache %s: %s', 'hit' if hit else 'miss', operation)
+
+
+def get_conversion_cache_stats():
+    """Return numbers of cache hits and misses, stored files and their size."""
+    stored = m.ConvertedFile.objects.aggregate(files=Count('id'), size=Sum('size'))
+    return {
+        **get_cache_access_stats([STATS_NAME])[STATS_NAME],
+        'files': stored['files'],
+        'size': stored['size'] or 0,
+    }
+
+
+def get_cached_file(content_hash, operation):
+    converted = m.ConvertedFile.objects.filter(
+        content_hash=content_hash, operation=operation
+    ).first()
+    if converted is None:
+        return None
+
+    try:
+        with converted.file.open('rb') as cached_file:
+            content = cached_file.read()
+    except OSError:
+        logger.warning('Cached conversion output is missing: %s', converted.file.name)
+        converted.delete()
+        return None
+
+    m.ConvertedFile.objects.filter(id=converted.id).update(
+        hits=F('hits') + 1, last_used_at=timezone.now()
+    )
+    return content, os.path.splitext(converted.file.name)[1]
+
+
+def store_file(content_hash, operation, content, filename):
+    converted = m.ConvertedFile(
+        content_hash=content_hash, operation=operation, size=content.size
+    )
+    ext = os.path.splitext(filename)[1]
+    converted.file.save(f'{content_hash}-{operation}{ext}', content, save=False)
+    content.seek(0)
+
+    try:
+        with transaction.atomic():
+            converted.save()
+    except IntegrityError:
+        # converted concurrently by another worker
+        converted.file.delete(save=False)
+        return
+
+    evict_files(settings.CONVERSION_CACHE_MAX_SIZE)
+
+
+def evict_files(max_size):
+    """Delete least recently used outputs until their total size fits."""
+    total = m.ConvertedFile.objects.aggregate(size=Sum('size'))['size'] or 0
+    if total <= max_size:
+        return
+
+    for converted in m.ConvertedFile.objects.order_by('last_used_at', 'id').iterator():
+        converted.file.delete(save=False)
+        converted.delete()
+        total -= converted.size
+        if total <= max_size:
+            break
+
+
+def convert_cached(input_file, operation, convert):
+    """
+    Return converted file and its name, reusing output of the same content.
+
+    `convert` is called without arguments on a cache miss and returns
+    the converted file and its name, as PDFConverter backends do.
+    The cached output is named after the input file.
+    """
+    if not settings.CONVERSION_CACHE_MAX_SIZE:
+        return convert()
+
+    content_hash = get_content_hash(input_file)
+    cached = get_cached_file(content_hash, operation)
+    record_cache_access(operation, hit=cached is not None)
+
+    if cached is not None:
+        content, ext = cached
+        name = os.path.splitext(os.path.basename(input_file.name))[0]
+        filename = f'{name}{ext}'
+        return File(io.BytesIO(content), name=filename), filename
+
+    content, filename = convert()
+    store_file(content_hash, operation, content, filename)
+    return content, filename
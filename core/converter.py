@@ -1,10 +1,14 @@
 import io
 import os
+import subprocess
 import tempfile
 
 import cloudconvert
 from django.conf import settings
 from django.core.files import File
+from django.utils.module_loading import import_string
+
+from core.conversion_cache import convert_cached
 
 
 # Common exceptions
@@ -24,9 +28,167 @@ class ExtensionError(ConverterError, TypeError):
     """Unappropriated extension"""
 
 
-class PDFConverter(object):
+class ConversionFailed(ConverterError):
+    """Conversion engine failed to convert the file"""
+
+
+def read_output_file(temp_dir, filename):
+    """
+    Read the converted file from temporary directory into memory
+    :return: File instance, filename
+    """
+    with open(os.path.join(temp_dir, filename), 'rb') as content:
+        return File(io.BytesIO(content.read()), name=filename), filename
+
+
+class CloudConvertBackend(object):
+    """Converts files with the remote cloudconvert API."""
+
+    _api = None
+
+    @classmethod
+    def get_api(cls):
+        if cls._api is None:
+            cls._api = cloudconvert.Api(settings.CLOUDCONVERT_API_KEY)
+        return cls._api
+
+    @classmethod
+    def get_temp_file(cls, process):
+        """
+        Put the file from temporary directory to default media storage
+        :param: process (cloudconvert process obj)
+        :return: File instance, filename
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+
+            download = process.download(localfile=temp_dir)
+            filename = download.data['output']['filename']
+
+            return read_output_file(temp_dir, filename)
+
+    def convert(self, input_file, input_format, output_format):
+        process = self.get_api().convert(
+            {
+                "inputformat": input_format,
+                "outputformat": output_format,
+                "input": "upload",
+                "file": io.BufferedReader(input_file.file.open()),
+            }
+        )
+        process.wait()
+
+        return self.get_temp_file(process)
+
+    def create_thumbnail(self, input_file):
+        process = self.get_api().convert(
+            {
+                "inputformat": "pdf",
+                "outputformat": "jpg",
+                "input": "upload",
+                "file": io.BufferedReader(input_file.file.open()),
+                "converteroptions": {
+                    "density": 600,
+                    "quality": 100,
+                    "command": "-thumbnail x370 -background white -alpha remove {INPUTFILE}[0] {OUTPUTFILE}",
+                },
+            }
+        )
+        process.wait()
+
+        return self.get_temp_file(process)
+
+
+class LocalBackend(object):
+    """
+    Converts files with local engines: headless LibreOffice for documents
+    and poppler `pdftoppm` for thumbnails of the first PDF page.
+    """
+
+    soffice_binary = 'soffice'
+    pdftoppm_binary = 'pdftoppm'
+    thumbnail_height = 370
+    timeout = 120  # seconds
+
+    # LibreOffice filters of output formats, pdf is chosen by the input
+    OUTPUT_FILTERS = {'txt': 'txt:Text (encoded):UTF8'}
+
+    def run(self, args):
+        try:
+            subprocess.run(
+                args,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.SubprocessError) as error:
+            raise ConversionFailed(error)
+
+    def write_input_file(self, input_file, temp_dir):
+        path = os.path.join(temp_dir, os.path.basename(input_file.name))
+        with input_file.open('rb') as source, open(path, 'wb') as target:
+            for chunk in source.chunks():
+                target.write(chunk)
+
+        return path
+
+    def convert(self, input_file, input_format, output_format):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = self.write_input_file(input_file, temp_dir)
+            output_dir = os.path.join(temp_dir, 'output')
+            self.run(
+                [
+                    self.soffice_binary,
+                    '--headless',
+                    # separate profile, concurrent instances can't share one
+                    f'-env:UserInstallation=file://{temp_dir}/profile',
+                    '--convert-to',
+                    self.OUTPUT_FILTERS.get(output_format, output_format),
+                    '--outdir',
+                    output_dir,
+                    input_path,
+                ]
+            )
+
+            filename = '{}.{}'.format(
+                os.path.splitext(os.path.basename(input_path))[0], output_format
+            )
+            try:
+                return read_output_file(output_dir, filename)
+            except FileNotFoundError as error:
+                raise ConversionFailed(error)
+
+    def create_thumbnail(self, input_file):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = self.write_input_file(input_file, temp_dir)
+            name = os.path.splitext(os.path.basename(input_path))[0]
+            self.run(
+                [
+                    self.pdftoppm_binary,
+                    '-jpeg',
+                    '-singlefile',
+                    '-f',
+                    '1',
+                    '-scale-to-x',
+                    '-1',
+                    '-scale-to-y',
+                    str(self.thumbnail_height),
+                    input_path,
+                    os.path.join(temp_dir, name),
+                ]
+            )
+
+            try:
+                return read_output_file(temp_dir, f'{name}.jpg')
+            except FileNotFoundError as error:
+                raise ConversionFailed(error)
+
 
-    API = cloudconvert.Api(settings.CLOUDCONVERT_API_KEY)
+def get_converter_backend():
+    return import_string(settings.PDF_CONVERTER_BACKEND)()
+
+
+class PDFConverter(object):
 
     SUPPORTED_INPUT_FORMATS = (
         'doc',
@@ -45,23 +207,6 @@ class PDFConverter(object):
     )
     SUPPORTED_OUTPUT_FORMATS = ('pdf', 'txt')
 
-    @classmethod
-    def get_temp_file(cls, process):
-        """
-        Put the file from temporary directory to default media storage
-        :param: process (cloudconvert process obj)
-        :return: File instance, filename
-        """
-        with tempfile.TemporaryDirectory() as temp_dir:
-
-            download = process.download(localfile=temp_dir)
-            filename = download.data['output']['filename']
-
-            path = temp_dir + '/' + filename
-            content = open(path, 'rb')
-
-            return File(content), filename
-
     @classmethod
     def convert(cls, input_file, output_format='pdf'):
         """
@@ -94,17 +239,11 @@ class PDFConverter(object):
                 "Supported formats: {1}".format(ext[1:], cls.SUPPORTED_INPUT_FORMATS)
             )
 
-        process = cls.API.convert(
-            {
-                "inputformat": ext[1:],
-                "outputformat": output_format,
-                "input": "upload",
-                "file": io.BufferedReader(input_file.file.open()),
-            }
+        content, filename = convert_cached(
+            input_file,
+            output_format,
+            lambda: get_converter_backend().convert(input_file, ext[1:], output_format),
         )
-        process.wait()
-
-        content, filename = cls.get_temp_file(process)
 
         return content, filename, output_format
 
@@ -121,21 +260,8 @@ class PDFConverter(object):
                 "Thumbnail may only be created for PDF files".format(ext)
             )
 
-        process = cls.API.convert(
-            {
-                "inputformat": "pdf",
-                "outputformat": "jpg",
-                "input": "upload",
-                "file": io.BufferedReader(input_file.file.open()),
-                "converteroptions": {
-                    "density": 600,
-                    "quality": 100,
-                    "command": "-thumbnail x370 -background white -alpha remove {INPUTFILE}[0] {OUTPUTFILE}",
-                },
-            }
+        return convert_cached(
+            input_file,
+            'thumbnail',
+            lambda: get_converter_backend().create_thumbnail(input_file),
         )
-        process.wait()
-
-        content, filename = cls.get_temp_file(process)
-
-        return content, filename
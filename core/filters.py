@@ -1,15 +1,19 @@
+import operator
+import re
 from collections import defaultdict
+from functools import reduce
 from itertools import count
 
-from django.db.models import Q, Exists, OuterRef, Max, F, Value, Case, When
-from django.db.models.functions import Concat
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Q, Exists, OuterRef, Max, F, FloatField, Value, Case, When
+from django.db.models.functions import Cast, Concat
 from django_filters import rest_framework as filters
 from rest_framework import filters as drf_filters
-from rest_framework.settings import api_settings
 from reversion.models import Version
 
 from core import models as m
-from core.utils import get_user_org, get_bool_annotation
+from core.constants import CandidateDuplicationKeyType
+from core.utils import get_bool_annotation, get_user_org, normalize_fuzzy_name
 
 
 class AgencyFilter(filters.FilterSet):
@@ -299,27 +303,103 @@ class CandidateFilterSet(filters.FilterSet):
         fields = ('tags',)
 
 
+# Hiragana, katakana and CJK ideographs, not split into words by the parser
+CJK_RE = re.compile(
+    r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff66-\uff9f]'
+)
+
+
 class CandidateSearchFilter(drf_filters.SearchFilter):
-    def filter_queryset(self, request, queryset, view):
-        user = request.user if request else None
-        profile = user.profile if user else None
-        org = profile.org if profile else None
+    """
+    Full-text search over CandidateSearchDocument.
+
+    Every search term matches words of the document or of the note of
+    the User's organization starting with it, Japanese terms also match
+    anywhere in their text. The whole search also matches misspelled
+    names of the Candidate. Results are ordered by rank and name
+    similarity unless ordering is requested.
+    """
+
+    def get_terms(self, request):
+        return [
+            term for term in self.get_search_terms(request) if re.search(r'\w', term)
+        ]
+
+    def get_term_query(self, term):
+        return SearchQuery(
+            "'{}':*".format(term.replace('\\', '\\\\').replace("'", "''")),
+            config='simple',
+            search_type='raw',
+        )
+
+    def get_search_query(self, request):
+        queries = [self.get_term_query(term) for term in self.get_terms(request)]
+        if not queries:
+            return None
 
-        params = request.query_params if request else dict()
-        search = params.get(api_settings.SEARCH_PARAM)
+        return reduce(operator.and_, queries)
 
-        if not org or not search:
-            return super().filter_queryset(request, queryset, view)
+    def get_fuzzy_names(self, request):
+        search = ' '.join(self.get_search_terms(request))
+        names = {
+            key_type: normalize_fuzzy_name(search, key_type)
+            for key_type in CandidateDuplicationKeyType.get_fuzzy_keys()
+        }
+        return {key_type: name for key_type, name in names.items() if name}
 
+    def get_notes(self, request):
+        """Return notes of the User's organization."""
+        profile = getattr(request.user, 'profile', None)
         org_content_type, org_id = get_user_org(profile)
+        if org_content_type is None:
+            return m.CandidateNote.objects.none()
+
+        return m.CandidateNote.objects.filter(
+            content_type=org_content_type, object_id=org_id
+        )
+
+    def get_term_filter(self, term, notes):
+        """Return filter of Candidates with the document or the note matching."""
+        match = Q(document=self.get_term_query(term))
+        if CJK_RE.search(term):
+            match |= Q(text__contains=term)
 
+        return Q(
+            id__in=m.CandidateSearchDocument.objects.filter(match).values(
+                'candidate_id'
+            )
+        ) | Q(id__in=notes.filter(match).values('candidate_id'))
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if query is None:
+            return queryset
+
+        notes = self.get_notes(request)
+        names = self.get_fuzzy_names(request)
         return (
-            super().filter_queryset(request, queryset, view).distinct()
-            | queryset.filter(
-                notes__content_type=org_content_type,
-                notes__object_id=org_id,
-                notes__text__icontains=search,
-            ).distinct()
+            queryset.filter(
+                reduce(
+                    operator.and_,
+                    (
+                        self.get_term_filter(term, notes)
+                        for term in self.get_terms(request)
+                    ),
+                )
+                | Q(
+                    id__in=m.CandidateFuzzyName.get_similar(names).values(
+                        'candidate_id'
+                    )
+                )
+            )
+            .annotate(
+                # double precision, so cursors keep exact values of real ranks
+                search_rank=Cast(
+                    SearchRank(F('search_document__document'), query), FloatField()
+                ),
+                name_similarity=m.CandidateFuzzyName.get_similarity(names),
+            )
+            .order_by(F('search_rank').desc(nulls_last=True), '-name_similarity', 'id')
         )
 
 
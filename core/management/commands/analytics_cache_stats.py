@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+# noinspection PyUnresolvedReferences
+import core.views.analytics  # registers cached endpoints
+from core.analytics_cache import get_analytics_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hits and misses of the analytics response cache'
+
+    def handle(self, *args, **options):
+        for endpoint, stats in get_analytics_cache_stats().items():
+            total = stats['hits'] + stats['misses']
+            hit_ratio = stats['hits'] / total if total else 0
+            self.stdout.write(
+                '{}: {} hits, {} misses, {:.0%} hit ratio'.format(
+                    endpoint, stats['hits'], stats['misses'], hit_ratio
+                )
+            )
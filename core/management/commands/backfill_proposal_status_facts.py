@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Proposal, ProposalStatusFact
+
+
+class Command(BaseCommand):
+    help = (
+        'Build analytics facts of all Proposals from their status history,'
+        ' e.g. after the history was created with bulk_create or changed'
+        ' with queryset update'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        proposal_ids = Proposal.objects.order_by('id').values_list('id', flat=True)
+
+        batch = []
+        count = 0
+        for proposal_id in proposal_ids.iterator(chunk_size=batch_size):
+            batch.append(proposal_id)
+            if len(batch) >= batch_size:
+                ProposalStatusFact.sync(batch)
+                count += len(batch)
+                batch = []
+
+        ProposalStatusFact.sync(batch)
+        count += len(batch)
+
+        self.stdout.write(f'Status facts of {count} proposals backfilled')
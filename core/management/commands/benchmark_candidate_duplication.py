@@ -0,0 +1,92 @@
+import random
+import secrets
+import statistics
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import models as m
+from core.check_candidate_duplication import check_candidate_duplication
+
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure candidate duplication check latency on a generated dataset.'
+        ' Generated candidates are rolled back unless --keep is passed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('client_id', nargs=1, type=int)
+        parser.add_argument('--count', type=int, default=1000000)
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._handle(*args, **options)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def _handle(self, *args, **options):
+        client = m.Client.objects.get(pk=options['client_id'][0])
+        profile = (
+            m.User.objects.filter(clientadministrator__client=client).first().profile
+        )
+
+        runid = secrets.token_hex(4)
+        count = options['count']
+
+        self.stdout.write(f'Generating {count} candidates...')
+        for start in range(0, count, BATCH_SIZE):
+            candidates = m.Candidate.objects.bulk_create(
+                [
+                    self.get_candidate(client, runid, i)
+                    for i in range(start, min(start + BATCH_SIZE, count))
+                ]
+            )
+            m.CandidateDuplicationKey.sync(candidates)
+
+        durations = []
+        for run in range(options['runs']):
+            i = random.randrange(count)
+            new_candidate = {
+                'first_name': 'Dummy',
+                'last_name': f'Candidate{runid}{i}',
+                'email': f'other_{runid}_{run}@localhost',
+                'secondary_email': f'dummy_{runid}_{random.randrange(count)}@localhost',
+                'linkedin_url': f'https://www.linkedin.com/in/dummy-{runid}-{i}',
+            }
+
+            started_at = time.perf_counter()
+            results = check_candidate_duplication(new_candidate, profile)
+            list(results['queryset'])
+            list(results['to_restore'])
+            durations.append((time.perf_counter() - started_at) * 1000)
+
+        durations.sort()
+        self.stdout.write(
+            'Duplication check latency over {} runs: '
+            'median {:.1f}ms, p95 {:.1f}ms, max {:.1f}ms'.format(
+                len(durations),
+                statistics.median(durations),
+                durations[int(len(durations) * 0.95) - 1],
+                durations[-1],
+            )
+        )
+
+    def get_candidate(self, client, runid, i):
+        return m.Candidate(
+            org_content_type=ContentType.objects.get_for_model(client),
+            org_id=client.pk,
+            first_name='Dummy',
+            last_name=f'Candidate{runid}{i}',
+            email=f'dummy_{runid}_{i}@localhost',
+            linkedin_url=f'https://www.linkedin.com/in/dummy-{runid}-{i}',
+            linkedin_slug=f'dummy-{runid}-{i}',
+        )
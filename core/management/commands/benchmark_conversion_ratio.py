@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core import models as m
+from core.views.analytics import get_conversion_ratio, get_conversion_ratios
+
+
+CONVERSION_GROUPS = (
+    'associated_to_job',
+    'submitted_to_hiring_manager',
+    'interviewing',
+    'pending_offer_acceptance',
+    'started',
+)
+CONVERSION_TABLE = tuple(
+    (group, CONVERSION_GROUPS[i + 1 :])
+    for i, group in enumerate(CONVERSION_GROUPS[:-1])
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure conversion ratio latency on data of gen_analytics_data command.'
+        ' Generated data is rolled back unless --keep is passed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('client_id', nargs=1, type=int)
+        parser.add_argument('--count', type=int, default=1000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._handle(*args, **options)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def _handle(self, *args, **options):
+        client_id = options['client_id'][0]
+
+        self.stdout.write(f'Generating {options["count"]} jobs with proposals...')
+        call_command('gen_analytics_data', client_id, count=options['count'])
+
+        proposals = m.Proposal.objects.filter(job__client_id=client_id)
+
+        for name, get_result in (
+            (
+                'get_conversion_ratio',
+                lambda: get_conversion_ratio(proposals, CONVERSION_GROUPS),
+            ),
+            (
+                'get_conversion_ratios',
+                lambda: get_conversion_ratios(proposals, CONVERSION_TABLE),
+            ),
+        ):
+            durations = []
+            for run in range(options['runs']):
+                with CaptureQueriesContext(connection) as queries:
+                    started_at = time.perf_counter()
+                    get_result()
+                    durations.append((time.perf_counter() - started_at) * 1000)
+
+            durations.sort()
+            self.stdout.write(
+                '{} latency over {} runs: median {:.1f}ms, max {:.1f}ms,'
+                ' {} queries per run'.format(
+                    name,
+                    len(durations),
+                    statistics.median(durations),
+                    durations[-1],
+                    len(queries),
+                )
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.conversion_cache import get_conversion_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hits and misses of the file conversion cache and its size'
+
+    def handle(self, *args, **options):
+        stats = get_conversion_cache_stats()
+        total = stats['hits'] + stats['misses']
+        hit_ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            '{} hits, {} misses, {:.0%} hit ratio, {} files, {} bytes'.format(
+                stats['hits'], stats['misses'], hit_ratio, stats['files'], stats['size']
+            )
+        )
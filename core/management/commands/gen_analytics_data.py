@@ -8,15 +8,28 @@ from django.utils import timezone
 
 from core import models as m
 
+SUBMITTED_FLOW = [
+    'associated_to_job',
+    'contacted',
+    'qualified',
+    'submitted_to_hiring_manager',
+]
+INTERVIEWING_FLOW = SUBMITTED_FLOW + ['interviewing']
+OFFERING_FLOW = INTERVIEWING_FLOW + [
+    'pending_hiring_decision',
+    'offer_to_be_prepared',
+    'pending_offer_acceptance',
+]
+
 FLOWS = [
-    ['new'],
-    ['new', 'approved'],
-    ['new', 'rejected'],
-    ['new', 'approved', 'interviewing'],
-    ['new', 'approved', 'interviewing', 'proceeding'],
-    ['new', 'approved', 'interviewing', 'proceeding', 'offer'],
-    ['new', 'approved', 'interviewing', 'proceeding', 'offer', 'offer_accepted'],
-    ['new', 'approved', 'interviewing', 'proceeding', 'offer', 'offer_declined'],
+    ['associated_to_job'],
+    ['associated_to_job', 'contacted'],
+    ['associated_to_job', 'contacted', 'qualified'],
+    SUBMITTED_FLOW,
+    INTERVIEWING_FLOW,
+    OFFERING_FLOW,
+    OFFERING_FLOW + ['pending_start'],
+    OFFERING_FLOW + ['pending_start', 'started'],
 ]
 
 
@@ -25,6 +38,9 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('client_id', nargs=1, type=int)
+        parser.add_argument(
+            '--count', type=int, default=100, help='Number of jobs and candidates'
+        )
 
     def handle(self, *args, **kwargs):
         with transaction.atomic():
@@ -34,12 +50,13 @@ class Command(BaseCommand):
         client = m.Client.objects.get(pk=options['client_id'][0])
 
         runid = secrets.token_hex(4)
+        count = options['count']
 
         functions = m.Function.objects.order_by('?')[:4]
 
         candidates = []
 
-        for i in range(100):
+        for i in range(count):
             candidates.append(
                 m.Candidate.objects.create(
                     organization=client,
@@ -51,16 +68,19 @@ class Command(BaseCommand):
                 )
             )
 
-        managers = list(m.User.objects.filter(hiringmanager__client=client))
+        managers = list(client.members)
 
-        for i in range(100):
+        for i in range(count):
             published_at = timezone.now() - timedelta(days=random.randint(2, 365))
             closed_at = min(
                 timezone.now(), published_at + timedelta(days=random.randint(2, 60))
             )
 
+            manager = random.choice(managers)
             job = m.Job.objects.create(
                 client=client,
+                organization=client,
+                owner=manager,
                 function=random.choice(functions),
                 title='ClosedJob{}'.format(secrets.token_hex(4)),
                 responsibilities='dummy closed job',
@@ -70,11 +90,11 @@ class Command(BaseCommand):
                 closed_at=closed_at,
             )
 
-            job.assign_manager(random.choice(managers))
+            job.assign_manager(manager)
 
             ignore_offer_accepted = False  # one hire per job
 
-            for candidate in random.sample(candidates, 8):
+            for candidate in random.sample(candidates, min(count, 8)):
                 proposal_created_at = published_at + (
                     (closed_at - published_at) * (random.random() / 3)
                 )
@@ -92,7 +112,7 @@ class Command(BaseCommand):
                 status = None
 
                 for f in flow:
-                    if f == 'offer_accepted':
+                    if f == 'pending_start':
                         if ignore_offer_accepted:
                             break
                         else:
@@ -3,7 +3,13 @@ from distutils.util import strtobool
 
 from django.core.management.base import BaseCommand
 
-from core.models import Agency, Candidate
+from core.models import (
+    Agency,
+    Candidate,
+    CandidateDuplicationKey,
+    CandidateFuzzyName,
+    CandidateSearchDocument,
+)
 
 
 class Command(BaseCommand):
@@ -32,21 +38,34 @@ class Command(BaseCommand):
                 print('Answer must be either y or n')
 
         with open(options['file'], 'r') as file:
-            Candidate.objects.bulk_create(
-                [
-                    Candidate(
-                        agency=agency,
-                        first_name=pd['first_name'],
-                        last_name=pd['last_name'],
-                        summary='\n\n'.join(
-                            i for i in [pd['headline'], pd['summary']] if i
-                        ),
-                        current_city=', '.join(
-                            i for i in [pd['city'], pd['country']] if i
-                        ),
-                        li_data=pd,
-                    )
-                    for pd in json.load(file)
-                ]
+            candidates = [
+                Candidate(
+                    organization=agency,
+                    first_name=pd['first_name'],
+                    last_name=pd['last_name'],
+                    summary='\n\n'.join(
+                        i for i in [pd['headline'], pd['summary']] if i
+                    ),
+                    current_city=', '.join(i for i in [pd['city'], pd['country']] if i),
+                    li_data=pd,
+                )
+                for pd in json.load(file)
+            ]
+
+        errors = Candidate.get_unique_fields_errors(candidates)
+        valid_candidates = [
+            candidate
+            for candidate, error_dict in zip(candidates, errors)
+            if not error_dict
+        ]
+        if len(valid_candidates) < len(candidates):
+            print(
+                f'{len(candidates) - len(valid_candidates)} candidates are duplicated'
             )
-            print('Candidates created!')
+
+        valid_candidates = Candidate.objects.bulk_create(valid_candidates)
+        CandidateDuplicationKey.sync(valid_candidates)
+        CandidateFuzzyName.sync(valid_candidates)
+        Candidate.update_base_salaries([candidate.pk for candidate in valid_candidates])
+        CandidateSearchDocument.sync([candidate.pk for candidate in valid_candidates])
+        print('Candidates created!')
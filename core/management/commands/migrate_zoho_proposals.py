@@ -9,6 +9,7 @@ from core.management.commands.migrate_zoho_jobs import get_job_zoho_id_from_zoho
 from core.models import (
     Job,
     Agency,
+    JobPipelineCounter,
     JobStatus,
     Proposal,
     ProposalStatus,
@@ -156,6 +157,7 @@ def migrate_zoho_proposals(zoho_auth_token, agency, default_user):
                 created += 1
 
             Proposal.objects.bulk_create(proposals)
+            JobPipelineCounter.sync([job.id])
 
     return jobs.count(), created, not_found
 
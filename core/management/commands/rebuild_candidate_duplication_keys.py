@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Candidate, CandidateDuplicationKey, CandidateFuzzyName
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild duplication keys and fuzzy names of all Candidates, e.g. after'
+        ' Candidates were created with bulk_create or changed with queryset update'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Candidate.archived_objects.only(
+            'org_content_type',
+            'org_id',
+            *CandidateDuplicationKey.CANDIDATE_FIELDS,
+            *CandidateFuzzyName.CANDIDATE_FIELDS,
+        ).order_by('id')
+
+        batch = []
+        count = 0
+        for candidate in queryset.iterator(chunk_size=batch_size):
+            batch.append(candidate)
+            if len(batch) >= batch_size:
+                CandidateDuplicationKey.sync(batch)
+                CandidateFuzzyName.sync(batch)
+                count += len(batch)
+                batch = []
+
+        CandidateDuplicationKey.sync(batch)
+        CandidateFuzzyName.sync(batch)
+        count += len(batch)
+
+        self.stdout.write(
+            f'Duplication keys and fuzzy names of {count} candidates rebuilt'
+        )
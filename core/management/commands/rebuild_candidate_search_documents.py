@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Candidate, CandidateSearchDocument
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild full-text search documents of all Candidates, e.g. after'
+        ' Candidates or their details were changed with bulk operations'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(
+            Candidate.archived_objects.order_by('id').values_list('id', flat=True)
+        )
+
+        for start in range(0, len(ids), batch_size):
+            CandidateSearchDocument.sync(ids[start : start + batch_size])
+
+        deleted, _ = CandidateSearchDocument.objects.exclude(
+            candidate_id__in=Candidate.archived_objects.values('id')
+        ).delete()
+
+        self.stdout.write(
+            f'Search documents of {len(ids)} candidates rebuilt, {deleted} removed'
+        )
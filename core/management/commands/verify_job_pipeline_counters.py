@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Job, JobPipelineCounter
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute pipeline counters of all Jobs from their Proposals and report'
+        ' the ones that differ, e.g. after Proposals were created with'
+        ' bulk_create or changed with queryset update'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--fix', action='store_true', help='Overwrite counters that differ'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        job_ids = Job.objects.order_by('id').values_list('id', flat=True)
+
+        batch = []
+        differences = 0
+        for job_id in job_ids.iterator(chunk_size=batch_size):
+            batch.append(job_id)
+            if len(batch) >= batch_size:
+                differences += self.verify(batch, options['fix'])
+                batch = []
+
+        differences += self.verify(batch, options['fix'])
+
+        if differences and not options['fix']:
+            raise CommandError(f'{differences} pipeline counters differ')
+
+        self.stdout.write(f'{differences} pipeline counters differ')
+
+    def verify(self, job_ids, fix):
+        expected = JobPipelineCounter.get_expected(job_ids)
+        actual = {
+            (counter['job_id'], counter['org_content_type_id'], counter['org_id']): {
+                field: counter[field] for field in JobPipelineCounter.COUNT_FIELDS
+            }
+            for counter in JobPipelineCounter.objects.filter(job__in=job_ids).values(
+                'job_id',
+                'org_content_type_id',
+                'org_id',
+                *JobPipelineCounter.COUNT_FIELDS,
+            )
+        }
+
+        # a missing counter counts zero Proposals
+        zero = dict.fromkeys(JobPipelineCounter.COUNT_FIELDS, 0)
+
+        differences = 0
+        for key in sorted(expected.keys() | actual.keys()):
+            if expected.get(key, zero) != actual.get(key, zero):
+                differences += 1
+                self.stdout.write(
+                    'Job {} organization {}:{}: stored {}, expected {}'.format(
+                        *key, actual.get(key), expected.get(key)
+                    )
+                )
+
+        if fix and differences:
+            JobPipelineCounter.sync(job_ids)
+
+        return differences
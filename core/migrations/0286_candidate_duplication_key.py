@@ -0,0 +1,133 @@
+# Generated by Django 3.1.13 on 2026-10-18 03:27
+
+import unicodedata
+from urllib.parse import unquote, urlsplit
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+CANDIDATE_FIELDS = (
+    'email',
+    'secondary_email',
+    'linkedin_url',
+    'zoho_id',
+    'first_name',
+    'last_name',
+    'first_name_kanji',
+    'last_name_kanji',
+)
+
+
+def normalize_duplication_value(value):
+    if value is None:
+        return ''
+
+    value = unicodedata.normalize('NFKC', str(value)).casefold()
+    return ' '.join(value.split())
+
+
+def parse_linkedin_slug(url):
+    parsed_url = urlsplit(url)
+
+    valid_url = parsed_url.hostname and (
+        parsed_url.hostname == 'linkedin.com'
+        or parsed_url.hostname.endswith('.linkedin.com')
+    )
+    if not valid_url:
+        return None
+
+    split_path = parsed_url.path.split('/')
+
+    try:
+        if split_path[1] == 'in' and split_path[2]:
+            return unquote(split_path[2]).strip()
+    except IndexError:
+        return None
+
+
+def get_candidate_duplication_keys(data):
+    keys = set()
+
+    for field in ('email', 'secondary_email'):
+        email = normalize_duplication_value(data.get(field))
+        if email:
+            keys.add(('email', email))
+
+    linkedin_url = (data.get('linkedin_url') or '').strip()
+    if linkedin_url:
+        linkedin = parse_linkedin_slug(linkedin_url) or linkedin_url.rstrip('/')
+        keys.add(('linkedin', normalize_duplication_value(linkedin)))
+
+    zoho_id = normalize_duplication_value(data.get('zoho_id'))
+    if zoho_id:
+        keys.add(('zoho', zoho_id))
+
+    name_fields = (
+        ('name', 'first_name', 'last_name'),
+        ('name_kanji', 'first_name_kanji', 'last_name_kanji'),
+    )
+    for key_type, first_name_field, last_name_field in name_fields:
+        first_name = normalize_duplication_value(data.get(first_name_field))
+        last_name = normalize_duplication_value(data.get(last_name_field))
+        if key_type == 'name_kanji' and not (first_name and last_name):
+            continue
+        if first_name or last_name:
+            keys.add((key_type, f'{first_name}\t{last_name}'))
+
+    return keys
+
+
+def create_duplication_keys(apps, schema_editor):
+    Candidate = apps.get_model('core', 'Candidate')
+    CandidateDuplicationKey = apps.get_model('core', 'CandidateDuplicationKey')
+
+    keys = []
+    for candidate in Candidate.objects.values(
+        'id', 'org_content_type_id', 'org_id', *CANDIDATE_FIELDS
+    ).iterator(chunk_size=BATCH_SIZE):
+        for key_type, value in get_candidate_duplication_keys(candidate):
+            keys.append(
+                CandidateDuplicationKey(
+                    candidate_id=candidate['id'],
+                    org_content_type_id=candidate['org_content_type_id'],
+                    org_id=candidate['org_id'],
+                    key_type=key_type,
+                    value=value,
+                )
+            )
+
+        if len(keys) >= BATCH_SIZE:
+            CandidateDuplicationKey.objects.bulk_create(keys)
+            keys = []
+
+    CandidateDuplicationKey.objects.bulk_create(keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0285_add_new_note_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateDuplicationKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('org_id', models.PositiveIntegerField(null=True)),
+                ('key_type', models.CharField(choices=[('email', 'Email'), ('linkedin', 'LinkedIn'), ('zoho', 'Zoho ID'), ('name', 'Name'), ('name_kanji', 'Name (Kanji)')], max_length=10)),
+                ('value', models.CharField(max_length=512)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplication_keys', to='core.candidate')),
+                ('org_content_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='candidateduplicationkey',
+            index=models.Index(fields=['key_type', 'value', 'org_content_type', 'org_id'], name='candidate_duplication_key_idx'),
+        ),
+        migrations.RunPython(create_duplication_keys, migrations.RunPython.noop),
+    ]
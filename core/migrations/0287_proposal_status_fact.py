@@ -0,0 +1,87 @@
+# Generated by Django 3.1.13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CREATE_PROPOSAL_STATUS_FACTS_SQL = '''
+    INSERT INTO core_proposalstatusfact (
+        history_id,
+        proposal_id,
+        job_id,
+        org_content_type_id,
+        org_id,
+        function_id,
+        status_id,
+        status_group,
+        status_stage,
+        entered_at,
+        exited_at
+    )
+    SELECT
+        history.id,
+        history.proposal_id,
+        proposal.job_id,
+        job.org_content_type_id,
+        job.org_id,
+        job.function_id,
+        history.status_id,
+        status."group",
+        status.stage,
+        history.changed_at,
+        lead(history.changed_at) OVER (
+            PARTITION BY history.proposal_id
+            ORDER BY history.changed_at, history.id
+        )
+    FROM core_proposalstatushistory history
+    JOIN core_proposal proposal ON proposal.id = history.proposal_id
+    JOIN core_job job ON job.id = proposal.job_id
+    JOIN core_proposalstatus status ON status.id = history.status_id
+'''
+
+
+def create_proposal_status_facts(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_PROPOSAL_STATUS_FACTS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0286_candidate_duplication_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProposalStatusFact',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('org_id', models.PositiveIntegerField()),
+                ('status_group', models.CharField(choices=[('associated_to_job', 'Associated to Job'), ('applied_by_candidate', 'Applied by Candidate'), ('suitable', 'Suitable'), ('contacted', 'Contacted'), ('qualified', 'Qualified'), ('submitted_to_hiring_manager', 'Submitted to Hiring Manager'), ('interviewing', 'Interviewing'), ('pending_hiring_decision', 'Pending Hiring Decision'), ('offer_to_be_prepared', 'Offer To Be Prepared'), ('pending_offer_acceptance', 'Pending Offer Acceptance'), ('pending_start', 'Pending Start'), ('started', 'Started')], max_length=64)),
+                ('status_stage', models.CharField(choices=[('associated', 'Associated'), ('pre_screening', 'Pre-Screening'), ('screening', 'Screening'), ('submissions', 'Submissions'), ('interviewing', 'Interviewing'), ('offering', 'Offering'), ('hired', 'Hired')], max_length=32)),
+                ('entered_at', models.DateTimeField()),
+                ('exited_at', models.DateTimeField(blank=True, null=True)),
+                ('function', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.function')),
+                ('history', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fact', to='core.proposalstatushistory')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proposal_status_facts', to='core.job')),
+                ('org_content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('proposal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_facts', to='core.proposal')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.proposalstatus')),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='proposalstatusfact',
+            index=models.Index(fields=['job', 'status_group', 'entered_at'], name='proposal_status_fact_job_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposalstatusfact',
+            index=models.Index(fields=['org_content_type', 'org_id', 'status_group', 'entered_at'], name='proposal_status_fact_org_idx'),
+        ),
+        migrations.RunPython(
+            create_proposal_status_facts, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.1.13 on 2026-10-18 04:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+
+def create_notification_counters(apps, schema_editor):
+    Notification = apps.get_model('core', 'Notification')
+    NotificationCounter = apps.get_model('core', 'NotificationCounter')
+
+    unread_counts = (
+        Notification.objects.filter(unread=True)
+        .order_by()
+        .values('recipient_id')
+        .annotate(count=models.Count('id'))
+        .values_list('recipient_id', 'count')
+    )
+    NotificationCounter.objects.bulk_create(
+        [
+            NotificationCounter(user_id=user_id, unread_count=count)
+            for user_id, count in unread_counts
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0287_proposal_status_fact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to='core.user')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            create_notification_counters, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 3.1.13 on 2026-10-18 05:45
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+CANDIDATE_SEARCH_DOCUMENT_SQL = '''
+    INSERT INTO core_candidatesearchdocument (candidate_id, document)
+    SELECT
+        candidate.id,
+        setweight(to_tsvector('simple', concat_ws(' ',
+            candidate.first_name,
+            candidate.middle_name,
+            candidate.last_name,
+            candidate.first_name_kanji,
+            candidate.last_name_kanji,
+            candidate.first_name_katakana,
+            candidate.last_name_katakana
+        )), 'A')
+        || setweight(to_tsvector('simple', concat_ws(' ',
+            candidate.id::text,
+            candidate.email,
+            regexp_replace(candidate.email, '[@.]', ' ', 'g'),
+            candidate.secondary_email,
+            regexp_replace(candidate.secondary_email, '[@.]', ' ', 'g'),
+            candidate.current_position,
+            candidate.current_company,
+            candidate.current_country
+        )), 'B')
+        || setweight(to_tsvector('simple', concat_ws(' ',
+            (
+                SELECT string_agg(concat_ws(' ', occupation, company, summary), ' ')
+                FROM core_experiencedetail
+                WHERE candidate_id = candidate.id
+            ),
+            (
+                SELECT string_agg(concat_ws(' ', institute, department), ' ')
+                FROM core_educationdetail
+                WHERE candidate_id = candidate.id
+            ),
+            (
+                SELECT string_agg(
+                    concat_ws(' ', certification, certification_other), ' '
+                )
+                FROM core_candidatecertification
+                WHERE candidate_id = candidate.id
+            )
+        )), 'C')
+    FROM core_candidate candidate
+    WHERE candidate.id = ANY(%s)
+    ON CONFLICT (candidate_id) DO UPDATE SET document = EXCLUDED.document
+'''
+
+
+def create_search_documents(apps, schema_editor):
+    Candidate = apps.get_model('core', 'Candidate')
+
+    ids = list(Candidate.objects.order_by('id').values_list('id', flat=True))
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            cursor.execute(
+                CANDIDATE_SEARCH_DOCUMENT_SQL, [ids[start : start + BATCH_SIZE]]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0289_proposal_notification_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateSearchDocument',
+            fields=[
+                ('candidate', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='core.candidate')),
+                ('document', django.contrib.postgres.search.SearchVectorField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='candidatesearchdocument',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['document'], name='candidate_search_idx'),
+        ),
+        migrations.RunPython(create_search_documents, migrations.RunPython.noop),
+    ]
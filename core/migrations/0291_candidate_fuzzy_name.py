@@ -0,0 +1,109 @@
+# Generated by Django 3.1.13 on 2026-10-18 06:01
+
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+CANDIDATE_FIELDS = (
+    'first_name',
+    'last_name',
+    'first_name_kanji',
+    'last_name_kanji',
+    'first_name_katakana',
+    'last_name_katakana',
+)
+
+
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord('ァ'), ord('ヶ') + 1)}
+
+
+def normalize_fuzzy_name(value, key_type):
+    if value is None:
+        value = ''
+
+    value = unicodedata.normalize('NFKC', str(value)).casefold()
+    value = ' '.join(value.split()).translate(KATAKANA_TO_HIRAGANA)
+    if key_type != 'name':
+        value = ''.join(value.split())
+
+    return value
+
+
+def get_candidate_fuzzy_names(data):
+    names = {}
+
+    name_fields = (
+        ('name', 'first_name', 'last_name'),
+        ('name_kanji', 'last_name_kanji', 'first_name_kanji'),
+        ('name_katakana', 'last_name_katakana', 'first_name_katakana'),
+    )
+    for key_type, *fields in name_fields:
+        name = normalize_fuzzy_name(
+            ' '.join(data.get(field) or '' for field in fields), key_type
+        )
+        if name:
+            names[key_type] = name
+
+    return names
+
+
+def create_fuzzy_names(apps, schema_editor):
+    Candidate = apps.get_model('core', 'Candidate')
+    CandidateFuzzyName = apps.get_model('core', 'CandidateFuzzyName')
+
+    names = []
+    for candidate in Candidate.objects.values('id', *CANDIDATE_FIELDS).iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        for key_type, value in get_candidate_fuzzy_names(candidate).items():
+            names.append(
+                CandidateFuzzyName(
+                    candidate_id=candidate['id'], key_type=key_type, value=value
+                )
+            )
+
+        if len(names) >= BATCH_SIZE:
+            CandidateFuzzyName.objects.bulk_create(names)
+            names = []
+
+    CandidateFuzzyName.objects.bulk_create(names)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0290_candidate_search_document'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AlterField(
+            model_name='candidateduplicationkey',
+            name='key_type',
+            field=models.CharField(choices=[('email', 'Email'), ('linkedin', 'LinkedIn'), ('zoho', 'Zoho ID'), ('name', 'Name'), ('name_kanji', 'Name (Kanji)'), ('name_katakana', 'Name (Katakana)')], max_length=13),
+        ),
+        migrations.CreateModel(
+            name='CandidateFuzzyName',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_type', models.CharField(choices=[('email', 'Email'), ('linkedin', 'LinkedIn'), ('zoho', 'Zoho ID'), ('name', 'Name'), ('name_kanji', 'Name (Kanji)'), ('name_katakana', 'Name (Katakana)')], max_length=13)),
+                ('value', models.CharField(max_length=512)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fuzzy_names', to='core.candidate')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='candidatefuzzyname',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['value'], name='candidate_fuzzy_name_idx', opclasses=('gin_trgm_ops',)),
+        ),
+        migrations.AlterUniqueTogether(
+            name='candidatefuzzyname',
+            unique_together={('candidate', 'key_type')},
+        ),
+        migrations.RunPython(create_fuzzy_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 3.1.13 on 2026-10-18 07:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CREATE_JOB_PIPELINE_COUNTERS_SQL = '''
+    WITH proposal AS (
+        SELECT
+            proposal.job_id,
+            job.org_content_type_id AS job_org_content_type_id,
+            job.org_id AS job_org_id,
+            candidate.org_content_type_id AS candidate_org_content_type_id,
+            candidate.org_id AS candidate_org_id,
+            status.stage,
+            proposal.is_rejected
+        FROM core_proposal proposal
+        JOIN core_job job ON job.id = proposal.job_id
+        JOIN core_candidate candidate ON candidate.id = proposal.candidate_id
+        LEFT JOIN core_proposalstatus status ON status.id = proposal.status_id
+    ),
+    visible AS (
+        SELECT
+            job_id,
+            job_org_content_type_id AS org_content_type_id,
+            job_org_id AS org_id,
+            stage,
+            is_rejected
+        FROM proposal
+        WHERE job_org_content_type_id IS NOT NULL AND job_org_id IS NOT NULL
+        UNION ALL
+        SELECT
+            job_id,
+            candidate_org_content_type_id,
+            candidate_org_id,
+            stage,
+            is_rejected
+        FROM proposal
+        WHERE
+            candidate_org_content_type_id IS NOT NULL
+            AND candidate_org_id IS NOT NULL
+            AND (candidate_org_content_type_id, candidate_org_id)
+                IS DISTINCT FROM (job_org_content_type_id, job_org_id)
+    )
+    INSERT INTO core_jobpipelinecounter (
+        job_id,
+        org_content_type_id,
+        org_id,
+        proposals_count,
+        associated_count,
+        pre_screening_count,
+        submissions_count,
+        screening_count,
+        interviewing_count,
+        offering_count,
+        hired_count,
+        rejected_count
+    )
+    SELECT
+        job_id,
+        org_content_type_id,
+        org_id,
+        count(*) FILTER (
+            WHERE stage IN (
+                'submissions', 'screening', 'interviewing', 'offering', 'hired'
+            )
+        ),
+        count(*) FILTER (WHERE NOT is_rejected AND stage = 'associated'),
+        count(*) FILTER (WHERE NOT is_rejected AND stage = 'pre_screening'),
+        count(*) FILTER (WHERE NOT is_rejected AND stage = 'submissions'),
+        count(*) FILTER (WHERE NOT is_rejected AND stage = 'screening'),
+        count(*) FILTER (WHERE NOT is_rejected AND stage = 'interviewing'),
+        count(*) FILTER (WHERE NOT is_rejected AND stage = 'offering'),
+        count(*) FILTER (WHERE NOT is_rejected AND stage = 'hired'),
+        count(*) FILTER (WHERE is_rejected)
+    FROM visible
+    GROUP BY job_id, org_content_type_id, org_id
+'''
+
+
+def create_job_pipeline_counters(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_JOB_PIPELINE_COUNTERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0291_candidate_fuzzy_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPipelineCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('org_id', models.PositiveIntegerField()),
+                ('proposals_count', models.PositiveIntegerField(default=0)),
+                ('associated_count', models.PositiveIntegerField(default=0)),
+                ('pre_screening_count', models.PositiveIntegerField(default=0)),
+                ('submissions_count', models.PositiveIntegerField(default=0)),
+                ('screening_count', models.PositiveIntegerField(default=0)),
+                ('interviewing_count', models.PositiveIntegerField(default=0)),
+                ('offering_count', models.PositiveIntegerField(default=0)),
+                ('hired_count', models.PositiveIntegerField(default=0)),
+                ('rejected_count', models.PositiveIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pipeline_counters', to='core.job')),
+                ('org_content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('job', 'org_content_type', 'org_id')},
+            },
+        ),
+        migrations.RunPython(
+            create_job_pipeline_counters, migrations.RunPython.noop
+        ),
+    ]
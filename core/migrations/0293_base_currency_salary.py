@@ -0,0 +1,56 @@
+# Generated by Django 3.1.13 on 2026-10-18 07:45
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def base_currency_amount(Rate, field):
+    rate = models.Subquery(
+        Rate.objects.filter(currency=models.OuterRef(f'{field}_currency'))
+        .order_by('pk')
+        .values('value')[:1]
+    )
+    return models.ExpressionWrapper(
+        models.F(field)
+        / Coalesce(rate, models.Value(1), output_field=models.DecimalField()),
+        output_field=models.FloatField(),
+    )
+
+
+def fill_base_salaries(apps, schema_editor):
+    Rate = apps.get_model('exchange', 'Rate')
+    Candidate = apps.get_model('core', 'Candidate')
+    Placement = apps.get_model('core', 'Placement')
+
+    Candidate.objects.update(
+        current_salary_base=base_currency_amount(Rate, 'current_salary')
+    )
+    Placement.objects.update(
+        offered_salary_base=base_currency_amount(Rate, 'offered_salary')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exchange', '0001_initial'),
+        ('core', '0292_job_pipeline_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='current_salary_base',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='placement',
+            name='offered_salary_base',
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['org_content_type', 'org_id', 'current_salary_base'], name='candidate_org_base_salary'),
+        ),
+        migrations.RunPython(fill_base_salaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1.13 on 2026-10-18 07:57
+
+import core.models
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0293_base_currency_salary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConvertedFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('operation', models.CharField(max_length=16)),
+                ('file', models.FileField(max_length=255, upload_to=core.models.get_converted_file_path)),
+                ('size', models.PositiveIntegerField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'operation')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.1.13 on 2026-10-18 09:05
+
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import migrations
+from django.utils import timezone
+
+
+BATCH_SIZE = 1000
+
+OLD_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+NEW_BACKEND = 'core.authentication.ProfileModelBackend'
+
+
+def replace_session_auth_backend(apps, old_backend, new_backend):
+    Session = apps.get_model('sessions', 'Session')
+    store = SessionStore()
+
+    sessions = Session.objects.filter(expire_date__gt=timezone.now())
+    to_update = []
+    for session in sessions.iterator(chunk_size=BATCH_SIZE):
+        data = store.decode(session.session_data)
+        if data.get(BACKEND_SESSION_KEY) != old_backend:
+            continue
+
+        data[BACKEND_SESSION_KEY] = new_backend
+        session.session_data = store.encode(data)
+        to_update.append(session)
+
+    Session.objects.bulk_update(to_update, ['session_data'], batch_size=BATCH_SIZE)
+
+
+def forwards(apps, schema_editor):
+    replace_session_auth_backend(apps, OLD_BACKEND, NEW_BACKEND)
+
+
+def backwards(apps, schema_editor):
+    replace_session_auth_backend(apps, NEW_BACKEND, OLD_BACKEND)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0294_converted_file'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
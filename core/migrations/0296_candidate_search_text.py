@@ -0,0 +1,124 @@
+# Generated by Django 3.1.13 on 2026-10-18 10:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+CANDIDATE_SEARCH_DOCUMENT_SQL = '''
+    INSERT INTO core_candidatesearchdocument (candidate_id, document, text)
+    SELECT
+        id,
+        setweight(to_tsvector('simple', names), 'A')
+        || setweight(to_tsvector('simple', contacts), 'B')
+        || setweight(to_tsvector('simple', details), 'C'),
+        concat_ws(' ', names, contacts, details)
+    FROM (
+        SELECT
+            candidate.id,
+            concat_ws(' ',
+                candidate.first_name,
+                candidate.middle_name,
+                candidate.last_name,
+                candidate.first_name_kanji,
+                candidate.last_name_kanji,
+                candidate.first_name_katakana,
+                candidate.last_name_katakana
+            ) AS names,
+            concat_ws(' ',
+                candidate.id::text,
+                candidate.email,
+                regexp_replace(candidate.email, '[@.]', ' ', 'g'),
+                candidate.secondary_email,
+                regexp_replace(candidate.secondary_email, '[@.]', ' ', 'g'),
+                candidate.current_position,
+                candidate.current_company,
+                candidate.current_country
+            ) AS contacts,
+            concat_ws(' ',
+                (
+                    SELECT string_agg(
+                        concat_ws(' ', occupation, company, summary), ' '
+                    )
+                    FROM core_experiencedetail
+                    WHERE candidate_id = candidate.id
+                ),
+                (
+                    SELECT string_agg(concat_ws(' ', institute, department), ' ')
+                    FROM core_educationdetail
+                    WHERE candidate_id = candidate.id
+                ),
+                (
+                    SELECT string_agg(
+                        concat_ws(' ', certification, certification_other), ' '
+                    )
+                    FROM core_candidatecertification
+                    WHERE candidate_id = candidate.id
+                )
+            ) AS details
+        FROM core_candidate candidate
+        WHERE candidate.id = ANY(%s)
+    ) candidate
+    ON CONFLICT (candidate_id) DO UPDATE SET
+        document = EXCLUDED.document,
+        text = EXCLUDED.text
+'''
+
+
+def rebuild_search_documents(apps, schema_editor):
+    CandidateSearchDocument = apps.get_model('core', 'CandidateSearchDocument')
+
+    ids = list(
+        CandidateSearchDocument.objects.order_by('candidate_id').values_list(
+            'candidate_id', flat=True
+        )
+    )
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            cursor.execute(
+                CANDIDATE_SEARCH_DOCUMENT_SQL, [ids[start : start + BATCH_SIZE]]
+            )
+
+
+def create_note_documents(apps, schema_editor):
+    CandidateNote = apps.get_model('core', 'CandidateNote')
+    CandidateNote.objects.update(document=SearchVector('text', config='simple'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0295_session_auth_backend'),
+    ]
+
+    operations = [
+        BtreeGinExtension(),
+        migrations.AddField(
+            model_name='candidatesearchdocument',
+            name='text',
+            field=models.TextField(default=''),
+        ),
+        migrations.AddField(
+            model_name='candidatenote',
+            name='document',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesearchdocument',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['text'], name='candidate_search_text_idx', opclasses=('gin_trgm_ops',)),
+        ),
+        migrations.AddIndex(
+            model_name='candidatenote',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['content_type', 'object_id', 'document'], name='candidate_note_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatenote',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['text'], name='candidate_note_text_idx', opclasses=('gin_trgm_ops',)),
+        ),
+        migrations.RunPython(rebuild_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_note_documents, migrations.RunPython.noop),
+    ]
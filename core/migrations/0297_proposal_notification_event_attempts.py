@@ -0,0 +1,23 @@
+# Generated by Django 3.1.13 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0296_candidate_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proposalnotificationevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='proposalnotificationevent',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+    ]
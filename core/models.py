@@ -18,36 +18,47 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager, Group
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchVector,
+    SearchVectorField,
+    TrigramSimilarity,
+)
 from django.core.exceptions import ValidationError
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.db.utils import IntegrityError
 from django.db.models import Q, Case, When
+from django.db.models.functions import Cast, Coalesce, Greatest
 from django.template.exceptions import TemplateDoesNotExist
 from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import translation
 from django.utils.text import slugify
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from gfklookupwidget.fields import GfkLookupField
 from phonenumber_field.modelfields import PhoneNumberField
+from djmoney.contrib.exchange.models import Rate as CurrencyRate
 from djmoney.models.fields import MoneyField as DjangoMoneyField
 from ordered_model.models import OrderedModel
 
 
 from core.constants import (
+    CandidateDuplicationKeyType,
     ProposalStatusGroup,
     StatusEnum,
     ProposalStatusStage,
 )
-from core.tasks import send_email
+from core.tasks import send_email, send_emails
 from core.utils import (
     camelize_str,
     datetime_str,
     parse_linkedin_slug,
     get_trans,
-    get_unique_emails_filter,
+    get_candidate_duplication_keys,
+    get_candidate_fuzzy_names,
     org_filter,
     get_country_list,
     get_country_name,
@@ -60,6 +71,38 @@ class MoneyField(DjangoMoneyField):
         super().__init__(**kwargs)
 
 
+def get_base_currency_amount(money):
+    """
+    Return amount of the money in the base currency of exchange rates.
+
+    Amounts in currencies without a rate are returned as is.
+    """
+    if money is None:
+        return None
+
+    rate = (
+        CurrencyRate.objects.filter(currency=str(money.currency))
+        .order_by('pk')
+        .values_list('value', flat=True)
+        .first()
+    )
+    return float(money.amount / rate if rate else money.amount)
+
+
+def base_currency_amount(field):
+    """Return expression of `get_base_currency_amount` of the MoneyField."""
+    rate = models.Subquery(
+        CurrencyRate.objects.filter(currency=models.OuterRef(f'{field}_currency'))
+        .order_by('pk')
+        .values('value')[:1]
+    )
+    return models.ExpressionWrapper(
+        models.F(field)
+        / Coalesce(rate, models.Value(1), output_field=models.DecimalField()),
+        output_field=models.FloatField(),
+    )
+
+
 def get_max_choice_length(choices):
     return max(*(len(choice[0]) for choice in choices))
 
@@ -1044,6 +1087,15 @@ class UserManager(BaseUserManager):
 
         return self._create_user(email, password, **extra_fields)
 
+    def with_profile(self):
+        """Select profile of the User with its organization in the same query."""
+        return self.select_related(
+            *(
+                f'{attr}__{org_field}'
+                for attr, org_field in self.model.PROFILE_ORG_FIELDS.items()
+            )
+        )
+
 
 def get_user_photo_upload_to(user, filename):
     return f'avatars/{user.id}_{filename}'
@@ -1053,6 +1105,16 @@ def get_user_photo_upload_to(user, filename):
 class User(AbstractUser):
     """Represents a User."""
 
+    # profile relation: its organization field
+    PROFILE_ORG_FIELDS = {
+        'agencyadministrator': 'agency',
+        'agencymanager': 'agency',
+        'recruiter': 'agency',
+        'clientadministrator': 'client',
+        'clientinternalrecruiter': 'client',
+        'clientstandarduser': 'client',
+    }
+
     username = None
     email = models.EmailField(_('email address'), unique=True)
 
@@ -1105,18 +1167,15 @@ class User(AbstractUser):
 
     @property
     def unread_notifications_count(self):
-        return self.notifications.filter(unread=True).count()
+        return (
+            NotificationCounter.objects.filter(user_id=self.pk)
+            .values_list('unread_count', flat=True)
+            .first()
+            or 0
+        )
 
     def get_profile_attribute_pair_iterator(self):
-        profile_attributes = (
-            'agencyadministrator',
-            'agencymanager',
-            'recruiter',
-            'clientadministrator',
-            'clientinternalrecruiter',
-            'clientstandarduser',
-        )
-        for attr in profile_attributes:
+        for attr in self.PROFILE_ORG_FIELDS:
             if hasattr(self, attr):
                 profile = getattr(self, attr)
                 yield attr, profile
@@ -2644,6 +2703,7 @@ class Job(BaseJob):
 
             copied_proposals.append(copy)
         Proposal.objects.bulk_create(copied_proposals)
+        JobPipelineCounter.sync([self.id])
 
     def create_default_interview_templates(self):
         for interview_template in (
@@ -3255,6 +3315,9 @@ class Candidate(models.Model):
 
     salary = MoneyField(null=True, blank=True)
 
+    # current salary in the base currency of exchange rates, for sorting
+    current_salary_base = models.FloatField(null=True, editable=False)
+
     def _total_annual_salary_iterator(self):
         yield self.current_salary
         yield self.current_salary_variable
@@ -3445,80 +3508,203 @@ class Candidate(models.Model):
                 name='unique_secondary_email',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('org_content_type', 'org_id', 'current_salary_base'),
+                name='candidate_org_base_salary',
+            ),
+        ]
 
     def clean_fields(self, exclude=tuple(), check_zoho_and_linkedin=True):
         """Validate constraints"""
-        # TODO: may be optimized: remove query and create standalone Email model
         # Partial unique constraints can't be validated automatically
         super().clean_fields(exclude=tuple(exclude) + ('original',))
-        error_dict = {}
-        candidates = Candidate.objects.filter(~Q(pk=self.pk))
-        current_org_candidates = candidates.filter(
-            org_content_type=self.org_content_type, org_id=self.org_id
+        [error_dict] = Candidate.get_unique_fields_errors(
+            [self], check_zoho_and_linkedin=check_zoho_and_linkedin
         )
 
+        if error_dict:
+            raise ValidationError(error_dict)
+
+    @staticmethod
+    def _get_unique_values(candidate, check_zoho_and_linkedin):
+        """Return (field, value) pairs of Candidate, unique within organization."""
+        values = []
         if check_zoho_and_linkedin:
-            # ZohoID
-            if current_org_candidates.filter(
-                Q(zoho_id=self.zoho_id) & ~Q(zoho_id='')
-            ).exists():
-                error_dict.update(
-                    {'zoho_id': _('Candidate with this Zoho ID already exists.')}
-                )
+            values.append(('zoho_id', candidate.zoho_id))
+            values.append(('linkedin_slug', candidate.linkedin_slug))
+        values.append(('email', candidate.email))
+        values.append(('email', candidate.secondary_email))
+        return [(field, value) for field, value in values if value]
 
-            # LinkedIn
-            if current_org_candidates.filter(
-                Q(linkedin_slug=self.linkedin_slug)
-                & ~Q(linkedin_slug='')
-                & ~Q(linkedin_slug=None)
-            ).exists():
-                error_dict.update(
-                    {'linkedin_url': _('Candidate with this LinkedIn already exists.')}
+    @classmethod
+    def get_unique_fields_errors(cls, candidates, check_zoho_and_linkedin=True):
+        """
+        Validate organization unique fields of Candidates in a single query.
+
+        Candidates are checked against the database and against each other,
+        so the list can be validated before bulk_create.
+        Return a list of error dicts, in order of `candidates`.
+        """
+        unique_errors = {
+            'zoho_id': ('zoho_id', _('Candidate with this Zoho ID already exists.')),
+            'linkedin_slug': (
+                'linkedin_url',
+                _('Candidate with this LinkedIn already exists.'),
+            ),
+        }
+
+        def get_org(candidate):
+            return candidate.org_content_type_id, candidate.org_id
+
+        candidates_by_org = {}
+        for candidate in candidates:
+            candidates_by_org.setdefault(get_org(candidate), []).append(candidate)
+
+        condition = Q()
+        for (org_content_type_id, org_id), org_candidates in candidates_by_org.items():
+            values = {}
+            original_ids = set()
+            for candidate in org_candidates:
+                for field, value in cls._get_unique_values(
+                    candidate, check_zoho_and_linkedin
+                ):
+                    values.setdefault(field, set()).add(value)
+                if candidate.original_id:
+                    original_ids.add(candidate.original_id)
+
+            values_condition = Q()
+            for field, field_values in values.items():
+                fields = ('email', 'secondary_email') if field == 'email' else (field,)
+                for db_field in fields:
+                    values_condition |= Q(**{f'{db_field}__in': field_values})
+
+            org_condition = Q(pk__in=original_ids)
+            if values_condition:
+                org_condition |= Q(archived=False) & values_condition
+            if original_ids or values_condition:
+                condition |= (
+                    Q(org_content_type_id=org_content_type_id, org_id=org_id)
+                    & org_condition
                 )
 
-        # Emails
-        if current_org_candidates.filter(get_unique_emails_filter(self.email)).exists():
-            error_dict.update({'email': _('Email already in use.')})
-
-        if current_org_candidates.filter(
-            get_unique_emails_filter(self.secondary_email)
-        ).exists():
-            error_dict.update({'secondary_email': _('Email already in use.')})
-
-        if self.email == self.secondary_email and self.email != '':
-            error_dict.update(
-                {
-                    'email': _('Emails must be unique.'),
-                    'secondary_email': _('Emails must be unique.'),
-                }
+        own_pks = {candidate.pk for candidate in candidates if candidate.pk}
+        existing = []
+        if condition:
+            existing = (
+                Candidate.archived_objects.filter(condition)
+                .exclude(pk__in=own_pks)
+                .values(
+                    'pk',
+                    'org_content_type_id',
+                    'org_id',
+                    'archived',
+                    'zoho_id',
+                    'linkedin_slug',
+                    'email',
+                    'secondary_email',
+                )
             )
 
-        if self.original:
-            archived_candidates = Candidate.archived_objects.filter(~Q(pk=self.pk))
-            original_exists = archived_candidates.filter(
-                org_content_type=self.org_content_type,
-                org_id=self.org_id,
-                pk=self.original.pk,
-            ).exists()
-            if not original_exists:
+        existing_pks = {
+            (get_org(candidate), candidate.pk)
+            for candidate in candidates
+            if candidate.pk
+        }
+        taken = {}
+        for row in existing:
+            org = (row['org_content_type_id'], row['org_id'])
+            existing_pks.add((org, row['pk']))
+            if row['archived']:
+                continue
+            for field in ('zoho_id', 'linkedin_slug', 'email', 'secondary_email'):
+                key_field = 'email' if field == 'secondary_email' else field
+                taken.setdefault((org, key_field, row[field]), set()).add(row['pk'])
+
+        for index, candidate in enumerate(candidates):
+            if candidate.archived:
+                continue
+            for field, value in cls._get_unique_values(
+                candidate, check_zoho_and_linkedin
+            ):
+                taken.setdefault((get_org(candidate), field, value), set()).add(
+                    candidate.pk or f'new:{index}'
+                )
+
+        errors = []
+        for index, candidate in enumerate(candidates):
+            error_dict = {}
+            org = get_org(candidate)
+            candidate_key = candidate.pk or f'new:{index}'
+
+            for field, value in cls._get_unique_values(
+                candidate, check_zoho_and_linkedin
+            ):
+                if not taken.get((org, field, value), set()) - {candidate_key}:
+                    continue
+                if field == 'email':
+                    for email_field in ('email', 'secondary_email'):
+                        if getattr(candidate, email_field) == value:
+                            error_dict[email_field] = _('Email already in use.')
+                else:
+                    error_field, message = unique_errors[field]
+                    error_dict[error_field] = message
+
+            if candidate.email == candidate.secondary_email and candidate.email != '':
                 error_dict.update(
                     {
-                        'original': _(
-                            f'candidate with id {self.original.pk} does not exist.'
-                        )
+                        'email': _('Emails must be unique.'),
+                        'secondary_email': _('Emails must be unique.'),
                     }
                 )
 
-        if error_dict:
-            raise ValidationError(error_dict)
+            if candidate.original_id and (
+                candidate.original_id == candidate.pk
+                or (org, candidate.original_id) not in existing_pks
+            ):
+                error_dict['original'] = _(
+                    f'candidate with id {candidate.original_id} does not exist.'
+                )
+
+            errors.append(error_dict)
+
+        return errors
+
+    @classmethod
+    def update_base_salaries(cls, ids=None):
+        """
+        Recompute `current_salary_base` of Candidates, e.g. after exchange
+        rates were updated or Candidates were created with bulk_create.
+        """
+        queryset = cls.archived_objects.all()
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+
+        queryset.update(current_salary_base=base_currency_amount('current_salary'))
 
     def save(self, *args, turn_on_clean_fields=True, **kwargs):
+        update_fields = kwargs.get('update_fields')
+
+        def is_updated(fields):
+            return update_fields is None or not set(fields).isdisjoint(update_fields)
+
         self.linkedin_slug = parse_linkedin_slug(self.linkedin_url)
+        if is_updated(['current_salary', 'current_salary_currency']):
+            self.current_salary_base = get_base_currency_amount(self.current_salary)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'current_salary_base'}
 
         if turn_on_clean_fields:
             self.full_clean()
 
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        if is_updated(CandidateDuplicationKey.CANDIDATE_FIELDS):
+            CandidateDuplicationKey.sync([self])
+        if is_updated(CandidateFuzzyName.CANDIDATE_FIELDS):
+            CandidateFuzzyName.sync([self])
+        if is_updated(CandidateSearchDocument.CANDIDATE_FIELDS):
+            CandidateSearchDocument.sync([self.pk])
+        return result
 
     def __str__(self):
         """Return the string representation of the Agency object."""
@@ -3570,6 +3756,24 @@ class Candidate(models.Model):
     def get_absolute_url(self):
         return reverse('candidate_page', kwargs={'candidate_id': self.id})
 
+    def get_duplication_keys(self):
+        """Return (key_type, value) pairs used to find duplicates of Candidate."""
+        return get_candidate_duplication_keys(
+            {
+                field: getattr(self, field)
+                for field in CandidateDuplicationKey.CANDIDATE_FIELDS
+            }
+        )
+
+    def get_fuzzy_names(self):
+        """Return names of the Candidate for fuzzy matching by key type."""
+        return get_candidate_fuzzy_names(
+            {
+                field: getattr(self, field)
+                for field in CandidateFuzzyName.CANDIDATE_FIELDS
+            }
+        )
+
 
 class CandidateLinkedinData(models.Model):
     candidate = models.ForeignKey(
@@ -3582,6 +3786,238 @@ class CandidateLinkedinData(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
 
 
+class CandidateDuplicationKey(models.Model):
+    """
+    Normalized identity value of the Candidate.
+
+    Indexed copy of emails, LinkedIn, Zoho ID and names of Candidates,
+    allowing to look up duplicates without scanning the Candidate table.
+    """
+
+    CANDIDATE_FIELDS = (
+        'email',
+        'secondary_email',
+        'linkedin_url',
+        'zoho_id',
+        'first_name',
+        'last_name',
+        'first_name_kanji',
+        'last_name_kanji',
+        'org_content_type',
+        'org_id',
+    )
+
+    candidate = models.ForeignKey(
+        Candidate, on_delete=models.CASCADE, related_name='duplication_keys'
+    )
+    org_content_type = models.ForeignKey(
+        ContentType, null=True, on_delete=models.CASCADE
+    )
+    org_id = models.PositiveIntegerField(null=True)
+
+    key_type = models.CharField(
+        max_length=CandidateDuplicationKeyType.get_db_field_length(),
+        choices=CandidateDuplicationKeyType.get_choices(),
+    )
+    value = models.CharField(max_length=512)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('key_type', 'value', 'org_content_type', 'org_id'),
+                name='candidate_duplication_key_idx',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.key_type}: {self.value}'
+
+    @classmethod
+    def sync(cls, candidates):
+        """Make keys of the Candidates match their current field values."""
+        candidates = [candidate for candidate in candidates if candidate.pk]
+        if not candidates:
+            return
+
+        expected = {
+            (
+                candidate.pk,
+                candidate.org_content_type_id,
+                candidate.org_id,
+                key_type,
+                value,
+            )
+            for candidate in candidates
+            for key_type, value in candidate.get_duplication_keys()
+        }
+
+        stale_ids = []
+        for key_id, *key in cls.objects.filter(candidate__in=candidates).values_list(
+            'id', 'candidate_id', 'org_content_type_id', 'org_id', 'key_type', 'value'
+        ):
+            if tuple(key) in expected:
+                expected.remove(tuple(key))
+            else:
+                stale_ids.append(key_id)
+
+        if stale_ids:
+            cls.objects.filter(id__in=stale_ids).delete()
+
+        cls.objects.bulk_create(
+            [
+                cls(
+                    candidate_id=candidate_id,
+                    org_content_type_id=org_content_type_id,
+                    org_id=org_id,
+                    key_type=key_type,
+                    value=value,
+                )
+                for candidate_id, org_content_type_id, org_id, key_type, value in (
+                    expected
+                )
+            ]
+        )
+
+
+class CandidateFuzzyName(models.Model):
+    """
+    Normalized romaji, kanji or katakana name of the Candidate.
+
+    Indexed by trigrams to find Candidates by misspelled names,
+    see `get_candidate_fuzzy_names` for the normalization.
+    """
+
+    CANDIDATE_FIELDS = (
+        'first_name',
+        'last_name',
+        'first_name_kanji',
+        'last_name_kanji',
+        'first_name_katakana',
+        'last_name_katakana',
+    )
+    # names in kanji and kana are short, a single different character
+    # makes a bigger part of their trigrams
+    SIMILARITY_THRESHOLDS = {
+        CandidateDuplicationKeyType.NAME.key: 0.5,
+        CandidateDuplicationKeyType.NAME_KANJI.key: 0.4,
+        CandidateDuplicationKeyType.NAME_KATAKANA.key: 0.4,
+    }
+
+    candidate = models.ForeignKey(
+        Candidate, on_delete=models.CASCADE, related_name='fuzzy_names'
+    )
+    key_type = models.CharField(
+        max_length=CandidateDuplicationKeyType.get_db_field_length(),
+        choices=CandidateDuplicationKeyType.get_choices(),
+    )
+    value = models.CharField(max_length=512)
+
+    class Meta:
+        unique_together = ('candidate', 'key_type')
+        indexes = [
+            GinIndex(
+                fields=('value',),
+                name='candidate_fuzzy_name_idx',
+                opclasses=('gin_trgm_ops',),
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.key_type}: {self.value}'
+
+    @classmethod
+    def sync(cls, candidates):
+        """Make fuzzy names of the Candidates match their current names."""
+        candidates = [candidate for candidate in candidates if candidate.pk]
+        if not candidates:
+            return
+
+        expected = {
+            (candidate.pk, key_type): value
+            for candidate in candidates
+            for key_type, value in candidate.get_fuzzy_names().items()
+        }
+
+        stale_ids = []
+        for name_id, candidate_id, key_type, value in cls.objects.filter(
+            candidate__in=candidates
+        ).values_list('id', 'candidate_id', 'key_type', 'value'):
+            if expected.get((candidate_id, key_type)) == value:
+                del expected[candidate_id, key_type]
+            else:
+                stale_ids.append(name_id)
+
+        if stale_ids:
+            cls.objects.filter(id__in=stale_ids).delete()
+
+        cls.objects.bulk_create(
+            [
+                cls(candidate_id=candidate_id, key_type=key_type, value=value)
+                for (candidate_id, key_type), value in expected.items()
+            ]
+        )
+
+    @classmethod
+    def get_similar(cls, names):
+        """
+        Return fuzzy names similar to any of the names, with their `similarity`.
+
+        `names` is a dict of normalized names by key type, only names
+        of the same key type are compared.
+        """
+        condition = Q()
+        similar = Q()
+        similarity = []
+        for key_type, name in names.items():
+            condition |= Q(key_type=key_type, value__trigram_similar=name)
+            similar |= Q(
+                key_type=key_type, similarity__gte=cls.SIMILARITY_THRESHOLDS[key_type],
+            )
+            similarity.append(
+                When(key_type=key_type, then=TrigramSimilarity('value', name))
+            )
+
+        if not similarity:
+            return cls.objects.none()
+
+        return (
+            cls.objects.filter(condition)
+            .annotate(
+                similarity=Case(
+                    *similarity,
+                    default=models.Value(0.0),
+                    output_field=models.FloatField(),
+                )
+            )
+            .filter(similar)
+        )
+
+    @classmethod
+    def get_similarity(cls, names):
+        """
+        Return expression of the best name similarity of the Candidate.
+
+        Cast to double precision from real, so values used in cursors
+        compare equal to the stored ones.
+        """
+        if not names:
+            return Cast(models.Value(0.0), models.FloatField())
+
+        return Cast(
+            Coalesce(
+                models.Subquery(
+                    cls.get_similar(names)
+                    .filter(candidate=models.OuterRef('pk'))
+                    .order_by('-similarity')
+                    .values('similarity')[:1]
+                ),
+                models.Value(0.0),
+                output_field=models.FloatField(),
+            ),
+            models.FloatField(),
+        )
+
+
 @reversion.register()
 class CandidateNote(models.Model):
     """Represents a note for the Candidate, unique across the organization."""
@@ -3602,13 +4038,156 @@ class CandidateNote(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True)
 
+    # full-text search document of the text, updated on save
+    document = SearchVectorField(null=True, editable=False)
+
     class Meta:  # noqa
         unique_together = ('candidate', 'content_type', 'object_id')
+        indexes = [
+            GinIndex(
+                fields=('content_type', 'object_id', 'document'),
+                name='candidate_note_search_idx',
+            ),
+            GinIndex(
+                fields=('text',),
+                name='candidate_note_text_idx',
+                opclasses=('gin_trgm_ops',),
+            ),
+        ]
 
     def __str__(self):
         """Return the string representation of the CandidateNote object."""
         return 'Note for {} by {}'.format(self.candidate, self.organization)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        CandidateNote.objects.filter(pk=self.pk).update(
+            document=SearchVector('text', config='simple')
+        )
+
+
+CANDIDATE_SEARCH_DOCUMENT_SQL = '''
+    INSERT INTO core_candidatesearchdocument (candidate_id, document, text)
+    SELECT
+        id,
+        setweight(to_tsvector('simple', names), 'A')
+        || setweight(to_tsvector('simple', contacts), 'B')
+        || setweight(to_tsvector('simple', details), 'C'),
+        concat_ws(' ', names, contacts, details)
+    FROM (
+        SELECT
+            candidate.id,
+            concat_ws(' ',
+                candidate.first_name,
+                candidate.middle_name,
+                candidate.last_name,
+                candidate.first_name_kanji,
+                candidate.last_name_kanji,
+                candidate.first_name_katakana,
+                candidate.last_name_katakana
+            ) AS names,
+            concat_ws(' ',
+                candidate.id::text,
+                candidate.email,
+                regexp_replace(candidate.email, '[@.]', ' ', 'g'),
+                candidate.secondary_email,
+                regexp_replace(candidate.secondary_email, '[@.]', ' ', 'g'),
+                candidate.current_position,
+                candidate.current_company,
+                candidate.current_country
+            ) AS contacts,
+            concat_ws(' ',
+                (
+                    SELECT string_agg(
+                        concat_ws(' ', occupation, company, summary), ' '
+                    )
+                    FROM core_experiencedetail
+                    WHERE candidate_id = candidate.id
+                ),
+                (
+                    SELECT string_agg(concat_ws(' ', institute, department), ' ')
+                    FROM core_educationdetail
+                    WHERE candidate_id = candidate.id
+                ),
+                (
+                    SELECT string_agg(
+                        concat_ws(' ', certification, certification_other), ' '
+                    )
+                    FROM core_candidatecertification
+                    WHERE candidate_id = candidate.id
+                )
+            ) AS details
+        FROM core_candidate candidate
+        WHERE candidate.id = ANY(%s)
+    ) candidate
+    ON CONFLICT (candidate_id) DO UPDATE SET
+        document = EXCLUDED.document,
+        text = EXCLUDED.text
+'''
+
+
+class CandidateSearchDocument(models.Model):
+    """
+    Full-text search document of the Candidate.
+
+    Weighted `simple` tsvector of names (A), contacts and current position (B)
+    and experience, education and certifications (C). The `simple` parser
+    doesn't split Japanese words, so the same text is also kept with
+    a trigram index for substring search. Kept up to date by `sync` on save
+    and delete of the Candidate and its details. Notes are private to each
+    organization, so they are indexed separately.
+    """
+
+    CANDIDATE_FIELDS = (
+        'first_name',
+        'middle_name',
+        'last_name',
+        'first_name_kanji',
+        'last_name_kanji',
+        'first_name_katakana',
+        'last_name_katakana',
+        'email',
+        'secondary_email',
+        'current_position',
+        'current_company',
+        'current_country',
+    )
+
+    # not a database constraint: details of a deleted Candidate sync the
+    # document back before the Candidate row itself is deleted
+    candidate = models.OneToOneField(
+        Candidate,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name='search_document',
+    )
+    document = SearchVectorField()
+    text = models.TextField(default='')
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=('document',), name='candidate_search_idx'),
+            GinIndex(
+                fields=('text',),
+                name='candidate_search_text_idx',
+                opclasses=('gin_trgm_ops',),
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.candidate_id)
+
+    @classmethod
+    def sync(cls, candidate_ids):
+        """Rebuild search documents of the Candidates."""
+        candidate_ids = list(set(candidate_ids) - {None})
+        if not candidate_ids:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(CANDIDATE_SEARCH_DOCUMENT_SQL, [candidate_ids])
+
 
 class ProposalStatusShortlistManager(models.Manager):
     def get_queryset(self, *args, **kwargs):
@@ -3880,7 +4459,30 @@ class Proposal(models.Model):
                 self.created_by,
             )
 
-        return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {
+            'job',
+            'job_id',
+            'candidate',
+            'candidate_id',
+            'status',
+            'status_id',
+            'is_rejected',
+        }.intersection(update_fields):
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            old_rows = []
+            if not self._state.adding:
+                old_rows = JobPipelineCounter.get_proposals([self.pk], lock=True)
+
+            result = super().save(*args, **kwargs)
+
+            JobPipelineCounter.apply_changes(
+                old_rows, JobPipelineCounter.get_proposals([self.pk])
+            )
+
+        return result
 
     def __str__(self):
         """Return the string representation of the Proposal object."""
@@ -4003,44 +4605,53 @@ class Proposal(models.Model):
         if should_save:
             self.save(update_fields=['status', 'status_last_updated_by'])
 
+        history = None
         if to_history:
-            self.update_status_history(status, changed_by)
+            history = self.update_status_history(status, changed_by)
 
-        if status.stage == ProposalStatusStage.SUBMISSIONS.key:
-            from core.notifications import notify_proposal_submitted_to_hiring_manager
+        # without history, the change is told apart by the state it was made in
+        change_id = history.id if history else f'{self.updated_at}:{status.id}'
 
-            notify_proposal_submitted_to_hiring_manager(changed_by, self)
+        from core.notifications import dispatch_proposal_event
 
-        elif status.stage == ProposalStatusStage.HIRED.key:
-            from core.notifications import notify_job_is_filled
+        if status.stage == ProposalStatusStage.SUBMISSIONS.key:
+            dispatch_proposal_event(
+                'proposal_submitted_to_hiring_manager',
+                self,
+                changed_by,
+                change_id=change_id,
+            )
 
+        elif status.stage == ProposalStatusStage.HIRED.key:
             is_filled = self.job.set_filled_if_no_openings()
             if is_filled:
-                notify_job_is_filled(changed_by, self.job)
+                dispatch_proposal_event(
+                    'job_is_filled', self, changed_by, change_id=change_id
+                )
 
         if old_status:
             if old_status != status:
-                from core.notifications import notify_client_changed_proposal_status
-
-                notify_client_changed_proposal_status(
-                    changed_by,
+                dispatch_proposal_event(
+                    'client_changed_proposal_status',
                     self,
-                    {'status': {'from': old_status.id, 'to': status.id}},
+                    changed_by,
+                    change_id=change_id,
+                    diff={'status': {'from': old_status.id, 'to': status.id}},
                 )
 
             if old_status.stage == ProposalStatusStage.SUBMISSIONS.key:
                 if status.group == ProposalStatusGroup.INTERVIEWING.key:
-                    from core.notifications import (
-                        notify_proposal_approved_rejected_by_hiring_manager,
-                    )
-
-                    notify_proposal_approved_rejected_by_hiring_manager(
-                        changed_by, self, True
+                    dispatch_proposal_event(
+                        'proposal_approved_rejected_by_hiring_manager',
+                        self,
+                        changed_by,
+                        change_id=change_id,
+                        approved=True,
                     )
 
     def update_status_history(self, status, changed_by):
         """Updates Proposal Status History"""
-        ProposalStatusHistory.objects.create(
+        return ProposalStatusHistory.objects.create(
             proposal=self, status=status, changed_by=changed_by
         )
 
@@ -4079,7 +4690,10 @@ class Proposal(models.Model):
         if not proposals.count():
             return None
 
+        job_ids = set(proposals.values_list('job_id', flat=True))
         proposals.update(is_rejected=True)
+        # update() skips counters kept by Proposal.save()
+        JobPipelineCounter.sync(job_ids)
 
         for proposal in proposals:
             proposal.update_activity(user, 'rejected')
@@ -4094,15 +4708,23 @@ class Proposal(models.Model):
 
     def do_action(self, action, user, to_status=None):
         if action == QuickActionVerb.REJECT.key:
+            from core.notifications import dispatch_proposal_event
+
+            # retried requests reject the same state of the Proposal
+            change_id = self.updated_at.isoformat()
+            if not self.is_rejected:
+                if self.status.stage == ProposalStatusStage.SUBMISSIONS.key:
+                    dispatch_proposal_event(
+                        'proposal_approved_rejected_by_hiring_manager',
+                        self,
+                        user,
+                        change_id=change_id,
+                        approved=False,
+                    )
+                dispatch_proposal_event(
+                    'proposal_is_rejected', self, user, change_id=change_id
+                )
             self.is_rejected = True
-            from core.notifications import (
-                notify_proposal_approved_rejected_by_hiring_manager,
-                notify_proposal_is_rejected,
-            )
-
-            if self.status.stage == ProposalStatusStage.SUBMISSIONS.key:
-                notify_proposal_approved_rejected_by_hiring_manager(user, self, False)
-            notify_proposal_is_rejected(user, self)
         elif action == QuickActionVerb.CHANGE_STATUS.key:
             self.set_status_by_group(
                 to_status.stage, user, True, to_status.group, should_save=True,
@@ -4140,6 +4762,465 @@ class ProposalStatusHistory(models.Model):
     class Meta:
         ordering = ('id',)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        ProposalStatusFact.sync([self.proposal_id])
+
+
+class ProposalStatusFact(models.Model):
+    """
+    Period of time a Proposal spent in a status, used by analytics.
+
+    Materialized from ProposalStatusHistory: every history item is a fact
+    entered at its `changed_at` and exited when the next status of the
+    Proposal was set. Job, organization and function are copied from the
+    Proposal's Job, so analytics don't need to join the history with
+    statuses, proposals and jobs.
+    """
+
+    FIELDS = (
+        'proposal_id',
+        'job_id',
+        'org_content_type_id',
+        'org_id',
+        'function_id',
+        'status_id',
+        'status_group',
+        'status_stage',
+        'entered_at',
+        'exited_at',
+    )
+
+    history = models.OneToOneField(
+        ProposalStatusHistory, on_delete=models.CASCADE, related_name='fact'
+    )
+    proposal = models.ForeignKey(
+        Proposal, on_delete=models.CASCADE, related_name='status_facts'
+    )
+    job = models.ForeignKey(
+        Job, on_delete=models.CASCADE, related_name='proposal_status_facts'
+    )
+
+    organization = GenericForeignKey('org_content_type', 'org_id')
+    org_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    org_id = models.PositiveIntegerField()
+
+    function = models.ForeignKey(
+        Function, on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    status = models.ForeignKey(ProposalStatus, on_delete=models.PROTECT)
+    status_group = models.CharField(
+        max_length=64, choices=ProposalStatusGroup.get_choices()
+    )
+    status_stage = models.CharField(
+        max_length=32, choices=ProposalStatusStage.get_choices()
+    )
+
+    entered_at = models.DateTimeField()
+    exited_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('job', 'status_group', 'entered_at'),
+                name='proposal_status_fact_job_idx',
+            ),
+            models.Index(
+                fields=('org_content_type', 'org_id', 'status_group', 'entered_at'),
+                name='proposal_status_fact_org_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.proposal_id}: {self.status_group} from {self.entered_at}'
+
+    @classmethod
+    def sync(cls, proposal_ids):
+        """Make facts of the Proposals match their status history."""
+        proposal_ids = set(proposal_ids) - {None}
+        if not proposal_ids:
+            return
+
+        history = (
+            ProposalStatusHistory.objects.filter(proposal__in=proposal_ids)
+            .order_by('proposal_id', 'changed_at', 'id')
+            .values(
+                'id',
+                'proposal_id',
+                'status_id',
+                'changed_at',
+                status_group=models.F('status__group'),
+                status_stage=models.F('status__stage'),
+                job_id=models.F('proposal__job_id'),
+                org_content_type_id=models.F('proposal__job__org_content_type_id'),
+                org_id=models.F('proposal__job__org_id'),
+                function_id=models.F('proposal__job__function_id'),
+            )
+        )
+
+        expected = {}
+        previous = None
+        for item in history:
+            values = {field: item.get(field) for field in cls.FIELDS}
+            values['entered_at'] = item['changed_at']
+            if previous and previous['proposal_id'] == values['proposal_id']:
+                previous['exited_at'] = values['entered_at']
+
+            expected[item['id']] = previous = values
+
+        to_update = []
+        stale_ids = []
+        for fact in cls.objects.filter(proposal__in=proposal_ids):
+            values = expected.pop(fact.history_id, None)
+            if values is None:
+                stale_ids.append(fact.id)
+            elif any(getattr(fact, field) != values[field] for field in cls.FIELDS):
+                for field, value in values.items():
+                    setattr(fact, field, value)
+                to_update.append(fact)
+
+        if stale_ids:
+            cls.objects.filter(id__in=stale_ids).delete()
+
+        if to_update:
+            cls.objects.bulk_update(to_update, fields=cls.FIELDS)
+
+        cls.objects.bulk_create(
+            [
+                cls(history_id=history_id, **values)
+                for history_id, values in expected.items()
+            ]
+        )
+
+
+JOB_PIPELINE_COUNTER_UPSERT_SQL = '''
+    INSERT INTO core_jobpipelinecounter (
+        job_id,
+        org_content_type_id,
+        org_id,
+        proposals_count,
+        associated_count,
+        pre_screening_count,
+        submissions_count,
+        screening_count,
+        interviewing_count,
+        offering_count,
+        hired_count,
+        rejected_count
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (job_id, org_content_type_id, org_id) DO UPDATE SET
+        proposals_count = greatest(core_jobpipelinecounter.proposals_count + %s, 0),
+        associated_count = greatest(core_jobpipelinecounter.associated_count + %s, 0),
+        pre_screening_count = greatest(core_jobpipelinecounter.pre_screening_count + %s, 0),
+        submissions_count = greatest(core_jobpipelinecounter.submissions_count + %s, 0),
+        screening_count = greatest(core_jobpipelinecounter.screening_count + %s, 0),
+        interviewing_count = greatest(core_jobpipelinecounter.interviewing_count + %s, 0),
+        offering_count = greatest(core_jobpipelinecounter.offering_count + %s, 0),
+        hired_count = greatest(core_jobpipelinecounter.hired_count + %s, 0),
+        rejected_count = greatest(core_jobpipelinecounter.rejected_count + %s, 0)
+'''
+
+JOB_PIPELINE_COUNTER_SET_SQL = '''
+    INSERT INTO core_jobpipelinecounter (
+        job_id,
+        org_content_type_id,
+        org_id,
+        proposals_count,
+        associated_count,
+        pre_screening_count,
+        submissions_count,
+        screening_count,
+        interviewing_count,
+        offering_count,
+        hired_count,
+        rejected_count
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (job_id, org_content_type_id, org_id) DO UPDATE SET
+        proposals_count = EXCLUDED.proposals_count,
+        associated_count = EXCLUDED.associated_count,
+        pre_screening_count = EXCLUDED.pre_screening_count,
+        submissions_count = EXCLUDED.submissions_count,
+        screening_count = EXCLUDED.screening_count,
+        interviewing_count = EXCLUDED.interviewing_count,
+        offering_count = EXCLUDED.offering_count,
+        hired_count = EXCLUDED.hired_count,
+        rejected_count = EXCLUDED.rejected_count
+'''
+
+JOB_PIPELINE_COUNTER_UPDATE_SQL = '''
+    UPDATE core_jobpipelinecounter SET
+        proposals_count = greatest(proposals_count + %s, 0),
+        associated_count = greatest(associated_count + %s, 0),
+        pre_screening_count = greatest(pre_screening_count + %s, 0),
+        submissions_count = greatest(submissions_count + %s, 0),
+        screening_count = greatest(screening_count + %s, 0),
+        interviewing_count = greatest(interviewing_count + %s, 0),
+        offering_count = greatest(offering_count + %s, 0),
+        hired_count = greatest(hired_count + %s, 0),
+        rejected_count = greatest(rejected_count + %s, 0)
+    WHERE job_id = %s AND org_content_type_id = %s AND org_id = %s
+'''
+
+
+class JobPipelineCounter(models.Model):
+    """
+    Numbers of Proposals of a Job in each pipeline stage seen by an organization.
+
+    Organization of the Job sees all its Proposals, other organizations
+    see Proposals of their own Candidates. Counters are incremented
+    whenever a Proposal is saved or deleted, a missing counter
+    means zero Proposals.
+    """
+
+    STAGE_FIELDS = {
+        ProposalStatusStage.ASSOCIATED.key: 'associated_count',
+        ProposalStatusStage.PRE_SCREENING.key: 'pre_screening_count',
+        ProposalStatusStage.SUBMISSIONS.key: 'submissions_count',
+        ProposalStatusStage.SCREENING.key: 'screening_count',
+        ProposalStatusStage.INTERVIEWING.key: 'interviewing_count',
+        ProposalStatusStage.OFFERING.key: 'offering_count',
+        ProposalStatusStage.HIRED.key: 'hired_count',
+    }
+    COUNT_FIELDS = ('proposals_count', *STAGE_FIELDS.values(), 'rejected_count')
+    PROPOSAL_FIELDS = (
+        'job_id',
+        'job__org_content_type_id',
+        'job__org_id',
+        'candidate__org_content_type_id',
+        'candidate__org_id',
+        'status__stage',
+        'is_rejected',
+    )
+
+    job = models.ForeignKey(
+        Job, on_delete=models.CASCADE, related_name='pipeline_counters'
+    )
+
+    organization = GenericForeignKey('org_content_type', 'org_id')
+    org_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    org_id = models.PositiveIntegerField()
+
+    proposals_count = models.PositiveIntegerField(default=0)
+    associated_count = models.PositiveIntegerField(default=0)
+    pre_screening_count = models.PositiveIntegerField(default=0)
+    submissions_count = models.PositiveIntegerField(default=0)
+    screening_count = models.PositiveIntegerField(default=0)
+    interviewing_count = models.PositiveIntegerField(default=0)
+    offering_count = models.PositiveIntegerField(default=0)
+    hired_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('job', 'org_content_type', 'org_id')
+
+    def __str__(self):
+        return f'{self.job_id}: {self.proposals_count} proposals'
+
+    @classmethod
+    def count_proposals(cls, proposals):
+        """Return counters of `PROPOSAL_FIELDS` values of Proposals."""
+        shortlist_stages = ProposalStatusStage.get_shortlist_keys()
+
+        counters = {}
+        for job_id, *orgs, stage, is_rejected in proposals:
+            job_org, candidate_org = tuple(orgs[:2]), tuple(orgs[2:])
+            for org in {job_org, candidate_org}:
+                if None in org:
+                    continue
+
+                counts = counters.setdefault(
+                    (job_id, *org), dict.fromkeys(cls.COUNT_FIELDS, 0)
+                )
+                if stage in shortlist_stages:
+                    counts['proposals_count'] += 1
+                if is_rejected:
+                    counts['rejected_count'] += 1
+                elif stage in cls.STAGE_FIELDS:
+                    counts[cls.STAGE_FIELDS[stage]] += 1
+
+        return counters
+
+    @classmethod
+    def get_expected(cls, job_ids):
+        """Return counters of the Jobs computed from their Proposals."""
+        return cls.count_proposals(
+            Proposal.objects.filter(job__in=job_ids).values_list(*cls.PROPOSAL_FIELDS)
+        )
+
+    @classmethod
+    def get_proposals(cls, proposal_ids, lock=False):
+        """
+        Return `PROPOSAL_FIELDS` values of the Proposals, locking their rows
+        until the end of the transaction if `lock` is set.
+        """
+        queryset = Proposal.objects.filter(pk__in=proposal_ids)
+        if lock:
+            queryset = queryset.select_for_update(of=('self',))
+
+        return list(queryset.values_list(*cls.PROPOSAL_FIELDS))
+
+    @classmethod
+    def apply_changes(cls, old_proposals, new_proposals):
+        """
+        Move counts of changed Proposals from their old to their new values.
+
+        Counters are changed by atomic increments, so concurrent changes
+        of other Proposals of the Job are neither recounted nor waited for.
+        Missing counters are created only to add counts.
+        """
+        old = cls.count_proposals(old_proposals)
+        new = cls.count_proposals(new_proposals)
+
+        with connection.cursor() as cursor:
+            for key in old.keys() | new.keys():
+                deltas = [
+                    new.get(key, {}).get(field, 0) - old.get(key, {}).get(field, 0)
+                    for field in cls.COUNT_FIELDS
+                ]
+                if not any(deltas):
+                    continue
+
+                if key in new:
+                    cursor.execute(
+                        JOB_PIPELINE_COUNTER_UPSERT_SQL,
+                        [*key, *(max(delta, 0) for delta in deltas), *deltas],
+                    )
+                else:
+                    cursor.execute(JOB_PIPELINE_COUNTER_UPDATE_SQL, [*deltas, *key])
+
+    @classmethod
+    def sync(cls, job_ids):
+        """Make counters of the Jobs match their current Proposals."""
+        job_ids = set(job_ids) - {None}
+        if not job_ids:
+            return
+
+        with transaction.atomic():
+            # changes of Proposals committed after the count wait for the
+            # sync to increment the counters
+            counters = list(
+                cls.objects.select_for_update().filter(job__in=job_ids).order_by('id')
+            )
+            expected = cls.get_expected(job_ids)
+
+            to_update = []
+            stale_ids = []
+            for counter in counters:
+                values = expected.pop(
+                    (counter.job_id, counter.org_content_type_id, counter.org_id), None
+                )
+                if values is None:
+                    stale_ids.append(counter.id)
+                elif any(getattr(counter, field) != values[field] for field in values):
+                    for field, value in values.items():
+                        setattr(counter, field, value)
+                    to_update.append(counter)
+
+            if stale_ids:
+                cls.objects.filter(id__in=stale_ids).delete()
+
+            if to_update:
+                cls.objects.bulk_update(to_update, fields=cls.COUNT_FIELDS)
+
+            # counters created concurrently by Proposal changes after the lock
+            # are overwritten instead of failing on the unique constraint
+            if expected:
+                with connection.cursor() as cursor:
+                    cursor.executemany(
+                        JOB_PIPELINE_COUNTER_SET_SQL,
+                        [
+                            [*key, *(values[field] for field in cls.COUNT_FIELDS)]
+                            for key, values in expected.items()
+                        ],
+                    )
+
+
+class ProposalNotificationEvent(models.Model):
+    """
+    Change of a Proposal to notify Users of.
+
+    Events are queued on the request path and turned into Notifications
+    by a Celery task, in order of creation for each Proposal. Failed events
+    stay pending until they are retried.
+    """
+
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    proposal = models.ForeignKey(
+        Proposal, on_delete=models.CASCADE, related_name='notification_events'
+    )
+    sender = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    verb = models.CharField(max_length=128)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # failed attempts to process the event and the last error
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('proposal', 'id'),
+                condition=Q(processed_at__isnull=True),
+                name='proposal_notification_pending',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.proposal_id}: {self.verb}'
+
+
+class NotificationQuerySet(models.QuerySet):
+    def get_unread_counts(self):
+        """Return numbers of unread Notifications by recipient id."""
+        return dict(
+            self.filter(unread=True)
+            .order_by()
+            .values('recipient_id')
+            .annotate(count=models.Count('id'))
+            .values_list('recipient_id', 'count')
+        )
+
+    def mark_as_read(self):
+        """Mark Notifications as read, keeping unread counters in sync."""
+        with transaction.atomic():
+            unread = list(
+                self.filter(unread=True)
+                .order_by()
+                .select_for_update()
+                .values_list('id', 'recipient_id')
+            )
+            if not unread:
+                return 0
+
+            Notification.objects.filter(id__in=[id for id, _ in unread]).update(
+                unread=False
+            )
+
+            counts = {}
+            for _, recipient_id in unread:
+                counts[recipient_id] = counts.get(recipient_id, 0) + 1
+            for recipient_id, count in counts.items():
+                NotificationCounter.change(recipient_id, -count)
+
+        return len(unread)
+
+    def delete(self):
+        with transaction.atomic():
+            counts = self.get_unread_counts()
+            result = super().delete()
+            for recipient_id, count in counts.items():
+                NotificationCounter.change(recipient_id, -count)
+
+        return result
+
 
 class Notification(models.Model):
     """User web notification."""
@@ -4192,6 +5273,23 @@ class Notification(models.Model):
     explicit_link = models.CharField(max_length=255, null=True)
     context_data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
 
+    objects = NotificationQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding and self.unread:
+                NotificationCounter.change(self.recipient_id, 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if self.unread:
+                NotificationCounter.change(self.recipient_id, -1)
+
+        return result
+
     def format_data(self):
         """
         Data available for all notification texts, email or otherwise.
@@ -4273,30 +5371,203 @@ class Notification(models.Model):
             ).exists()
 
         if send_via_email:
+            send_email.delay(
+                **notification.render_email(),
+                reply_to=[reply_to],
+                to=[recipient.email],
+                attachments=email_attachments,
+            )
+
+        return notification
+
+    @classmethod
+    def send_many(
+        cls,
+        recipients,
+        verb,
+        sender=None,
+        actor=None,
+        action_object=None,
+        target=None,
+        context_data=None,
+        send_via_email=None,
+        reply_to=None,
+        link=None,
+        email_attachments=None,
+    ):
+        """
+        Send the same notification to every recipient.
+
+        Notifications are created in bulk and email settings of all
+        recipients are fetched with one query. Emails are rendered once
+        per locale and sent by a single task.
+        """
+        recipients = list({r.pk: r for r in recipients if r}.values())
+        if not recipients:
+            return []
+
+        notifications = cls.objects.bulk_create(
+            [
+                cls(
+                    sender=sender,
+                    recipient=recipient,
+                    verb=verb.name.lower(),
+                    actor=actor,
+                    action_object=action_object,
+                    target=target,
+                    explicit_link=link,
+                    context_data=context_data or {},
+                )
+                for recipient in recipients
+            ]
+        )
+        NotificationCounter.increment([recipient.pk for recipient in recipients])
+
+        if send_via_email is False:
+            return notifications
+
+        email_disabled_ids = set()
+        if send_via_email is None:
+            notification_type = NotificationTypeEnum[verb.name.upper()]
+            email_disabled_ids = set(
+                NotificationSetting.objects.filter(
+                    user__in=recipients,
+                    notification_type_group=notification_type.value.group,
+                    email=False,
+                ).values_list('user_id', flat=True)
+            )
+
+        emails = {}
+        messages = []
+        for notification in notifications:
+            recipient = notification.recipient
+            if recipient.pk in email_disabled_ids:
+                continue
+
+            # text differs only by language and by addressing the actor
+            key = (recipient.locale, notification.actor == recipient)
+            if key not in emails:
+                emails[key] = notification.render_email()
+
+            messages.append(
+                dict(
+                    **emails[key],
+                    reply_to=[reply_to],
+                    to=[recipient.email],
+                    attachments=email_attachments,
+                )
+            )
+
+        if messages:
+            send_emails.delay(messages)
+
+        return notifications
+
+    def render_email(self):
+        """Return subject, text and html body of the notification email."""
+        with translation.override(self.recipient.locale):
             html_body_params = {
-                'text': notification.email_text,
-                'link': notification.link,
+                'text': self.email_text,
+                'link': self.link,
                 'base_url': settings.BASE_URL,
-                **notification.format_data(),
+                **self.format_data(),
             }
             try:
                 html_body = render_to_string(
-                    f'notifications/{verb.name.lower()}.html', html_body_params,
+                    f'notifications/{self.verb}.html', html_body_params,
                 )
             except TemplateDoesNotExist:
                 html_body = render_to_string(
                     'email_notification.html', html_body_params,
                 )
-            send_email.delay(
-                subject=notification.email_subject,
-                body=notification.email_text,
-                html_body=html_body,
-                reply_to=[reply_to],
-                to=[recipient.email],
-                attachments=email_attachments,
+
+            return dict(
+                subject=self.email_subject, body=self.email_text, html_body=html_body,
             )
 
-        return notification
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized number of unread Notifications of the User.
+
+    Kept in sync by Notification save and delete and by NotificationQuerySet
+    `mark_as_read` and `delete`, so the polled unread count is a primary key
+    lookup. Drift caused by bulk updates is fixed by `reconcile`.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread_count} unread'
+
+    @classmethod
+    def change(cls, user_id, delta):
+        """Atomically add `delta` to the unread count of the User."""
+        if not delta:
+            return
+
+        updated = cls.objects.filter(user_id=user_id).update(
+            unread_count=Greatest(models.F('unread_count') + delta, 0)
+        )
+        if updated:
+            return
+
+        counter, created = cls.objects.get_or_create(
+            user_id=user_id, defaults={'unread_count': max(delta, 0)}
+        )
+        if not created:
+            cls.change(user_id, delta)
+
+    @classmethod
+    def increment(cls, user_ids):
+        """Add one unread Notification to each of the Users."""
+        user_ids = set(user_ids)
+        cls.objects.bulk_create(
+            [cls(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+        )
+        cls.objects.filter(user_id__in=user_ids).update(
+            unread_count=models.F('unread_count') + 1
+        )
+
+    @classmethod
+    def reconcile(cls):
+        """Recount unread Notifications, return number of fixed counters."""
+        cls.objects.bulk_create(
+            [
+                cls(user_id=user_id)
+                for user_id in User.objects.filter(
+                    notification_counter__isnull=True, notifications__unread=True,
+                )
+                .values_list('id', flat=True)
+                .distinct()
+            ],
+            ignore_conflicts=True,
+        )
+
+        actual_count = Coalesce(
+            models.Subquery(
+                Notification.objects.filter(
+                    recipient=models.OuterRef('user_id'), unread=True
+                )
+                .order_by()
+                .values('recipient_id')
+                .annotate(count=models.Count('id'))
+                .values('count')
+            ),
+            0,
+        )
+
+        return (
+            cls.objects.annotate(actual_count=actual_count)
+            .exclude(unread_count=models.F('actual_count'))
+            .update(unread_count=actual_count)
+        )
 
 
 class Feedback(models.Model):
@@ -4703,6 +5974,25 @@ class CandidateFile(models.Model):
         return os.path.basename(self.file.name)
 
 
+def get_converted_file_path(instance, filename):
+    return 'conversion_cache/{}/{}'.format(instance.content_hash[:2], filename)
+
+
+class ConvertedFile(models.Model):
+    """Output of a file conversion, keyed by SHA-256 hash of the input file."""
+
+    content_hash = models.CharField(max_length=64)
+    operation = models.CharField(max_length=16)
+    file = models.FileField(upload_to=get_converted_file_path, max_length=255)
+    size = models.PositiveIntegerField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=now, db_index=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'operation')
+
+
 TAG_TYPE_CHOICES = [
     ('candidate', 'Candidate'),
     ('skill', 'Skill'),
@@ -4802,6 +6092,9 @@ class Placement(models.Model):
 
     offered_salary = MoneyField()
 
+    # offered salary in the base currency of exchange rates, for sorting
+    offered_salary_base = models.FloatField(null=True, editable=False, db_index=True)
+
     signed_at = models.DateField(auto_created=True)
 
     starts_work_at = models.DateField()
@@ -4810,6 +6103,27 @@ class Placement(models.Model):
 
     candidate_source_details = models.CharField(max_length=100, blank=True)
 
+    @classmethod
+    def update_base_salaries(cls, ids=None):
+        """Recompute `offered_salary_base` of Placements."""
+        queryset = cls.objects.all()
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+
+        queryset.update(offered_salary_base=base_currency_amount('offered_salary'))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not {
+            'offered_salary',
+            'offered_salary_currency',
+        }.isdisjoint(update_fields):
+            self.offered_salary_base = get_base_currency_amount(self.offered_salary)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'offered_salary_base'}
+
+        super().save(*args, **kwargs)
+
 
 class Fee(models.Model):
     created_by = models.ForeignKey(
@@ -1,8 +1,10 @@
 from core.constants import NotificationLinkText
+import logging
 from itertools import chain
 
 from django.conf import settings
 from django.urls import reverse
+from django.db import transaction
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -10,6 +12,8 @@ from django.utils import timezone
 from core import models as m
 from core.utils import send_email
 
+logger = logging.getLogger(__name__)
+
 
 def get_interview_notification_email_context(interview):
 
@@ -191,9 +195,9 @@ def notify_proposal_interview_canceled(sender, interview):
     }
     attachments = [interview.ics_canceled_attachment]
 
-    def send_to_staff(recipient, send_via_email=False, email_attachments=None):
-        m.Notification.send(
-            recipient,
+    def send_to_staff(recipients, send_via_email=False, email_attachments=None):
+        m.Notification.send_many(
+            recipients,
             m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CANCELED,
             sender=sender,
             actor=sender,
@@ -205,14 +209,12 @@ def notify_proposal_interview_canceled(sender, interview):
         )
 
     # to recruiters
-    for recipient in proposal.job.recruiters.all():
-        send_to_staff(recipient)
+    send_to_staff(proposal.job.recruiters.all())
 
     # to interviewer
-    if interview.interviewer:
-        send_to_staff(
-            interview.interviewer, send_via_email=True, email_attachments=attachments,
-        )
+    send_to_staff(
+        [interview.interviewer], send_via_email=True, email_attachments=attachments,
+    )
 
     # to candidate
     if is_interview_proposal(interview) and candidate.email:
@@ -239,31 +241,29 @@ def notify_proposal_interview_confirmed(sender, interview):
     candidate = proposal.candidate
     timeframe = format_interview_timeframe(interview)
 
-    def send_to_staff(_recipient, notification_type, attachments=None):
-        if _recipient:
-            m.Notification.send(
-                _recipient,
-                notification_type,
-                sender=sender,
-                actor=candidate,
-                action_object=interview,
-                target=proposal,
-                context_data={
-                    'link_text': m.NotificationLinkText.PROPOSAL_DETAIL.name,
-                    'timeframe': timeframe,
-                },
-                email_attachments=attachments,
-            )
+    def send_to_staff(recipients, notification_type, attachments=None):
+        m.Notification.send_many(
+            recipients,
+            notification_type,
+            sender=sender,
+            actor=candidate,
+            action_object=interview,
+            target=proposal,
+            context_data={
+                'link_text': m.NotificationLinkText.PROPOSAL_DETAIL.name,
+                'timeframe': timeframe,
+            },
+            email_attachments=attachments,
+        )
 
     # to recruiters
-    for recipient in proposal.job.recruiters.all():
-        send_to_staff(
-            recipient,
-            notification_type=m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CONFIRMED_PROPOSER,
-        )
+    send_to_staff(
+        proposal.job.recruiters.all(),
+        notification_type=m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CONFIRMED_PROPOSER,
+    )
 
     send_to_staff(
-        interview.interviewer,
+        [interview.interviewer],
         notification_type=m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CONFIRMED_INTERVIEWER,
         attachments=[interview.ics_attachment],
     )
@@ -290,16 +290,15 @@ def notify_proposal_interview_rejected(sender, interview):
     candidate = proposal.candidate
 
     # to recruiters
-    for recruiter in proposal.job.recruiters.all():
-        m.Notification.send(
-            recruiter,
-            m.NotificationTypeEnum.INTERVIEW_PROPOSAL_REJECTED_RECRUITER,
-            sender=sender,
-            actor=candidate,
-            action_object=interview,
-            target=proposal,
-            context_data={'link_text': m.NotificationLinkText.PROPOSAL_DETAIL.name,},
-        )
+    m.Notification.send_many(
+        proposal.job.recruiters.all(),
+        m.NotificationTypeEnum.INTERVIEW_PROPOSAL_REJECTED_RECRUITER,
+        sender=sender,
+        actor=candidate,
+        action_object=interview,
+        target=proposal,
+        context_data={'link_text': m.NotificationLinkText.PROPOSAL_DETAIL.name,},
+    )
 
     # to interviewer
     if interview.interviewer:
@@ -319,19 +318,18 @@ def notify_interview_assessment_added(sender, interview):
     proposal = interview.proposal
 
     # to recruiters
-    for recruiter in proposal.job.recruiters.all():
-        m.Notification.send(
-            recruiter,
-            m.NotificationTypeEnum.INTERVIEW_ASSESSMENT_ADDED_RECRUITER,
-            sender=sender,
-            actor=sender,
-            action_object=interview,
-            target=proposal,
-            context_data={
-                'link_text': m.NotificationLinkText.PROPOSAL_DETAIL.name,
-                'timeframe': format_interview_timeframe(interview),
-            },
-        )
+    m.Notification.send_many(
+        proposal.job.recruiters.all(),
+        m.NotificationTypeEnum.INTERVIEW_ASSESSMENT_ADDED_RECRUITER,
+        sender=sender,
+        actor=sender,
+        action_object=interview,
+        target=proposal,
+        context_data={
+            'link_text': m.NotificationLinkText.PROPOSAL_DETAIL.name,
+            'timeframe': format_interview_timeframe(interview),
+        },
+    )
 
     # to interviewer
     if interview.interviewer:
@@ -477,23 +475,21 @@ NOTIFY_JOB_FIELDS_COMPARE_BY_MATCHING_KEY = [
 
 def notify_job_is_filled(sender, job):
     users_to_notify = set(job.managers) | set(job.recruiters.all())
+    hired_candidates_list = job.get_hired_candidates()
 
-    for user in users_to_notify:
-        if user:
-            hired_candidates_list = job.get_hired_candidates()
-            m.Notification.send(
-                user,
-                m.NotificationTypeEnum.JOB_IS_FILLED,
-                sender=sender,
-                actor=sender,
-                target=job,
-                context_data={
-                    'hired_candidates': '\n'.join(
-                        [f'・ {c.name}' for c in hired_candidates_list]
-                    ),
-                    'link_text': NotificationLinkText.JOB_DETAIL.name,
-                },
-            )
+    m.Notification.send_many(
+        users_to_notify,
+        m.NotificationTypeEnum.JOB_IS_FILLED,
+        sender=sender,
+        actor=sender,
+        target=job,
+        context_data={
+            'hired_candidates': '\n'.join(
+                [f'・ {c.name}' for c in hired_candidates_list]
+            ),
+            'link_text': NotificationLinkText.JOB_DETAIL.name,
+        },
+    )
 
 
 def notify_client_updated_job(sender, job, diff):
@@ -591,32 +587,26 @@ def notify_client_changed_proposal_status(sender, proposal, diff):
         )
 
     if new_status.group == m.ProposalStatusGroup.PENDING_HIRING_DECISION.key:
-        for manager in proposal.job.managers:
-            m.Notification.send(
-                manager,
-                m.NotificationTypeEnum.PROPOSAL_PENDING_HIRING_DECISION,
-                sender=sender,
-                actor=sender,
-                action_object=proposal.candidate,
-                target=proposal,
-                context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
-            )
+        m.Notification.send_many(
+            proposal.job.managers,
+            m.NotificationTypeEnum.PROPOSAL_PENDING_HIRING_DECISION,
+            sender=sender,
+            actor=sender,
+            action_object=proposal.candidate,
+            target=proposal,
+            context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+        )
 
     elif new_status.group == m.ProposalStatusGroup.PENDING_START.key:
-        recipients = set(proposal.job.managers) | set(proposal.get_interviewers())
-        for recipient in recipients:
-            if recipient:
-                m.Notification.send(
-                    recipient,
-                    m.NotificationTypeEnum.PROPOSAL_PENDING_START,
-                    sender=sender,
-                    actor=sender,
-                    action_object=proposal.candidate,
-                    target=proposal,
-                    context_data={
-                        'link_text': NotificationLinkText.PROPOSAL_DETAIL.name
-                    },
-                )
+        m.Notification.send_many(
+            set(proposal.job.managers) | set(proposal.get_interviewers()),
+            m.NotificationTypeEnum.PROPOSAL_PENDING_START,
+            sender=sender,
+            actor=sender,
+            action_object=proposal.candidate,
+            target=proposal,
+            context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+        )
 
 
 def notify_proposal_moved(sender, proposal, *args, **kwargs):
@@ -664,16 +654,15 @@ def notify_client_admin_assigned_manager(sender, job, diff):
 
 
 def notify_proposal_submitted_to_hiring_manager(sender, proposal):
-    for manager in proposal.job.managers:
-        m.Notification.send(
-            manager,
-            m.NotificationTypeEnum.PROPOSAL_SUBMITTED_TO_HIRING_MANAGER,
-            sender=sender,
-            actor=sender,
-            action_object=proposal.candidate,
-            target=proposal,
-            context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
-        )
+    m.Notification.send_many(
+        proposal.job.managers,
+        m.NotificationTypeEnum.PROPOSAL_SUBMITTED_TO_HIRING_MANAGER,
+        sender=sender,
+        actor=sender,
+        action_object=proposal.candidate,
+        target=proposal,
+        context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+    )
 
 
 def notify_proposal_approved_rejected_by_hiring_manager(sender, proposal, approved):
@@ -703,16 +692,15 @@ def notify_candidate_proposed_for_job(sender, proposal):
             context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
             send_via_email=False if sourced_by == sender else None,
         )
-    for recruiter in proposal.job.recruiters.all():
-        m.Notification.send(
-            recruiter,
-            m.NotificationTypeEnum.NEW_PROPOSAL_CANDIDATE_RECRUITER,
-            sender=sender,
-            actor=sender,
-            action_object=proposal.candidate,
-            target=proposal,
-            context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
-        )
+    m.Notification.send_many(
+        proposal.job.recruiters.all(),
+        m.NotificationTypeEnum.NEW_PROPOSAL_CANDIDATE_RECRUITER,
+        sender=sender,
+        actor=sender,
+        action_object=proposal.candidate,
+        target=proposal,
+        context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+    )
 
 
 def notify_mentioned_users_in_comment(sender, candidate_comment, deleted=False):
@@ -744,38 +732,37 @@ def notify_mentioned_users_in_comment(sender, candidate_comment, deleted=False):
 
 
 def notify_client_candidate_public_application(proposal):
-    for recruiter in proposal.job.recruiters.all():
+    m.Notification.send_many(
+        proposal.job.recruiters.all(),
+        m.NotificationTypeEnum.NEW_PROPOSAL_CANDIDATE_DIRECT_APPLICATION,
+        actor=proposal.candidate,
+        target=proposal,
+        context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+    )
+
+
+def notify_proposal_is_rejected(sender, proposal):
+    recruiters = set(proposal.job.recruiters.all())
+    if sender in recruiters:
         m.Notification.send(
-            recruiter,
-            m.NotificationTypeEnum.NEW_PROPOSAL_CANDIDATE_DIRECT_APPLICATION,
-            actor=proposal.candidate,
+            sender,
+            m.NotificationTypeEnum.PROPOSAL_IS_REJECTED,
+            sender=sender,
+            actor=sender,
+            action_object=proposal.candidate,
             target=proposal,
-            context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+            send_via_email=False,
         )
 
-
-def notify_proposal_is_rejected(sender, proposal):
-    for recruiter in proposal.job.recruiters.all():
-        if recruiter == sender:
-            m.Notification.send(
-                recruiter,
-                m.NotificationTypeEnum.PROPOSAL_IS_REJECTED,
-                sender=sender,
-                actor=sender,
-                action_object=proposal.candidate,
-                target=proposal,
-                send_via_email=False,
-            )
-        else:
-            m.Notification.send(
-                recruiter,
-                m.NotificationTypeEnum.PROPOSAL_IS_REJECTED,
-                sender=sender,
-                actor=sender,
-                action_object=proposal.candidate,
-                target=proposal,
-                context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
-            )
+    m.Notification.send_many(
+        recruiters - {sender},
+        m.NotificationTypeEnum.PROPOSAL_IS_REJECTED,
+        sender=sender,
+        actor=sender,
+        action_object=proposal.candidate,
+        target=proposal,
+        context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+    )
 
 
 def notify_interview_schedule_sent(sender, interview, candidate_only=False):
@@ -806,16 +793,118 @@ def notify_interview_schedule_sent(sender, interview, candidate_only=False):
         return
 
     # to recruiters, interviewer
-    recipients = set(proposal.job.recruiters.all()) | {interview.interviewer}
-    for recipient in recipients:
-        if recipient:
-            m.Notification.send(
-                recipient,
-                m.NotificationTypeEnum.INTERVIEW_PROPOSAL_IS_SENT,
-                sender=sender,
-                actor=sender,
-                action_object=interview,
-                target=proposal,
-                send_via_email=False,
-                context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
-            )
+    m.Notification.send_many(
+        set(proposal.job.recruiters.all()) | {interview.interviewer},
+        m.NotificationTypeEnum.INTERVIEW_PROPOSAL_IS_SENT,
+        sender=sender,
+        actor=sender,
+        action_object=interview,
+        target=proposal,
+        send_via_email=False,
+        context_data={'link_text': NotificationLinkText.PROPOSAL_DETAIL.name},
+    )
+
+
+MAX_PROPOSAL_EVENT_ATTEMPTS = 5
+
+
+class ProposalEventFailed(Exception):
+    """Raised to retry processing of failed Proposal events."""
+
+
+PROPOSAL_EVENT_HANDLERS = {
+    'candidate_proposed_for_job': notify_candidate_proposed_for_job,
+    'client_candidate_public_application': (
+        lambda sender, proposal: notify_client_candidate_public_application(proposal)
+    ),
+    'client_changed_proposal_status': notify_client_changed_proposal_status,
+    'job_is_filled': lambda sender, proposal: notify_job_is_filled(
+        sender, proposal.job
+    ),
+    'proposal_approved_rejected_by_hiring_manager': (
+        notify_proposal_approved_rejected_by_hiring_manager
+    ),
+    'proposal_is_rejected': notify_proposal_is_rejected,
+    'proposal_submitted_to_hiring_manager': notify_proposal_submitted_to_hiring_manager,
+}
+
+
+def dispatch_proposal_event(verb, proposal, sender=None, *, change_id, **data):
+    """
+    Queue notifications of the Proposal event.
+
+    `verb` is a key of PROPOSAL_EVENT_HANDLERS, `data` - JSON serializable
+    keyword arguments of the handler. `change_id` identifies the change
+    of the Proposal, e.g. its status history item, so the event
+    of a retried request is ignored. The event is processed by a Celery task
+    once the current transaction is committed.
+    """
+    event, created = m.ProposalNotificationEvent.objects.get_or_create(
+        idempotency_key=f'{verb}:{proposal.id}:{change_id}',
+        defaults=dict(verb=verb, proposal=proposal, sender=sender, data=data),
+    )
+    if not created:
+        return
+
+    if not settings.NOTIFICATION_EVENTS_ASYNC:
+        process_proposal_events(proposal.id, raise_errors=True)
+        return
+
+    from core.tasks import process_proposal_notification_events
+
+    transaction.on_commit(
+        lambda: process_proposal_notification_events.delay(proposal.id)
+    )
+
+
+def process_proposal_events(proposal_id, raise_errors=False):
+    """
+    Send notifications of the pending events of the Proposal.
+
+    Events are locked while processed, so concurrent tasks of the same
+    Proposal wait for each other and every event is processed once and in
+    order. A failed event is logged and left pending with its error to be
+    retried, up to MAX_PROPOSAL_EVENT_ATTEMPTS times, unless `raise_errors`
+    is set. Later events of the Proposal stay pending until it succeeds or
+    is dropped, so they are still sent in order. Returns number of
+    processed events.
+    """
+    with transaction.atomic():
+        events = list(
+            m.ProposalNotificationEvent.objects.select_for_update(of=('self',))
+            .select_related('proposal', 'sender')
+            .filter(proposal_id=proposal_id, processed_at__isnull=True)
+            .order_by('id')
+        )
+
+        processed_ids = []
+        failed = []
+        for event in events:
+            try:
+                with transaction.atomic():
+                    PROPOSAL_EVENT_HANDLERS[event.verb](
+                        event.sender, event.proposal, **event.data
+                    )
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logger.exception(
+                    'Failed to send notifications of Proposal event %s', event.id
+                )
+
+                event.attempts += 1
+                event.error = repr(e)
+                failed.append(event)
+                if event.attempts < MAX_PROPOSAL_EVENT_ATTEMPTS:
+                    break
+
+                logger.error('Proposal event %s is dropped after retries', event.id)
+
+            processed_ids.append(event.id)
+
+        m.ProposalNotificationEvent.objects.filter(id__in=processed_ids).update(
+            processed_at=timezone.now()
+        )
+        m.ProposalNotificationEvent.objects.bulk_update(failed, ['attempts', 'error'])
+
+    return len(processed_ids)
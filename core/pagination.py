@@ -1,15 +1,281 @@
+import datetime
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
 from collections import OrderedDict
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
-class MultipleModelLimitPagination(LimitOffsetPagination):
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """Keep microseconds of datetimes, cursor values are compared for equality."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def get_keyset_ordering(queryset):
+    """
+    Return ordering of the queryset as (field, descending, nulls_first) tuples.
+
+    The primary key is appended to make the ordering unique. Returns None
+    if the queryset is ordered by something other than fields
+    or annotations.
+    """
+    query = queryset.query
+    order_by = query.order_by or (query.default_ordering and query.get_meta().ordering)
+
+    ordering = []
+    for item in order_by or ():
+        if isinstance(item, str) and item != '?':
+            descending = item.startswith('-')
+            field = item.lstrip('-+')
+            # PostgreSQL sorts nulls as the largest values by default
+            nulls_first = descending
+        elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+            descending = item.descending
+            field = item.expression.name
+            nulls_first = item.nulls_first or (descending and not item.nulls_last)
+        else:
+            return None
+
+        if field == queryset.model._meta.pk.name:
+            field = 'pk'
+        ordering.append((field, descending, nulls_first))
+
+    if 'pk' not in (field for field, *_ in ordering):
+        ordering.append(('pk', False, False))
+
+    return ordering
+
+
+def order_by_keyset(queryset, ordering, constants=None):
+    constants = constants or {}
+    return queryset.order_by(
+        *(
+            F(field).desc(nulls_first=nulls_first, nulls_last=not nulls_first)
+            if descending
+            else F(field).asc(nulls_first=nulls_first, nulls_last=not nulls_first)
+            for field, descending, nulls_first in ordering
+            if field not in constants
+        )
+    )
+
+
+def get_keyset_condition(ordering, position, constants=None):
+    """
+    Return filter of rows following the position in the ordering.
+
+    `position` is a list of values of the ordering fields, `constants`
+    are values of fields shared by every row of the queryset, e.g.
+    its model name in a list merged from multiple querysets. Returns None
+    if no row can follow the position.
+    """
+    constants = constants or {}
+    condition = None
+    equal = Q()
+
+    for (field, descending, nulls_first), value in zip(ordering, position):
+        if field in constants:
+            current = constants[field]
+            if current != value:
+                if (current < value) == descending:
+                    condition = equal if condition is None else condition | equal
+                break
+            continue
+
+        if value is None:
+            after = Q(**{f'{field}__isnull': False}) if nulls_first else None
+            same = Q(**{f'{field}__isnull': True})
+        else:
+            after = Q(**{f'{field}__{"lt" if descending else "gt"}': value})
+            if not nulls_first:
+                after |= Q(**{f'{field}__isnull': True})
+            same = Q(**{field: value})
+
+        if after is not None:
+            condition = (
+                equal & after if condition is None else condition | equal & after
+            )
+        equal &= same
+
+    return condition
+
+
+def get_approximate_count(queryset):
+    """Return number of rows of the queryset estimated by the query planner."""
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        [plan] = cursor.fetchone()[0]
+
+    return int(plan['Plan']['Plan Rows'])
+
+
+def get_value(item, field):
+    for attr in field.split('__'):
+        if item is None:
+            break
+        item = item[attr] if isinstance(item, dict) else getattr(item, attr)
+
+    return item
+
+
+class CursorLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with opt-in cursor pagination.
+
+    Requests with the `cursor` parameter, empty for the first page, get
+    rows following the last row of the previous page in the queryset
+    ordering instead of counting and skipping rows of previous pages.
+    Total is returned only if `count=approximate` is requested,
+    as estimated by the query planner.
+    """
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = _('Invalid cursor')
+
+    cursor_mode = False
+    count = None
+
+    def is_cursor_mode(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(queryset)
+        self.count = None
+
+        queryset = self.get_page_queryset(queryset)
+        results = list(queryset[: self.limit + 1])
+
+        self.position = None
+        if len(results) > self.limit:
+            results = results[: self.limit]
+            self.position = self.get_position(results[-1])
+
+        return results
+
+    def get_ordering(self, queryset):
+        ordering = get_keyset_ordering(queryset)
+        if ordering is None:
+            raise ValidationError(
+                {self.cursor_query_param: _('Ordering is not supported by cursor.')}
+            )
+
+        return ordering
+
+    def get_page_queryset(self, queryset, constants=None):
+        queryset = order_by_keyset(queryset, self.ordering, constants)
+        if self.request.query_params.get(self.count_query_param) == 'approximate':
+            self.count = (self.count or 0) + get_approximate_count(queryset)
+
+        position = self.decode_cursor(self.request)
+        if position is None:
+            return queryset
+
+        condition = get_keyset_condition(self.ordering, position, constants)
+        if condition is None:
+            return queryset.none()
+
+        return queryset.filter(condition)
+
+    def get_position(self, item):
+        return [get_value(item, field) for field, *_ in self.ordering]
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            data = json.loads(b64decode(cursor.encode('ascii')).decode('utf-8'))
+            fields, position = data['o'], data['p']
+        except (BinasciiError, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        ordering_fields = [field for field, *_ in self.ordering]
+        if fields != ordering_fields or len(position) != len(ordering_fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position
+
+    def encode_cursor(self, position):
+        data = {'o': [field for field, *_ in self.ordering], 'p': position}
+        return b64encode(
+            json.dumps(data, cls=CursorJSONEncoder).encode('utf-8')
+        ).decode('ascii')
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+
+        if self.position is None:
+            return None
+
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.offset_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.position)
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        return Response(
+            OrderedDict(
+                [
+                    ('count', self.count),
+                    ('next', self.get_next_link()),
+                    ('results', data),
+                ]
+            )
+        )
+
+
+class MultipleModelLimitPagination(CursorLimitOffsetPagination):
     """
     For use with `drf_multiple_model` where `paginate_queryset` is
     called multiple times per call.
+
+    In cursor mode rows of every queryset are ordered by `sorting_fields`
+    of the view, then by the model name and the primary key, and
+    the merged list is cut in `format_response`.
     """
 
     def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if self.cursor_mode:
+            self.request = request
+            self.limit = self.get_limit(request)
+            self.ordering = [
+                *self.get_ordering(queryset.order_by(*view.sorting_fields))[:-1],
+                ('type', False, False),
+                ('id', False, False),
+            ]
+            queryset = self.get_page_queryset(
+                queryset, constants={'type': queryset.model.__name__}
+            )
+            return list(queryset[: self.limit + 1])
+
         result = super().paginate_queryset(queryset, request, view)
 
         try:
@@ -19,5 +285,30 @@ class MultipleModelLimitPagination(LimitOffsetPagination):
 
         return result
 
+    def sort_results(self, data):
+        for field, descending, nulls_first in reversed(self.ordering):
+            # sorting is reversed for descending fields, so are nulls
+            nulls_key = 1 if nulls_first == descending else -1
+            data = sorted(
+                data,
+                key=lambda item: (
+                    (nulls_key, '') if item[field] is None else (0, item[field])
+                ),
+                reverse=descending,
+            )
+
+        return data
+
     def format_response(self, data):
-        return OrderedDict([('total', self.total), ('results', data)])
+        if not self.cursor_mode:
+            return OrderedDict([('total', self.total), ('results', data)])
+
+        data = self.sort_results(data)
+        self.position = None
+        if len(data) > self.limit:
+            data = data[: self.limit]
+            self.position = self.get_position(data[-1])
+
+        return OrderedDict(
+            [('total', self.count), ('next', self.get_next_link()), ('results', data)]
+        )
@@ -534,6 +534,7 @@ class CandidatesAccessPolicy(BaseAccessPolicy):
                 'partial_update',
                 'validate_partial_update',
                 'check_duplication',
+                'check_duplication_batch',
                 'linkedin_data_check_duplication',
                 'linkedin_url_check_proposed',
                 'archive_candidate',
@@ -554,6 +555,7 @@ class CandidatesAccessPolicy(BaseAccessPolicy):
                 'partial_update',
                 'validate_partial_update',
                 'check_duplication',
+                'check_duplication_batch',
                 'linkedin_data_check_duplication',
                 'linkedin_url_check_proposed',
                 'restore_candidate',
@@ -1089,6 +1089,8 @@ class BasicCandidateSerializer(serializers.ModelSerializer):
     proposed_to_job = serializers.BooleanField(required=False)
     proposed = serializers.SerializerMethodField()
     linkedin_data = serializers.SerializerMethodField()
+    # annotated by CandidateSearchFilter, skipped if not searched
+    name_similarity = serializers.FloatField(read_only=True)
 
     education_details = EducationDetailSerializer(many=True, required=False)
     experience_details = ExperienceDetailSerializer(many=True, required=False)
@@ -1209,6 +1211,7 @@ class BasicCandidateSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
             'proposed_to_job',
+            'name_similarity',
             'proposals',
             'current_company',
             'current_city',
@@ -1299,7 +1302,8 @@ class BasicCandidateSerializer(serializers.ModelSerializer):
         if getattr(candidate, 'current_salary') is None:
             return True
 
-        if candidate.languages.count() == 0:
+        # languages are prefetched for lists of Candidates
+        if not candidate.languages.all():
             return True
 
         return False
@@ -1312,6 +1316,9 @@ class BasicCandidateSerializer(serializers.ModelSerializer):
         if not job:
             return
 
+        if hasattr(candidate, 'proposed_to_checked_job'):
+            return candidate.proposed_to_checked_job
+
         return m.Proposal.objects.filter(candidate=candidate, job=job).exists()
 
     @swagger_serializer_method(serializer_or_field=serializers.JSONField)
@@ -1409,7 +1416,10 @@ class CandidateSerializer(BasicCandidateSerializer):
     @require_request
     def get_note(self, candidate):
         """Return CandidateNote text or empty string if not exists."""
-        note_data = candidate.get_note(self.context['request'].user.profile.org)
+        if hasattr(candidate, 'org_notes'):
+            note_data = candidate.org_notes[0].text if candidate.org_notes else ''
+        else:
+            note_data = candidate.get_note(self.context['request'].user.profile.org)
         return serializer_fields.RichTextField().to_representation(note_data)
 
     class Meta(BasicCandidateSerializer.Meta):
@@ -1451,15 +1461,17 @@ class RetrieveCandidateMixin(metaclass=serializers.SerializerMetaclass):
         if not (request and request.user and request.user.profile):
             return []
 
-        serializer = CandidateFileCandidateSerializer(
-            obj.files.filter(
+        files = getattr(obj, 'visible_files', None)
+        if files is None:
+            files = obj.files.filter(
                 Q(is_shared=True)
                 | poly_relation_filter(
                     'org_id', 'org_content_type', request.user.profile.org
                 ),
-            ),
-            context=self.context,
-            many=True,
+            )
+
+        serializer = CandidateFileCandidateSerializer(
+            files, context=self.context, many=True,
         )
         return serializer.data
 
@@ -1672,6 +1684,8 @@ class PossibleDuplicateCandidateSerializer(serializers.Serializer):
     last_name = serializers.CharField(required=False)
     last_name_kanji = serializers.CharField(required=False, allow_blank=True)
     first_name_kanji = serializers.CharField(required=False, allow_blank=True)
+    last_name_katakana = serializers.CharField(required=False, allow_blank=True)
+    first_name_katakana = serializers.CharField(required=False, allow_blank=True)
     email = serializers.CharField(required=True, allow_null=True, allow_blank=True)
     secondary_email = serializers.CharField(required=False, allow_blank=True)
     linkedin_url = serializers.CharField(required=False, allow_blank=True)
@@ -1679,6 +1693,47 @@ class PossibleDuplicateCandidateSerializer(serializers.Serializer):
     zoho_id = serializers.CharField(required=False, allow_null=True, allow_blank=True)
 
 
+class PossibleDuplicateCandidateBatchItemSerializer(
+    PossibleDuplicateCandidateSerializer
+):
+    # checked for the whole batch in PossibleDuplicateCandidateBatchSerializer
+    job = serializers.IntegerField(required=False, allow_null=True)
+
+
+class PossibleDuplicateCandidateBatchSerializer(serializers.Serializer):
+    candidates = serializers.ListField(
+        child=PossibleDuplicateCandidateBatchItemSerializer(),
+        allow_empty=False,
+        max_length=500,
+    )
+
+    def validate(self, data):
+        """Check all Jobs of the batch with one query."""
+        job_ids = {candidate.get('job') for candidate in data['candidates']} - {None}
+        if not job_ids:
+            return data
+
+        profile = self.context['request'].user.profile
+        available_job_ids = set(
+            profile.apply_jobs_filter(m.Job.objects)
+            .filter(pk__in=job_ids)
+            .values_list('pk', flat=True)
+        )
+
+        message = serializers.PrimaryKeyRelatedField.default_error_messages[
+            'does_not_exist'
+        ]
+        errors = {
+            index: {'job': [message.format(pk_value=candidate['job'])]}
+            for index, candidate in enumerate(data['candidates'])
+            if candidate.get('job') not in available_job_ids | {None}
+        }
+        if errors:
+            raise serializers.ValidationError({'candidates': errors})
+
+        return data
+
+
 class PossibleDuplicateLinkedInCandidateSerializer(serializers.Serializer):
     class _BasicContactInfo(serializers.Serializer):
         email = serializers.CharField(required=False)
@@ -1704,6 +1759,10 @@ class DuplicatedCandidateSerializer(serializers.Serializer):
     linkedin_url = serializers.CharField(required=False, allow_blank=True)
 
 
+class PossibleDuplicatedCandidateSerializer(DuplicatedCandidateSerializer):
+    similarity = serializers.FloatField(read_only=True)
+
+
 class CandidateNoteUpdateSerializer(CandidateSerializer):
     """Serializer for the Candidate note."""
 
@@ -2136,6 +2195,7 @@ class JobSerializer(JobPublicSerializer):
         if not should_return_managers:
             return []
 
+        # managers are prefetched for lists of Jobs
         return PublicUserSerializer(obj.managers, many=True).data
 
     @swagger_serializer_method(serializer_or_field=PublicUserSerializer)
@@ -2145,9 +2205,18 @@ class JobSerializer(JobPublicSerializer):
         if type(self.context['request'].user.profile) != m.Recruiter:
             return []
 
-        return PublicUserSerializer(
-            obj.organization.members.filter(talentassociate__isnull=False), many=True
-        ).data
+        # Jobs of a list mostly share few organizations, query each one once
+        talent_associates_by_org = self.context.setdefault(
+            'talent_associates_by_org', {}
+        )
+        org_key = (obj.org_content_type_id, obj.org_id)
+        if org_key not in talent_associates_by_org:
+            talent_associates_by_org[org_key] = PublicUserSerializer(
+                obj.organization.members.filter(talentassociate__isnull=False),
+                many=True,
+            ).data
+
+        return talent_associates_by_org[org_key]
 
     @swagger_serializer_method(serializer_or_field=serializers.BooleanField)
     def get_candidate_proposed(self, job):
@@ -2157,6 +2226,9 @@ class JobSerializer(JobPublicSerializer):
         if not candidate:
             return
 
+        if hasattr(job, 'checked_candidate_proposed'):
+            return job.checked_candidate_proposed
+
         return m.Proposal.objects.filter(job=job, candidate=candidate).exists()
 
     @swagger_serializer_method(serializer_or_field=serializers.BooleanField)
@@ -2171,7 +2243,9 @@ class JobSerializer(JobPublicSerializer):
         if not user:
             return
 
-        # TODO: figure out some way to not query db for that?
+        if hasattr(job, 'checked_user_has_access'):
+            return job.checked_user_has_access
+
         return user.profile.apply_jobs_filter(m.Job.objects.filter(id=job.id)).exists()
 
 
@@ -1,6 +1,14 @@
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
 from django.conf import settings
+from core.analytics_cache import invalidate_analytics_cache, invalidate_dashboard_cache
 from core.utils import send_email, poly_relation_filter
 from core.tasks import (
     create_candidate_file_preview_and_thumbnail,
@@ -29,11 +37,22 @@ from core.models import (
     get_proposal_comment,
     ProposalCommentTypes,
     CandidateFile,
+    JobAgencyContract,
     JobFile,
+    JobPipelineCounter,
     User,
     LegalAgreement,
     LONGLIST_PROPOSAL_STATUS_GROUPS,
     CareerSiteJobPosting,
+    ProposalStatusFact,
+    ProposalStatusHistory,
+    Proposal,
+    Fee,
+    Candidate,
+    CandidateCertification,
+    CandidateSearchDocument,
+    EducationDetail,
+    ExperienceDetail,
 )
 
 
@@ -187,3 +206,146 @@ def close_job_postings(sender, instance, **kwargs):
         if hasattr(instance, 'career_site_posting'):
             instance.career_site_posting.is_enabled = False
             instance.career_site_posting.save()
+
+
+@receiver(post_save, sender=Job)
+def update_proposal_status_facts_function(sender, instance, created, **kwargs):
+    if not created:
+        ProposalStatusFact.objects.filter(job=instance).exclude(
+            function=instance.function_id
+        ).update(function=instance.function_id)
+
+
+@receiver(post_delete, sender=ProposalStatusHistory)
+def proposal_status_history_deleted(sender, instance, **kwargs):
+    # the fact of the previous status is exited at the next status now
+    ProposalStatusFact.sync([instance.proposal_id])
+
+
+def invalidate_jobs_analytics_cache(jobs):
+    orgs = jobs.values_list('org_content_type', 'org_id').distinct()
+    for org_content_type_id, org_id in orgs:
+        invalidate_analytics_cache(org_content_type_id, org_id)
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Job)
+def job_analytics_changed(sender, instance, **kwargs):
+    invalidate_analytics_cache(instance.org_content_type_id, instance.org_id)
+
+
+@receiver(pre_delete, sender=Proposal)
+def collect_job_pipeline_counter_rows(sender, instance, **kwargs):
+    instance._pipeline_counter_rows = JobPipelineCounter.get_proposals(
+        [instance.pk], lock=True
+    )
+
+
+@receiver(post_delete, sender=Proposal)
+def update_job_pipeline_counters(sender, instance, **kwargs):
+    JobPipelineCounter.apply_changes(
+        getattr(instance, '_pipeline_counter_rows', []), []
+    )
+
+
+@receiver(post_delete, sender=Proposal)
+@receiver(post_save, sender=Proposal)
+def proposal_analytics_changed(sender, instance, **kwargs):
+    if Proposal.job.is_cached(instance):
+        job_analytics_changed(Job, instance.job)
+    else:
+        invalidate_jobs_analytics_cache(Job.objects.filter(pk=instance.job_id))
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Job)
+def job_dashboard_changed(sender, instance, **kwargs):
+    invalidate_dashboard_cache(instance.org_content_type_id, instance.org_id)
+
+    agency_content_type_id = ContentType.objects.get_for_model(Agency).id
+    for agency_id in JobAgencyContract.objects.filter(job=instance.pk).values_list(
+        'agency_id', flat=True
+    ):
+        invalidate_dashboard_cache(agency_content_type_id, agency_id)
+
+
+@receiver(post_delete, sender=JobAgencyContract)
+@receiver(post_save, sender=JobAgencyContract)
+def job_agency_contract_dashboard_changed(sender, instance, **kwargs):
+    invalidate_dashboard_cache(
+        ContentType.objects.get_for_model(Agency).id, instance.agency_id
+    )
+
+
+@receiver(post_delete, sender=Proposal)
+@receiver(post_save, sender=Proposal)
+def proposal_dashboard_changed(sender, instance, **kwargs):
+    orgs = set()
+    for field, queryset in (
+        ('job', Job.objects),
+        ('candidate', Candidate.archived_objects),
+    ):
+        # Job and Candidate are usually loaded by the caller
+        if getattr(Proposal, field).is_cached(instance):
+            obj = getattr(instance, field)
+            orgs.add((obj.org_content_type_id, obj.org_id))
+        else:
+            orgs.update(
+                queryset.filter(pk=getattr(instance, f'{field}_id')).values_list(
+                    'org_content_type', 'org_id'
+                )
+            )
+
+    for org_content_type_id, org_id in orgs:
+        invalidate_dashboard_cache(org_content_type_id, org_id)
+
+
+# fields of Candidates grouped by the sources analytics
+CANDIDATE_ANALYTICS_FIELDS = {'source', 'org_content_type', 'org_id'}
+
+
+@receiver(post_save, sender=Candidate)
+def candidate_analytics_changed(sender, instance, created, update_fields, **kwargs):
+    # new Candidates have no Proposals, deleted ones delete their Proposals
+    if created or (
+        update_fields and CANDIDATE_ANALYTICS_FIELDS.isdisjoint(update_fields)
+    ):
+        return
+
+    invalidate_analytics_cache(instance.org_content_type_id, instance.org_id)
+    invalidate_jobs_analytics_cache(
+        Job.objects.filter(proposals__candidate=instance.pk)
+    )
+
+
+@receiver(m2m_changed, sender=Proposal.decline_reasons.through)
+def proposal_decline_reasons_changed(sender, instance, action, reverse, **kwargs):
+    if action.startswith('post_') and not reverse:
+        invalidate_jobs_analytics_cache(Job.objects.filter(pk=instance.job_id))
+
+
+@receiver(post_delete, sender=Fee)
+@receiver(post_save, sender=Fee)
+def fee_analytics_changed(sender, instance, **kwargs):
+    invalidate_analytics_cache(
+        ContentType.objects.get_for_model(Agency).id, instance.agency_id
+    )
+    if instance.proposal_id:
+        invalidate_jobs_analytics_cache(
+            Job.objects.filter(proposals=instance.proposal_id)
+        )
+
+
+@receiver(post_delete, sender=CandidateCertification)
+@receiver(post_save, sender=CandidateCertification)
+@receiver(post_delete, sender=EducationDetail)
+@receiver(post_save, sender=EducationDetail)
+@receiver(post_delete, sender=ExperienceDetail)
+@receiver(post_save, sender=ExperienceDetail)
+def update_candidate_search_document(sender, instance, **kwargs):
+    CandidateSearchDocument.sync([instance.candidate_id])
+
+
+@receiver(post_delete, sender=Candidate)
+def delete_candidate_search_document(sender, instance, **kwargs):
+    CandidateSearchDocument.objects.filter(candidate_id=instance.pk).delete()
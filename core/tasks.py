@@ -1,10 +1,10 @@
 from datetime import timedelta
 
-from celery import shared_task
+from celery import group, shared_task
 from celery.utils.log import get_task_logger
 from cloudconvert.exceptions import APIError
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
@@ -18,7 +18,12 @@ from core.converter import (
     ExtensionError,
     FileAlreadyHasRequiredFormat,
 )
-from core.notifications import notify_fee_pending
+from core.notifications import (
+    MAX_PROPOSAL_EVENT_ATTEMPTS,
+    ProposalEventFailed,
+    notify_fee_pending,
+    process_proposal_events,
+)
 
 logger = get_task_logger(__name__)
 
@@ -35,6 +40,21 @@ def send_email(*args, **kwargs):
     msg.send()
 
 
+@shared_task
+def send_emails(messages):
+    """Send emails described by `send_email` kwargs over one connection."""
+    connection = get_connection()
+    emails = []
+    for kwargs in messages:
+        html_body = kwargs.pop('html_body', None)
+        msg = EmailMultiAlternatives(connection=connection, **kwargs)
+        if html_body:
+            msg.attach_alternative(html_body, 'text/html')
+        emails.append(msg)
+
+    connection.send_messages(emails)
+
+
 @shared_task
 def remove_unactivated_accounts():
     td = timedelta(hours=settings.REMOVE_UNACTIVATED_ACCOUNTS_AFTER_HOURS)
@@ -69,11 +89,49 @@ class FileInstanceAdapter:
     def thumbnail(self):
         return getattr(self.instance, self.thumbnail_attribute)
 
-    def refresh_from_db(self):
-        self.instance.refresh_from_db()
 
-    def save(self):
-        self.instance.save()
+def save_converted_file(
+    instance, in_attr, original_name, out_attr, content=None, filename=None, **changes
+):
+    """
+    Store converted `content`, or the original file if there is none,
+    to `out_attr` unless `in_attr` was changed since `original_name`
+    was read.
+
+    Upload paths are unique, so the file name serves as a version token:
+    the row is written with one conditional UPDATE instead of reloading
+    and saving the whole instance. Returns whether the file was stored.
+    """
+    field = instance._meta.get_field(out_attr)
+    previous_name = getattr(instance, out_attr).name
+
+    if content is None:
+        name = original_name
+    else:
+        name = field.storage.save(
+            field.generate_filename(instance, filename),
+            content,
+            max_length=field.max_length,
+        )
+
+    updated = (
+        type(instance)
+        ._base_manager.filter(pk=instance.pk, **{in_attr: original_name})
+        .update(**{out_attr: name}, **changes)
+    )
+
+    if not updated:
+        if content is not None:
+            field.storage.delete(name)
+        return False
+
+    setattr(instance, out_attr, name)
+    # the original file is kept if it is only converted to another field
+    if previous_name and previous_name != name:
+        if out_attr == in_attr or previous_name != original_name:
+            field.storage.delete(previous_name)
+
+    return True
 
 
 def convert_instance_file(instance, create_thumbnail_task):
@@ -82,16 +140,24 @@ def convert_instance_file(instance, create_thumbnail_task):
         if not original_file:
             return
 
+        original_name = original_file.name
         content, filename, ext = PDFConverter.convert(original_file)
 
-        if field_have_changed(instance, 'file'):
+        thumbnail = instance.thumbnail
+        thumbnail_name = thumbnail.name
+        if not save_converted_file(
+            instance.instance,
+            instance.file_attribute,
+            original_name,
+            instance.file_attribute,
+            content,
+            filename,
+            **{instance.thumbnail_attribute: ''},
+        ):
             return
 
-        instance.file.delete()
-        instance.thumbnail.delete()
-
-        instance.file.save(filename, content)
-        instance.save()
+        if thumbnail_name:
+            thumbnail.storage.delete(thumbnail_name)
 
         create_thumbnail_task.delay(
             instance.pk, ext, instance.file_attribute, instance.thumbnail_attribute
@@ -110,24 +176,46 @@ def convert_instance_file(instance, create_thumbnail_task):
         logger.error(error)
 
 
+RESUME_FIELDS = (
+    ('resume', 'resume_thumbnail'),
+    ('resume_ja', 'resume_ja_thumbnail'),
+    ('cv_ja', 'cv_ja_thumbnail'),
+)
+
+
+@shared_task
+def convert_resume(candidate_pk):
+    """
+    Convert every resume file of the Candidate in a separate task,
+    so a slow conversion doesn't hold up the other files.
+    """
+    candidate = m.Candidate.objects.get(pk=candidate_pk)
+    tasks = [
+        convert_resume_field.si(
+            candidate_pk,
+            field_name,
+            thumbnail_field_name,
+            getattr(candidate, field_name).name,
+        )
+        for field_name, thumbnail_field_name in RESUME_FIELDS
+        if getattr(candidate, field_name)
+    ]
+    if tasks:
+        group(tasks).delay()
+
+
 @shared_task(
     autoretry_for=(APIError,), retry_kwargs={"max_retries": 5}, retry_backoff=60
 )
-def convert_resume(candidate_pk):
-    convert_instance_file(
-        FileInstanceAdapter(m.Candidate, candidate_pk, 'resume', 'resume_thumbnail'),
-        create_resume_thumbnail,
-    )
-    convert_instance_file(
-        FileInstanceAdapter(
-            m.Candidate, candidate_pk, 'resume_ja', 'resume_ja_thumbnail'
-        ),
-        create_resume_thumbnail,
-    )
-    convert_instance_file(
-        FileInstanceAdapter(m.Candidate, candidate_pk, 'cv_ja', 'cv_ja_thumbnail'),
-        create_resume_thumbnail,
+def convert_resume_field(candidate_pk, field_name, thumbnail_field_name, file_name):
+    """Convert the file, unless it was replaced after the task was queued."""
+    adapter = FileInstanceAdapter(
+        m.Candidate, candidate_pk, field_name, thumbnail_field_name
     )
+    if adapter.file.name != file_name:
+        return
+
+    convert_instance_file(adapter, create_resume_thumbnail)
 
 
 @shared_task(
@@ -139,41 +227,26 @@ def convert_job_file(job_file_pk):
     )
 
 
-def field_have_changed(instance, attr):
-    original_field = getattr(instance, attr)
-    instance.refresh_from_db()
-    current_field = getattr(instance, attr)
-
-    return current_field != original_field
-
-
 def convert_file(
     instance, in_attr='file', out_attr='file', convert=PDFConverter.convert
 ):
     original_file = getattr(instance, in_attr)
     if not original_file:
         return
+
+    original_name = original_file.name
     try:
         try:
             file_data = convert(original_file)
-
-            if field_have_changed(instance, in_attr):
-                return
-
-            to_overwrite = getattr(instance, out_attr)
-            to_overwrite.delete()
-            to_overwrite.save(file_data[1], file_data[0])
-            instance.save()
+            save_converted_file(
+                instance, in_attr, original_name, out_attr, file_data[0], file_data[1]
+            )
 
         except FileAlreadyHasRequiredFormat:
-            if out_attr == in_attr or field_have_changed(instance, in_attr):
+            if out_attr == in_attr:
                 return
 
-            to_overwrite = getattr(instance, out_attr)
-            to_overwrite.delete()
-
-            setattr(instance, out_attr, original_file)
-            instance.save()
+            save_converted_file(instance, in_attr, original_name, out_attr)
 
     except (InputFileError, ExtensionError) as error:
         logger.info(error)
@@ -184,11 +257,11 @@ def convert_file(
 )
 def create_candidate_file_preview_and_thumbnail(pk):
     instance = m.CandidateFile.objects.get(pk=pk)
-    old_preview = instance.preview
+    old_preview_name = instance.preview.name
 
     convert_file(instance, 'file', 'preview', PDFConverter.convert)
 
-    if instance.preview and instance.preview != old_preview:
+    if instance.preview and instance.preview.name != old_preview_name:
         convert_file(instance, 'preview', 'thumbnail', PDFConverter.create_thumbnail)
 
 
@@ -201,15 +274,18 @@ def create_thumbnail(instance, ext):
         if not original_file:
             return
 
+        original_name = original_file.name
         content, filename = PDFConverter.create_thumbnail(original_file)
 
-        instance.refresh_from_db()
-        # Exit if file was replace or removed before convert was ended
-        if instance.file != original_file:
-            return
-
-        instance.thumbnail.save(filename, content)
-        instance.save()
+        # not stored if file was replaced or removed before convert was ended
+        save_converted_file(
+            instance.instance,
+            instance.file_attribute,
+            original_name,
+            instance.thumbnail_attribute,
+            content,
+            filename,
+        )
 
     except InputFileError as error:
         logger.info(error)
@@ -259,6 +335,9 @@ def update_currency_rates(backend=settings.EXCHANGE_BACKEND, **kwargs):
     backend = import_string(backend)()
     backend.update_rates()
 
+    m.Candidate.update_base_salaries()
+    m.Placement.update_base_salaries()
+
 
 @shared_task
 def notify_of_pending_fees(**kwargs):
@@ -304,6 +383,50 @@ def set_invoice_overdue(**kwargs):
     ).update(invoice_status=m.InvoiceStatus.OVERDUE.key)
 
 
+@shared_task(
+    autoretry_for=(ProposalEventFailed,),
+    retry_kwargs={"max_retries": MAX_PROPOSAL_EVENT_ATTEMPTS},
+    retry_backoff=60,
+)
+def process_proposal_notification_events(proposal_id):
+    process_proposal_events(proposal_id)
+
+    if m.ProposalNotificationEvent.objects.filter(
+        proposal_id=proposal_id, processed_at__isnull=True, attempts__gt=0
+    ).exists():
+        raise ProposalEventFailed(proposal_id)
+
+
+@shared_task
+def process_stale_notification_events(**kwargs):
+    """Process events whose task was lost, remove old processed events."""
+    now = timezone.now()
+    proposal_ids = set(
+        m.ProposalNotificationEvent.objects.filter(
+            processed_at__isnull=True, created_at__lt=now - timedelta(minutes=10)
+        ).values_list('proposal_id', flat=True)
+    )
+    for proposal_id in proposal_ids:
+        processed = process_proposal_events(proposal_id)
+        if processed:
+            logger.warning(
+                'Processed %s stale notification events of Proposal %s',
+                processed,
+                proposal_id,
+            )
+
+    m.ProposalNotificationEvent.objects.filter(
+        processed_at__lt=now - timedelta(days=30)
+    ).delete()
+
+
+@shared_task
+def reconcile_notification_counters(**kwargs):
+    fixed = m.NotificationCounter.reconcile()
+    if fixed:
+        logger.warning('Fixed %s unread notification counters', fixed)
+
+
 @shared_task
 def email_public_candidate_application_confirmation(proposal_id):
     proposal = m.Proposal.objects.get(pk=proposal_id)
@@ -42,8 +42,9 @@ class GenericResponseAssertionSet:
         return serializer.errors
 
     def assert_response(self, response, expected_status, expected_data=None, msg=None):
+        content = b'' if response.streaming else response.content
         self.test_case.assertEqual(
-            response.status_code, expected_status, msg=join_msg(response.content, msg)
+            response.status_code, expected_status, msg=join_msg(content, msg)
         )
         if expected_data:
             self.test_case.assertEqual(
@@ -1,29 +1,50 @@
 import random
+from collections import namedtuple
 from datetime import timedelta
+from io import StringIO
 from unittest import skip
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.utils import timezone
 from django.utils.timezone import now, datetime, utc
 from rest_framework.reverse import reverse
-from rest_framework.test import APITestCase
+from rest_framework import viewsets
+from rest_framework.response import Response
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 from djangorestframework_camel_case.util import underscoreize
 
 from core import fixtures as f
+from core.analytics_cache import (
+    cache_analytics_response,
+    get_analytics_cache_stats,
+    get_cache as get_analytics_cache,
+)
 from core import serializers as s
+from core.utils.cache import get_stats_cache
 from core.models import (
     Job,
     Proposal,
     Candidate,
     ProposalStatusHistory,
+    ProposalStatusFact,
     ProposalStatus,
     Function,
     ProposalStatusStage,
     ProposalStatusGroup,
 )
 from core.views.analytics import (
+    GRANULARITY,
+    DayGranularity,
+    count_overlapping_periods,
+    count_overlapping_periods_in_db,
     get_job_open_average,
+    get_conversion_ratio,
     get_conversion_ratios,
+    get_candidate_statuses_stats,
+    get_proposals_snapshot,
+    filter_jobs_open,
+    parse_default_parameters,
 )
 
 User = get_user_model()
@@ -1073,3 +1094,457 @@ class JobAnalyticsTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, 400)
+
+
+class ProposalStatusFactTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client_obj = f.create_client()
+        self.client_admin = f.create_client_administrator(self.client_obj)
+        self.job = f.create_job(self.client_obj)
+        self.proposal = f.create_proposal(
+            self.job, f.create_candidate(self.client_obj), self.client_admin
+        )
+        self.day = datetime(2019, 10, 1, tzinfo=utc)
+
+    def create_history(self, group, days):
+        history = f.create_proposal_status_history(self.proposal, group)
+        history.changed_at = self.day + timedelta(days=days)
+        history.save()
+        return history
+
+    def get_facts(self):
+        return list(
+            ProposalStatusFact.objects.filter(proposal=self.proposal)
+            .order_by('entered_at')
+            .values_list('history_id', 'status_group', 'entered_at', 'exited_at')
+        )
+
+    def test_facts_follow_history(self):
+        new = self.create_history('new', 0)
+        offer = self.create_history('offer', 5)
+
+        self.assertEqual(
+            self.get_facts(),
+            [
+                (new.id, 'new', self.day, self.day + timedelta(days=5)),
+                (offer.id, 'offer', self.day + timedelta(days=5), None),
+            ],
+        )
+
+        new.changed_at = self.day + timedelta(days=10)
+        new.save()
+
+        self.assertEqual(
+            self.get_facts(),
+            [
+                (offer.id, 'offer', self.day + timedelta(days=5), new.changed_at),
+                (new.id, 'new', new.changed_at, None),
+            ],
+        )
+
+    def test_facts_follow_deleted_history(self):
+        new = self.create_history('new', 0)
+        offer = self.create_history('offer', 5)
+        accepted = self.create_history('offer_accepted', 10)
+
+        offer.delete()
+
+        self.assertEqual(
+            self.get_facts(),
+            [
+                (new.id, 'new', self.day, self.day + timedelta(days=10)),
+                (accepted.id, 'offer_accepted', accepted.changed_at, None),
+            ],
+        )
+
+    def test_facts_copy_job(self):
+        self.create_history('new', 0)
+        function = Function.objects.create(title='Engineering')
+        self.job.function = function
+        self.job.save()
+
+        other_job = f.create_job(self.client_obj)
+        self.proposal.job = other_job
+        self.proposal.save()
+        ProposalStatusFact.sync([self.proposal.id])
+
+        fact = ProposalStatusFact.objects.get(proposal=self.proposal)
+        self.assertEqual(fact.job, other_job)
+        self.assertEqual(fact.organization, self.client_obj)
+        self.assertIsNone(fact.function)
+
+        other_job.function = function
+        other_job.save()
+
+        fact.refresh_from_db()
+        self.assertEqual(fact.function, function)
+
+    def test_proposals_snapshot(self):
+        self.create_history('new', 0)
+        offer = self.create_history('offer', 5)
+        self.create_history('offer_accepted', 10)
+
+        def get_snapshot(date_start, date_end):
+            return list(
+                get_proposals_snapshot(lambda qs: qs, self.job, date_start, date_end)
+            )
+
+        date = (self.day + timedelta(days=7)).date()
+        self.assertEqual(get_snapshot(None, date), [offer])
+        self.assertEqual(get_snapshot(date, date), [])
+
+    def test_conversion_ratio(self):
+        self.create_history('new', 0)
+        self.create_history('offer', 5)
+        self.create_history('offer', 6)
+
+        result = {
+            i['status_group']: i['value']
+            for i in get_conversion_ratio(
+                Proposal.objects.all(), ('new', 'offer', 'offer_accepted')
+            )
+        }
+
+        self.assertEqual(result, {'new': 1, 'offer': 1, 'offer_accepted': 0})
+
+    def test_conversion_ratios_single_query(self):
+        self.create_history('new', 0)
+        self.create_history('offer', 5)
+        table = (('new', ('offer', 'offer_accepted')), ('offer', ('offer_accepted',)))
+
+        with self.assertNumQueries(1):
+            ratios = get_conversion_ratios(Proposal.objects.all(), table)
+
+        self.assertEqual(
+            ratios,
+            [
+                {'id': 'new', 'from_status': 'new', 'offer': 1.0, 'offer_accepted': 0},
+                {'id': 'offer', 'from_status': 'offer', 'offer_accepted': 0},
+            ],
+        )
+
+        with self.assertNumQueries(1):
+            get_conversion_ratio(Proposal.objects.all())
+
+    def test_benchmark_command(self):
+        stdout = StringIO()
+
+        call_command(
+            'benchmark_conversion_ratio',
+            self.client_obj.id,
+            count=2,
+            runs=1,
+            stdout=stdout,
+        )
+
+        self.assertIn('get_conversion_ratios latency', stdout.getvalue())
+        self.assertIn('1 queries per run', stdout.getvalue())
+
+    def test_backfill_command(self):
+        self.create_history('new', 0)
+        self.create_history('offer', 5)
+        expected = self.get_facts()
+        ProposalStatusFact.objects.all().delete()
+
+        call_command('backfill_proposal_status_facts', stdout=StringIO())
+
+        self.assertEqual(self.get_facts(), expected)
+
+
+class CandidateStatusesStatsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.agency = f.create_agency()
+        self.user = f.create_agency_administrator(self.agency)
+        self.job = f.create_job(self.agency)
+        self.day = datetime(2019, 10, 1, tzinfo=utc)
+
+    def create_proposal(self, *groups_and_days):
+        proposal = f.create_proposal_with_candidate(self.job, self.user)
+        for group, days in groups_and_days:
+            history = f.create_proposal_status_history(proposal, group)
+            ProposalStatusHistory.objects.filter(id=history.id).update(
+                changed_at=self.day + timedelta(days=days)
+            )
+        ProposalStatusFact.sync([proposal.id])
+
+    def test_count_by_first_entered_date(self):
+        """Every Proposal should be counted once, when it first entered a status."""
+        self.create_proposal(('interviewing', 2), ('offer', 3))
+        self.create_proposal(('offer', 0), ('interviewing', 2))
+        self.create_proposal(('interviewing', 3))
+        self.create_proposal()
+
+        stats = get_candidate_statuses_stats(
+            ProposalStatusFact.objects.filter(
+                job=self.job, status_group__in=('interviewing', 'offer')
+            ),
+            namedtuple('Params', 'granularity')(DayGranularity),
+        )
+
+        self.assertEqual(
+            stats,
+            [
+                {'date': self.day, 'value': 1},
+                {'date': self.day + timedelta(days=2), 'value': 1},
+                {'date': self.day + timedelta(days=3), 'value': 1},
+            ],
+        )
+
+
+def count_overlapping_periods_naive(
+    granularity, date_ranges, start_date=None, end_date=None
+):
+    """Reference implementation walking every chart point of every range"""
+    periods = [
+        (
+            granularity.floor(period_start.date()),
+            (
+                granularity.floor(period_end.date())
+                if period_end
+                else granularity.floor(timezone.now().date())
+            ),
+        )
+        for period_start, period_end in date_ranges
+    ]
+
+    if start_date is None and periods:
+        start_date = min(i[0] for i in periods)
+
+    if end_date is None and periods:
+        end_date = max(i[1] for i in periods)
+
+    if start_date is None or end_date is None:
+        return []
+
+    result = {
+        d: 0
+        for d in granularity.range(
+            granularity.floor(start_date), granularity.ceil(end_date)
+        )
+    }
+
+    for period_start, period_end in periods:
+        for chart_point in granularity.range(period_start, granularity.add(period_end)):
+            if chart_point in result:
+                result[chart_point] += 1
+
+    return sorted(result.items(), key=lambda x: x[0])
+
+
+class CountOverlappingPeriodsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        rnd = random.Random(42)
+        base = datetime(2020, 1, 1, tzinfo=utc)
+
+        self.date_ranges = []
+        for i in range(30):
+            start = base + timedelta(days=rnd.randint(0, 400), hours=rnd.randint(0, 23))
+            end = start + timedelta(days=rnd.randint(-5, 120))
+            self.date_ranges.append((start, None if i % 7 == 0 else end))
+
+        self.bounds = [
+            (None, None),
+            (base.date(), (base + timedelta(days=200)).date()),
+            ((base + timedelta(days=45)).date(), (base + timedelta(days=95)).date()),
+            ((base + timedelta(days=10)).date(), None),
+            ((base + timedelta(days=90)).date(), base.date()),
+        ]
+
+    def test_count_overlapping_periods(self):
+        for name, granularity in GRANULARITY.items():
+            for start_date, end_date in self.bounds:
+                with self.subTest(granularity=name, start=start_date, end=end_date):
+                    self.assertEqual(
+                        count_overlapping_periods(
+                            granularity, self.date_ranges, start_date, end_date
+                        ),
+                        count_overlapping_periods_naive(
+                            granularity, self.date_ranges, start_date, end_date
+                        ),
+                    )
+
+    def test_count_overlapping_periods_empty(self):
+        for granularity in GRANULARITY.values():
+            self.assertEqual(count_overlapping_periods(granularity, []), [])
+
+    def test_count_overlapping_periods_in_db(self):
+        client = f.create_client()
+        for published_at, closed_at in self.date_ranges:
+            f.create_job(client, published_at=published_at, closed_at=closed_at)
+        jobs = Job.objects.filter(client=client)
+
+        for name, granularity in GRANULARITY.items():
+            for start_date, end_date in self.bounds:
+                with self.subTest(granularity=name, start=start_date, end=end_date):
+                    self.assertEqual(
+                        count_overlapping_periods_in_db(
+                            granularity,
+                            jobs,
+                            'published_at',
+                            'closed_at',
+                            start_date,
+                            end_date,
+                        ),
+                        count_overlapping_periods_naive(
+                            granularity, self.date_ranges, start_date, end_date
+                        ),
+                    )
+
+        for start_date, end_date in self.bounds:
+            self.assertEqual(
+                count_overlapping_periods_in_db(
+                    DayGranularity,
+                    jobs.none(),
+                    'published_at',
+                    'closed_at',
+                    start_date,
+                    end_date,
+                ),
+                count_overlapping_periods_naive(
+                    DayGranularity, [], start_date, end_date
+                ),
+            )
+
+    def test_count_overlapping_periods_in_db_distinct(self):
+        """Objects with equal ranges should be counted separately."""
+        client = f.create_client()
+        published_at, closed_at = self.date_ranges[1]
+        for _ in range(2):
+            f.create_job(client, published_at=published_at, closed_at=closed_at)
+        jobs = Job.objects.filter(client=client).distinct()
+
+        self.assertEqual(
+            count_overlapping_periods_in_db(
+                DayGranularity, jobs, 'published_at', 'closed_at'
+            ),
+            count_overlapping_periods(DayGranularity, [(published_at, closed_at)] * 2),
+        )
+
+
+class CachedJobsCountViewSet(viewsets.ViewSet):
+    @cache_analytics_response(s.StatsQuerySerializer)
+    def jobs_count(self, request, *args, **kwargs):
+        params = parse_default_parameters(request)
+        jobs = request.user.profile.apply_jobs_filter(Job.objects)
+
+        return Response(
+            {
+                'count': filter_jobs_open(
+                    jobs, params.date_start, params.date_end
+                ).count()
+            }
+        )
+
+
+class AnalyticsCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        get_analytics_cache().clear()
+        get_stats_cache().clear()
+
+        self.client_obj = f.create_client()
+        self.user = f.create_client_administrator(self.client_obj)
+        self.create_job()
+
+        self.params = {
+            'filter_type': 'function',
+            'date_start': (now() - timedelta(days=30)).strftime('%Y-%m-%d'),
+            'date_end': now().strftime('%Y-%m-%d'),
+        }
+
+    def create_job(self, client=None):
+        return f.create_job(
+            client or self.client_obj,
+            published_at=now() - timedelta(days=10),
+            closed_at=None,
+            owner=self.user,
+        )
+
+    def get_jobs_count(self, user=None, **params):
+        request = APIRequestFactory().get('/', {**self.params, **params})
+        force_authenticate(request, user or self.user)
+
+        return CachedJobsCountViewSet.as_view({'get': 'jobs_count'})(request)
+
+    def assert_stats(self, hits, misses):
+        self.assertEqual(
+            get_analytics_cache_stats()['jobs_count'], {'hits': hits, 'misses': misses}
+        )
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self.get_jobs_count().data, {'count': 1})
+
+        # changed outside of models, so the cache is not invalidated
+        Job.objects.update(published=False)
+
+        # the hit counter is kept out of the database
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_jobs_count().data, {'count': 1})
+
+        self.assert_stats(hits=1, misses=1)
+
+    def test_params_are_normalized(self):
+        self.get_jobs_count()
+        self.get_jobs_count(unknown='1')
+        self.assert_stats(hits=1, misses=1)
+
+        self.get_jobs_count(filter_type='team')
+        self.assert_stats(hits=1, misses=2)
+
+    def test_invalid_params(self):
+        response = self.get_jobs_count(date_start='')
+
+        self.assertEqual(response.status_code, 400)
+        self.assert_stats(hits=0, misses=0)
+
+    def test_invalidated_by_job(self):
+        self.get_jobs_count()
+        self.create_job()
+
+        self.assertEqual(self.get_jobs_count().data, {'count': 2})
+
+    def test_invalidated_by_proposal(self):
+        self.get_jobs_count()
+        job = Job.objects.get()
+        Job.objects.update(published=False)
+
+        f.create_proposal(job, f.create_candidate(self.client_obj), self.user)
+
+        self.assertEqual(self.get_jobs_count().data, {'count': 0})
+
+    def test_invalidated_by_candidate(self):
+        """Sources of Candidates are grouped by the sources analytics."""
+        job = Job.objects.get()
+        candidate = f.create_candidate(self.client_obj)
+        f.create_proposal(job, candidate, self.user)
+        self.get_jobs_count()
+
+        candidate.push_factors = 'Commute'
+        candidate.save(update_fields=['push_factors'])
+        self.get_jobs_count()
+        self.assert_stats(hits=1, misses=1)
+
+        candidate.source = 'LinkedIn'
+        candidate.save()
+        self.get_jobs_count()
+        self.assert_stats(hits=1, misses=2)
+
+    def test_not_invalidated_by_other_organization(self):
+        self.get_jobs_count()
+        self.create_job(f.create_client())
+
+        self.get_jobs_count()
+        self.assert_stats(hits=1, misses=1)
+
+    def test_other_organization(self):
+        other_client = f.create_client()
+        self.create_job(other_client)
+        other_user = f.create_client_administrator(other_client)
+
+        self.get_jobs_count()
+        self.get_jobs_count(other_user)
+
+        self.assert_stats(hits=0, misses=2)
@@ -4,7 +4,10 @@ from django.test import TestCase
 from django.utils.timezone import datetime, utc
 
 import core.fixtures as f
-from core.check_candidate_duplication import check_candidate_duplication
+from core.check_candidate_duplication import (
+    check_candidate_duplication,
+    check_candidates_duplication,
+)
 
 
 BASE_CREATION_TIME = datetime(2019, 8, 1, tzinfo=utc)
@@ -415,3 +418,258 @@ class TestCandidateDuplicationCheck(TestCase):
                 'to_restore': [self.archived_candidate.id],
             },
         )
+
+    def test_single_query(self):
+        """Duplicates should be resolved with a single query"""
+        with self.assertNumQueries(1):
+            check_candidate_duplication(
+                {
+                    'first_name': self.jack_dawson.first_name,
+                    'last_name': self.jack_dawson.last_name,
+                    'email': self.jane_smith.email,
+                    'linkedin_url': self.linkedin_candidate.linkedin_url,
+                    'job': self.job.id,
+                },
+                self.client_admin.profile,
+            )
+
+    def test_normalized_email(self):
+        """Should find a candidate with same email in different case"""
+        check_results = self.get_formatted_duplication_results(
+            {
+                'first_name': '',
+                'last_name': '',
+                'email': f' {self.jane_smith.email.upper()} ',
+            }
+        )
+        self.assertEqual(
+            check_results['duplicates'],
+            [{'id': self.jane_smith.id, 'is_absolute': True, 'is_submitted': False}],
+        )
+
+    def test_keys_updated_on_save(self):
+        """Should not find a candidate by the email it doesn't have anymore"""
+        old_email = self.jane_smith.email
+        self.jane_smith.email = f.generate_email()
+        self.jane_smith.save()
+
+        check_results = self.get_formatted_duplication_results(
+            {'first_name': '', 'last_name': '', 'email': old_email}
+        )
+        self.assertEqual(check_results['duplicates'], [])
+
+        check_results = self.get_formatted_duplication_results(
+            {'first_name': '', 'last_name': '', 'email': self.jane_smith.email}
+        )
+        self.assertEqual(
+            check_results['duplicates'],
+            [{'id': self.jane_smith.id, 'is_absolute': True, 'is_submitted': False}],
+        )
+
+    def test_excluded_id(self):
+        """Should not find the candidate being checked"""
+        check_results = self.get_formatted_duplication_results(
+            {
+                'id': self.jane_smith.id,
+                'first_name': self.jane_smith.first_name,
+                'last_name': self.jane_smith.last_name,
+                'email': self.jane_smith.email,
+            }
+        )
+        self.assertEqual(check_results['duplicates'], [])
+
+
+class TestCandidatesDuplicationBatchCheck(TestCandidateDuplicationCheck):
+    """Run duplication checks in a batch, through check_candidates_duplication"""
+
+    def get_formatted_duplication_results(self, new_candidate):
+        [results] = check_candidates_duplication(
+            [new_candidate], self.client_admin.profile
+        )
+
+        submitted = results['last_submitted']
+        submitted = submitted.date() if submitted else None
+
+        return {
+            'duplicates': [
+                {
+                    'id': item['id'],
+                    'is_absolute': item['is_absolute'],
+                    'is_submitted': item['is_submitted'],
+                }
+                for item in results['duplicates']
+            ],
+            'last_submitted': submitted,
+            'to_restore': [item['id'] for item in results['to_restore']],
+            'submitted_by_others': results['submitted_by_others'],
+        }
+
+    def test_single_query(self):
+        """Batch duplicates should be resolved with a constant number of queries"""
+        new_candidates = [
+            {
+                'first_name': self.jack_dawson.first_name,
+                'last_name': self.jack_dawson.last_name,
+                'email': self.jane_smith.email,
+                'job': self.job.id,
+            },
+            {'first_name': '', 'last_name': '', 'email': self.archived_candidate.email},
+            {
+                'first_name': self.possibly_submitted_by_other.first_name,
+                'last_name': self.possibly_submitted_by_other.last_name,
+                'email': f.generate_email(),
+                'job': self.job,
+            },
+            {
+                'first_name': '',
+                'last_name': '',
+                'email': self.submitted_candidate_2.email,
+                'job': self.job.id,
+            },
+        ]
+
+        with self.assertNumQueries(3):
+            results = check_candidates_duplication(
+                new_candidates, self.client_admin.profile
+            )
+
+        self.assertEqual(
+            [
+                {
+                    'duplicates': [item['id'] for item in result['duplicates']],
+                    'to_restore': [item['id'] for item in result['to_restore']],
+                    'submitted_by_others': result['submitted_by_others'],
+                    'last_submitted': result['last_submitted'],
+                }
+                for result in results
+            ],
+            [
+                {
+                    'duplicates': [self.jane_smith.id, self.jack_dawson.id],
+                    'to_restore': [],
+                    'submitted_by_others': None,
+                    'last_submitted': None,
+                },
+                {
+                    'duplicates': [],
+                    'to_restore': [self.archived_candidate.id],
+                    'submitted_by_others': None,
+                    'last_submitted': None,
+                },
+                {
+                    'duplicates': [],
+                    'to_restore': [],
+                    'submitted_by_others': 'POSSIBLE',
+                    'last_submitted': None,
+                },
+                {
+                    'duplicates': [self.submitted_candidate_2.id],
+                    'to_restore': [],
+                    'submitted_by_others': None,
+                    'last_submitted': self.proposal_2.created_at,
+                },
+            ],
+        )
+
+
+class TestCandidatePossibleDuplicationCheck(TestCase):
+    """Find Candidates with similar names, through check_candidate_duplication"""
+
+    def setUp(self):
+        self.client_obj = f.create_client()
+        self.client_admin = f.create_client_administrator(self.client_obj)
+
+        self.jane_smith = f.create_candidate(self.client_obj, **JANE_SMITH)
+        self.jack_dawson = f.create_candidate(self.client_obj, **JACK_DAWSON)
+        self.other_org_jane_smith = f.create_candidate(
+            f.create_agency(), **{**JANE_SMITH, 'email': f.generate_email()}
+        )
+
+    def get_possible_duplicates(self, new_candidate):
+        results = check_candidate_duplication(
+            {'email': f.generate_email(), **new_candidate}, self.client_admin.profile
+        )
+        return [
+            (candidate.id, round(candidate.similarity, 2))
+            for candidate in results['possible_duplicates']
+        ]
+
+    def test_similar_name(self):
+        """Should find candidates of the organization with misspelled names"""
+        possible_duplicates = self.get_possible_duplicates(
+            {'first_name': 'Jayne', 'last_name': 'Smith'}
+        )
+        self.assertEqual([id for id, _ in possible_duplicates], [self.jane_smith.id])
+        self.assertGreaterEqual(possible_duplicates[0][1], 0.5)
+
+    def test_similar_name_kana(self):
+        """Should match names in half-width katakana and hiragana"""
+        for first_name_kanji, last_name_kanji in (
+            ('ｼﾞｪｲﾝ', 'ｽﾐｽ'),
+            ('じぇいん', 'すみす'),
+        ):
+            self.assertEqual(
+                [
+                    id
+                    for id, _ in self.get_possible_duplicates(
+                        {
+                            'first_name_kanji': first_name_kanji,
+                            'last_name_kanji': last_name_kanji,
+                        }
+                    )
+                ],
+                [self.jane_smith.id],
+            )
+
+    def test_exact_duplicates_excluded(self):
+        """Exact duplicates should not be repeated as possible ones"""
+        self.assertEqual(
+            self.get_possible_duplicates(
+                {
+                    'first_name': 'Jane',
+                    'last_name': 'Smith',
+                    'email': JANE_SMITH['email'],
+                }
+            ),
+            [],
+        )
+
+    def test_dissimilar_name(self):
+        """Should not find candidates with different names"""
+        self.assertEqual(
+            self.get_possible_duplicates({'first_name': 'John', 'last_name': 'Doe'}),
+            [],
+        )
+
+
+class TestCandidatesPossibleDuplicationBatchCheck(TestCandidatePossibleDuplicationCheck):
+    """Find Candidates with similar names, through check_candidates_duplication"""
+
+    def get_possible_duplicates(self, new_candidate):
+        [results] = check_candidates_duplication(
+            [{'email': f.generate_email(), **new_candidate}], self.client_admin.profile
+        )
+        return [
+            (candidate['id'], round(candidate['similarity'], 2))
+            for candidate in results['possible_duplicates']
+        ]
+
+    def test_batch(self):
+        """Should find possible duplicates of every Candidate in one query"""
+        with self.assertNumQueries(2):
+            results = check_candidates_duplication(
+                [
+                    {'first_name': 'Jayne', 'last_name': 'Smith', 'email': ''},
+                    {'first_name': 'John', 'last_name': 'Doe', 'email': ''},
+                    {'first_name': 'Jack', 'last_name': 'Dowson', 'email': ''},
+                ],
+                self.client_admin.profile,
+            )
+
+        self.assertEqual(
+            [
+                [candidate['id'] for candidate in result['possible_duplicates']]
+                for result in results
+            ],
+            [[self.jane_smith.id], [], [self.jack_dawson.id]],
+        )
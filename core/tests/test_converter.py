@@ -1,13 +1,23 @@
+import os
+import subprocess
 import tempfile
 from unittest.mock import patch
 from os import path
 
 from django.conf import settings
 from django.core.files import File
+from django.core.files.base import ContentFile
 from django.test import TestCase, override_settings
 
-from core.converter import PDFConverter, FileAlreadyHasRequiredFormat
+from core.conversion_cache import get_conversion_cache_stats
+from core.converter import (
+    ConversionFailed,
+    FileAlreadyHasRequiredFormat,
+    LocalBackend,
+    PDFConverter,
+)
 from core.fixtures import create_candidate, create_agency
+from core.utils.cache import get_stats_cache
 
 
 class PDFConverterTestCase(TestCase):
@@ -20,8 +30,8 @@ class PDFConverterTestCase(TestCase):
         return File(file), name
 
     @override_settings(MEDIA_ROOT=tempfile.gettempdir())
-    @patch('core.converter.PDFConverter.API')
-    def test_pdf_is_not_converted(self, mock_api):
+    @patch('core.converter.CloudConvertBackend.get_api')
+    def test_pdf_is_not_converted(self, mock_get_api):
         """cloudconvert.Api.convert() method shouldn't be called
         if file ext isn't one of (doc, docx, xls, xlsx)
         """
@@ -31,12 +41,12 @@ class PDFConverterTestCase(TestCase):
         with self.assertRaises(FileAlreadyHasRequiredFormat):
             PDFConverter.convert(c.resume)
 
-        mock_api.convert.assert_not_called()
+        mock_get_api.return_value.convert.assert_not_called()
 
     @override_settings(MEDIA_ROOT=tempfile.gettempdir())
-    @patch('core.converter.PDFConverter.get_temp_file')
-    @patch('core.converter.PDFConverter.API')
-    def test_docx_is_converted(self, mock_api, mock_get_temp_file):
+    @patch('core.converter.CloudConvertBackend.get_temp_file')
+    @patch('core.converter.CloudConvertBackend.get_api')
+    def test_docx_is_converted(self, mock_get_api, mock_get_temp_file):
         """cloudconvert.Api.convert() method should be called
         if file ext is one of (doc, docx, xls, xlsx)
         """
@@ -46,4 +56,123 @@ class PDFConverterTestCase(TestCase):
         c.resume.save(filename, content)
         PDFConverter.convert(c.resume)
 
-        mock_api.convert.assert_called_once()
+        mock_get_api.return_value.convert.assert_called_once()
+
+
+def write_output(args, **kwargs):
+    """Imitate a conversion engine writing the output file."""
+    if args[0] == LocalBackend.soffice_binary:
+        output_dir = args[args.index('--outdir') + 1]
+        os.makedirs(output_dir)
+        name = path.splitext(path.basename(args[-1]))[0]
+        output_path = path.join(output_dir, f'{name}.pdf')
+    else:
+        output_path = f'{args[-1]}.jpg'
+
+    with open(output_path, 'wb') as output:
+        output.write(b'converted')
+
+
+@override_settings(PDF_CONVERTER_BACKEND='core.converter.LocalBackend')
+class LocalBackendTestCase(PDFConverterTestCase):
+    @override_settings(MEDIA_ROOT=tempfile.gettempdir())
+    @patch('core.converter.subprocess.run', side_effect=write_output)
+    def test_docx_is_converted(self, mock_run):
+        c = create_candidate(organization=create_agency())
+        content, filename = self.get_file_mock('docx')
+        c.resume.save(filename, content)
+
+        content, filename, ext = PDFConverter.convert(c.resume)
+
+        self.assertEqual(mock_run.call_args[0][0][0], 'soffice')
+        self.assertEqual(ext, 'pdf')
+        name = path.splitext(path.basename(c.resume.name))[0]
+        self.assertEqual(filename, f'{name}.pdf')
+        self.assertEqual(content.read(), b'converted')
+
+    @override_settings(MEDIA_ROOT=tempfile.gettempdir())
+    @patch('core.converter.subprocess.run', side_effect=write_output)
+    def test_create_thumbnail(self, mock_run):
+        c = create_candidate(organization=create_agency())
+        content, filename = self.get_file_mock('pdf')
+        c.resume.save(filename, content)
+
+        content, filename = PDFConverter.create_thumbnail(c.resume)
+
+        self.assertEqual(mock_run.call_args[0][0][0], 'pdftoppm')
+        self.assertTrue(filename.endswith('.jpg'))
+        self.assertEqual(content.read(), b'converted')
+
+    @override_settings(MEDIA_ROOT=tempfile.gettempdir())
+    @patch(
+        'core.converter.subprocess.run',
+        side_effect=subprocess.CalledProcessError(1, 'soffice'),
+    )
+    def test_engine_failure(self, mock_run):
+        c = create_candidate(organization=create_agency())
+        content, filename = self.get_file_mock('docx')
+        c.resume.save(filename, content)
+
+        with self.assertRaises(ConversionFailed):
+            PDFConverter.convert(c.resume)
+
+
+@override_settings(
+    PDF_CONVERTER_BACKEND='core.converter.LocalBackend',
+    MEDIA_ROOT=tempfile.gettempdir(),
+)
+class ConversionCacheTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        get_stats_cache().clear()
+        self.agency = create_agency()
+
+    def create_resume(self, content=b'resume', filename='resume.docx'):
+        c = create_candidate(organization=self.agency)
+        c.resume.save(filename, ContentFile(content))
+        return c.resume
+
+    @patch('core.converter.subprocess.run', side_effect=write_output)
+    def test_same_content_is_converted_once(self, mock_run):
+        PDFConverter.convert(self.create_resume())
+        resume = self.create_resume()
+        content, filename, ext = PDFConverter.convert(resume)
+
+        mock_run.assert_called_once()
+        name = path.splitext(path.basename(resume.name))[0]
+        self.assertEqual(filename, f'{name}.pdf')
+        self.assertEqual(content.read(), b'converted')
+
+        stats = get_conversion_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['files'], 1)
+
+    @patch('core.converter.subprocess.run', side_effect=write_output)
+    def test_operations_are_cached_separately(self, mock_run):
+        resume = self.create_resume(filename='resume.pdf')
+        PDFConverter.create_thumbnail(resume)
+        PDFConverter.create_thumbnail(resume)
+        PDFConverter.convert(self.create_resume())
+
+        self.assertEqual(mock_run.call_count, 2)
+
+    @override_settings(CONVERSION_CACHE_MAX_SIZE=len(b'converted'))
+    @patch('core.converter.subprocess.run', side_effect=write_output)
+    def test_least_recently_used_is_evicted(self, mock_run):
+        first = self.create_resume(b'first')
+        PDFConverter.convert(first)
+        PDFConverter.convert(self.create_resume(b'second'))
+
+        self.assertEqual(get_conversion_cache_stats()['files'], 1)
+
+        PDFConverter.convert(first)
+        self.assertEqual(mock_run.call_count, 3)
+
+    @override_settings(CONVERSION_CACHE_MAX_SIZE=0)
+    @patch('core.converter.subprocess.run', side_effect=write_output)
+    def test_disabled(self, mock_run):
+        PDFConverter.convert(self.create_resume())
+        PDFConverter.convert(self.create_resume())
+
+        self.assertEqual(mock_run.call_count, 2)
+        self.assertEqual(get_conversion_cache_stats()['files'], 0)
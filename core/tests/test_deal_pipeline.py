@@ -14,6 +14,7 @@ from core import fixtures as f
 from core import serializers as s
 from core.tests.generic_response_assertions import GenericResponseAssertionSet
 from core.annotations import annotate_proposal_deal_pipeline_metrics
+from core.views.views import sum_deal_pipeline_values
 
 factory = APIRequestFactory()
 
@@ -395,6 +396,7 @@ class DealPipelineTests(APITestCase):
             CurrencyRate(currency='JPY', value=1.0, backend=e_backend),
         ]
         CurrencyRate.objects.bulk_create(rates)
+        m.Candidate.update_base_salaries()
 
         salary_1 = lambda: None
         salary_2 = lambda: None
@@ -576,3 +578,54 @@ class DealPipelineTests(APITestCase):
 
     def test_filtration_one_opening(self):
         self._test_filtration(1, 0)
+
+
+class SumDealPipelineValuesTests(APITestCase):
+    """Tests related to the SQL sum of deal pipeline values."""
+
+    def setUp(self):
+        super().setUp()
+        self.agency = f.create_agency()
+        self.agency_admin = f.create_agency_administrator(self.agency)
+        self.job = f.create_job(self.agency, openings_count=2)
+
+        self.status = m.ProposalStatus.objects.filter(
+            deal_stage=m.ProposalDealStages.FIRST_ROUND.key
+        ).first()
+
+    def create_deal(self, salary):
+        candidate = f.create_candidate(self.agency, current_salary=salary)
+        proposal = f.create_proposal(self.job, candidate, self.agency_admin)
+        proposal.status = self.status
+        proposal.save()
+        return proposal
+
+    def get_values(self, counted_proposals=None):
+        proposals = annotate_proposal_deal_pipeline_metrics(
+            m.Proposal.objects.filter(job=self.job), self.agency
+        )
+        if counted_proposals is None:
+            counted_proposals = proposals
+        return sum_deal_pipeline_values(proposals, counted_proposals)
+
+    def test_openings_count(self):
+        """Only deals with highest salaries up to openings count are summed."""
+        self.create_deal(100)
+        self.create_deal(300)
+        self.create_deal(200)
+
+        self.assertEqual(self.get_values(), {'first_round': 500})
+
+    def test_not_counted_deals_take_openings(self):
+        """Deals filtered out should not be summed but still take openings."""
+        first = self.create_deal(300)
+        self.create_deal(200)
+        self.create_deal(100)
+
+        self.assertEqual(
+            self.get_values(m.Proposal.objects.exclude(id=first.id)),
+            {'first_round': 200},
+        )
+
+    def test_empty(self):
+        self.assertEqual(self.get_values(m.Proposal.objects.none()), {})
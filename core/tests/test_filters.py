@@ -5,8 +5,19 @@ from rest_framework.request import Request
 from rest_framework.test import APITestCase
 
 from core import fixtures as f
-from core.filters import AgencyFilter, ProposalCommentFilterSet
-from core.models import Agency, ProposalComment
+from core.filters import (
+    AgencyFilter,
+    CandidateSearchFilter,
+    ProposalCommentFilterSet,
+)
+from core.models import (
+    Agency,
+    Candidate,
+    CandidateNote,
+    CandidateSearchDocument,
+    ExperienceDetail,
+    ProposalComment,
+)
 
 User = get_user_model()
 
@@ -115,3 +126,151 @@ class ProposalCommentTests(APITestCase):
             set(result.all()),
             {self.comment, self.comment_system, self.comment_public_system},
         )
+
+
+class CandidateSearchFilterTests(APITestCase):
+    """Tests related to the CandidateSearchFilter."""
+
+    def setUp(self):
+        super().setUp()
+        self.agency = f.create_agency()
+        self.user = f.create_recruiter(self.agency)
+
+        self.candidate = f.create_candidate(
+            self.agency,
+            first_name='Taro',
+            last_name='Yamada',
+            last_name_kanji='山田',
+            email='taro.yamada@example.com',
+        )
+        self.other_candidate = f.create_candidate(
+            self.agency, first_name='Hanako', last_name='Tanaka'
+        )
+
+    def search(self, search):
+        request = Request(HttpRequest())
+        request.user = self.user
+        request.query_params._mutable = True
+        request.query_params['search'] = search
+
+        return list(
+            CandidateSearchFilter().filter_queryset(
+                request, Candidate.objects.order_by('id'), None
+            )
+        )
+
+    def test_search_names_and_email(self):
+        """Should match prefixes of names, kanji names and emails."""
+        for search in ('tar', 'Yamada', '山田', 'taro.yamada@example.com', 'exampl'):
+            self.assertEqual(self.search(search), [self.candidate], search)
+
+    def test_search_all_terms(self):
+        """Every search term should match."""
+        self.assertEqual(self.search('taro yamada'), [self.candidate])
+        self.assertEqual(self.search('taro tanaka'), [])
+
+    def test_search_details_and_note(self):
+        """Should match details and the note of the User organization."""
+        ExperienceDetail.objects.create(
+            candidate=self.other_candidate, company='Initech', occupation='Engineer'
+        )
+        CandidateNote.objects.create(
+            candidate=self.other_candidate,
+            organization=self.agency,
+            text='Prefers remote work',
+        )
+
+        self.assertEqual(self.search('initech'), [self.other_candidate])
+        self.assertEqual(self.search('remote'), [self.other_candidate])
+
+        ExperienceDetail.objects.filter(candidate=self.other_candidate).delete()
+        self.assertEqual(self.search('initech'), [])
+
+    def test_search_japanese_substrings(self):
+        """Japanese terms should match inside words of the document and note."""
+        self.candidate.current_position = 'ソフトウェアエンジニア'
+        self.candidate.current_company = '株式会社リクルート'
+        self.candidate.save()
+        CandidateNote.objects.create(
+            candidate=self.other_candidate,
+            organization=self.agency,
+            text='東京本社のエンジニア',
+        )
+
+        self.assertEqual(
+            self.search('エンジニア'), [self.candidate, self.other_candidate]
+        )
+        self.assertEqual(self.search('リクルート'), [self.candidate])
+        self.assertEqual(self.search('本社'), [self.other_candidate])
+
+    def test_search_terms_in_document_and_note(self):
+        """Terms should match across the document and the note."""
+        CandidateNote.objects.create(
+            candidate=self.candidate,
+            organization=self.agency,
+            text='Prefers remote work',
+        )
+
+        self.assertEqual(self.search('yamada remote'), [self.candidate])
+        self.assertEqual(self.search('tanaka remote'), [])
+
+    def test_search_note_of_own_organization(self):
+        """Notes of other organizations should not be searched."""
+        client = f.create_client()
+        client_user = f.create_client_administrator(client)
+        CandidateNote.objects.create(
+            candidate=self.candidate, organization=self.agency, text='Agency secret',
+        )
+        CandidateNote.objects.create(
+            candidate=self.candidate, organization=client, text='Client remark',
+        )
+
+        self.assertEqual(self.search('secret'), [self.candidate])
+        self.assertEqual(self.search('remark'), [])
+
+        self.user = client_user
+        self.assertEqual(self.search('remark'), [self.candidate])
+        self.assertEqual(self.search('secret'), [])
+
+    def test_search_ranking(self):
+        """Matches in names should rank higher than in other fields."""
+        self.other_candidate.current_company = 'Yamada Corp'
+        self.other_candidate.save()
+
+        self.assertEqual(self.search('yamada'), [self.candidate, self.other_candidate])
+
+    def test_search_special_characters(self):
+        """Search terms should not be parsed as tsquery syntax."""
+        self.assertEqual(self.search("taro' & !"), [self.candidate])
+        self.assertEqual(self.search('!!!'), [self.candidate, self.other_candidate])
+
+    def test_search_misspelled_names(self):
+        """Should match misspelled romaji, kanji and katakana names."""
+        self.other_candidate.last_name_katakana = 'タナカ'
+        self.other_candidate.first_name_katakana = 'ハナコ'
+        self.other_candidate.save()
+
+        for search in ('taro yamda', 'tarou yamada', 'ﾀﾅｶﾊﾅｺ', 'たなかはなこ'):
+            self.assertEqual(len(self.search(search)), 1, search)
+
+        self.assertEqual(self.search('taro yamda'), [self.candidate])
+        self.assertEqual(self.search('たなか はなこ'), [self.other_candidate])
+        self.assertEqual(self.search('jiro suzuki'), [])
+
+    def test_search_exact_matches_first(self):
+        """Exact matches should rank higher than similar names."""
+        yamda = f.create_candidate(self.agency, first_name='Taro', last_name='Yamda')
+
+        self.assertEqual(self.search('taro yamada'), [self.candidate, yamda])
+        self.assertEqual(self.search('taro yamda'), [yamda, self.candidate])
+
+    def test_candidate_deleted(self):
+        """Deleting Candidate should remove its search document."""
+        ExperienceDetail.objects.create(candidate=self.candidate, company='Initech')
+        self.candidate.delete()
+
+        self.assertFalse(
+            CandidateSearchDocument.objects.filter(
+                candidate_id=self.candidate.pk
+            ).exists()
+        )
@@ -1,5 +1,7 @@
 """Tests related to models of the core Django app."""
 import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.case import skip
 import uuid
 from enum import Enum
@@ -7,13 +9,18 @@ from unittest.mock import patch, PropertyMock
 
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import transaction
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
 from django.db.models.query import QuerySet
 from django.db.utils import DataError, IntegrityError
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.exceptions import ValidationError
+from djmoney.contrib.exchange.models import ExchangeBackend, Rate as CurrencyRate
+from djmoney.money import Money
 
+from core.annotations import annotate_job_proposal_pipeline
 from core.utils import parse_linkedin_slug
 from core import fixtures as f
 from core import factories as fa
@@ -118,6 +125,24 @@ class UserTests(TestCase):
 
         self.assertIsNone(user.profile)
 
+    def test_with_profile(self):
+        """Profile and organization should be selected with the User."""
+        agency = f.create_agency()
+        client = f.create_client()
+        users = [
+            f.create_recruiter(agency),
+            f.create_client_internal_recruiter(client),
+            f.create_user(),
+        ]
+
+        with self.assertNumQueries(3):
+            profiles = [
+                m.User.objects.with_profile().get(pk=user.pk).profile for user in users
+            ]
+            self.assertEqual(profiles[0].org, agency)
+            self.assertEqual(profiles[1].org, client)
+            self.assertIsNone(profiles[2])
+
     def test_profile_of_agency_administrator(self):
         """Profile property returns related Agency Administrator profile."""
         user = f.create_user()
@@ -3057,6 +3082,76 @@ class CandidateTests(TestCase):
                 {'linkedin_url': 'Candidate with this LinkedIn already exists.'},
             )
 
+    def test_unique_fields_single_query(self):
+        """All organization unique fields should be validated with one query"""
+        candidate = f.create_candidate(
+            self.agency,
+            zoho_id='1024',
+            secondary_email=f.generate_email(),
+            linkedin_url='https://www.linkedin.com/in/someone/',
+        )
+        candidate.original = f.create_candidate(self.agency)
+
+        with self.assertNumQueries(1):
+            errors = m.Candidate.get_unique_fields_errors([candidate])
+
+        self.assertEqual(errors, [{}])
+
+    def test_original_from_other_organization(self):
+        """Original candidate must belong to the same organization"""
+        candidate = f.create_candidate(self.agency)
+        candidate.original = f.create_candidate(f.create_agency())
+
+        with self.assertRaises(ValidationError) as e:
+            candidate.clean_fields()
+
+        self.assertEqual(list(e.exception.message_dict), ['original'])
+
+    def test_get_unique_fields_errors(self):
+        """Candidates should be validated against the db and each other"""
+        existing = f.create_candidate(self.agency, zoho_id='1')
+        email = f.generate_email()
+        candidates = [
+            m.Candidate(organization=self.agency, email=email),
+            m.Candidate(organization=self.agency, secondary_email=email),
+            m.Candidate(organization=self.agency, email=existing.email),
+            m.Candidate(organization=self.agency, zoho_id=existing.zoho_id),
+            m.Candidate(organization=f.create_agency(), email=existing.email),
+            m.Candidate(organization=self.agency, email=f.generate_email()),
+        ]
+
+        with self.assertNumQueries(1):
+            errors = m.Candidate.get_unique_fields_errors(candidates)
+
+        self.assertEqual(
+            errors,
+            [
+                {'email': 'Email already in use.'},
+                {'secondary_email': 'Email already in use.'},
+                {'email': 'Email already in use.'},
+                {'zoho_id': 'Candidate with this Zoho ID already exists.'},
+                {},
+                {},
+            ],
+        )
+
+    def test_save_update_fields_skips_sync(self):
+        """Saving fields which are not indexed should only update the row."""
+        candidate = f.create_candidate(self.agency, first_name='Test')
+
+        candidate.push_factors = 'Commute'
+        with self.assertNumQueries(1):
+            candidate.save(turn_on_clean_fields=False, update_fields=['push_factors'])
+
+        candidate.first_name = 'Renamed'
+        candidate.save(turn_on_clean_fields=False, update_fields=['first_name'])
+        self.assertTrue(
+            candidate.duplication_keys.filter(value__startswith='renamed').exists()
+        )
+        self.assertTrue(
+            candidate.fuzzy_names.filter(value__startswith='renamed').exists()
+        )
+
 
 class CandidateNoteTests(TestCase):
     """Tests related to the CandidateNote model."""
@@ -3301,6 +3396,109 @@ class NotificationTests(TestCase):
 
         self.assertEqual(n.link, job.get_absolute_url())
 
+    @patch('core.models.send_emails.delay')
+    def test_send_many(self, send_emails_mock):
+        """Should notify every recipient once and email them in one task."""
+        job = f.create_job(self.client)
+        users = [self.user, f.create_recruiter(self.agency)]
+        disabled_user = f.create_recruiter(self.agency)
+        disabled_user.notification_settings.filter(
+            notification_type_group='job_is_filled'
+        ).update(email=False)
+
+        notifications = m.Notification.send_many(
+            [*users, disabled_user, self.user, None],
+            m.NotificationTypeEnum.JOB_IS_FILLED,
+            actor=self.client,
+            target=job,
+            context_data={'hired_candidates': ''},
+        )
+
+        self.assertEqual([n.recipient for n in notifications], [*users, disabled_user])
+        for user in [*users, disabled_user]:
+            self.assertEqual(user.unread_notifications_count, 1)
+
+        send_emails_mock.assert_called_once()
+        (messages,), _ = send_emails_mock.call_args
+        self.assertEqual(
+            [message['to'] for message in messages], [[user.email] for user in users],
+        )
+        self.assertEqual(messages[0]['subject'], f'{job.title} is Filled 🎉')
+        self.assertEqual(messages[0]['html_body'], messages[1]['html_body'])
+
+    @patch('core.models.send_emails.delay')
+    def test_send_many_queries(self, send_emails_mock):
+        """Number of queries should not depend on the number of recipients."""
+        users = [f.create_recruiter(self.agency) for i in range(5)]
+        send_many = lambda recipients: m.Notification.send_many(
+            recipients,
+            m.NotificationTypeEnum.CLIENT_CREATED_CONTRACT,
+            actor=self.client,
+            action_object=self.agency,
+        )
+
+        # notification, counters creation and increment, email settings
+        with self.assertNumQueries(4):
+            send_many(users[:1])
+        with self.assertNumQueries(4):
+            send_many(users)
+
+    def create_notifications(self, recipient, count):
+        return [
+            f.create_notification(
+                recipient,
+                m.NotificationTypeEnum.CLIENT_CREATED_CONTRACT,
+                actor=self.client,
+            )
+            for i in range(count)
+        ]
+
+    def test_unread_count_query(self):
+        """Unread count should be read from the counter with one query."""
+        self.create_notifications(self.user, 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.user.unread_notifications_count, 2)
+
+    def test_mark_as_read_updates_counter(self):
+        """Marking Notifications as read should decrement recipients counters."""
+        other_user = f.create_recruiter(self.agency)
+        notifications = self.create_notifications(self.user, 3)
+        self.create_notifications(other_user, 2)
+
+        m.Notification.objects.filter(pk=notifications[0].pk).mark_as_read()
+        self.assertEqual(self.user.unread_notifications_count, 2)
+
+        # already read Notifications are not counted twice
+        self.assertEqual(m.Notification.objects.mark_as_read(), 4)
+        self.assertEqual(self.user.unread_notifications_count, 0)
+        self.assertEqual(other_user.unread_notifications_count, 0)
+
+    def test_delete_updates_counter(self):
+        """Deleting unread Notifications should decrement the counter."""
+        notifications = self.create_notifications(self.user, 3)
+
+        notifications[0].delete()
+        self.assertEqual(self.user.unread_notifications_count, 2)
+
+        m.Notification.objects.filter(pk=notifications[1].pk).mark_as_read()
+        m.Notification.objects.filter(recipient=self.user).delete()
+        self.assertEqual(self.user.unread_notifications_count, 0)
+
+    def test_reconcile_counters(self):
+        """Should fix counters drifted by bulk updates."""
+        other_user = f.create_recruiter(self.agency)
+        self.create_notifications(self.user, 3)
+        self.create_notifications(other_user, 1)
+        m.Notification.objects.filter(recipient=self.user).update(unread=False)
+        m.NotificationCounter.objects.filter(user=other_user).delete()
+
+        self.assertEqual(m.NotificationCounter.reconcile(), 2)
+
+        self.assertEqual(self.user.unread_notifications_count, 0)
+        self.assertEqual(other_user.unread_notifications_count, 1)
+        self.assertEqual(m.NotificationCounter.reconcile(), 0)
+
 
 class ProposalStatusTests(TestCase):
     """Tests related to ProposalStatus."""
@@ -3461,3 +3659,241 @@ class NoteActivityTests(TestCase):
         )
         with self.assertRaises(IntegrityError):
             note.save()
+
+
+class JobPipelineCounterTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client_obj = f.create_client()
+        self.client_admin = f.create_client_administrator(self.client_obj)
+        self.agency = f.create_agency()
+        self.recruiter = f.create_recruiter(self.agency)
+        f.create_contract(self.agency, self.client_obj)
+
+        self.job = f.create_job(self.client_obj)
+        self.job.assign_agency(self.agency)
+
+    def get_counters(self, job=None):
+        counters = {
+            type(counter.organization).__name__: {
+                field: getattr(counter, field)
+                for field in m.JobPipelineCounter.COUNT_FIELDS
+                if getattr(counter, field)
+            }
+            for counter in m.JobPipelineCounter.objects.filter(job=job or self.job)
+        }
+        return {org: counts for org, counts in counters.items() if counts}
+
+    def get_status(self, stage):
+        return m.ProposalStatus.objects.filter(stage=stage).first()
+
+    def test_counters_follow_proposals(self):
+        client_proposal = f.create_proposal(
+            self.job, f.create_candidate(self.client_obj), self.client_admin
+        )
+        agency_proposal = f.create_proposal(
+            self.job, f.create_candidate(self.agency), self.recruiter
+        )
+        self.assertEqual(
+            self.get_counters(),
+            {
+                'Client': {'proposals_count': 2, 'submissions_count': 2},
+                'Agency': {'proposals_count': 1, 'submissions_count': 1},
+            },
+        )
+
+        agency_proposal.status = self.get_status(m.ProposalStatusStage.INTERVIEWING.key)
+        agency_proposal.save()
+        client_proposal.is_rejected = True
+        client_proposal.save()
+        self.assertEqual(
+            self.get_counters(),
+            {
+                'Client': {
+                    'proposals_count': 2,
+                    'interviewing_count': 1,
+                    'rejected_count': 1,
+                },
+                'Agency': {'proposals_count': 1, 'interviewing_count': 1},
+            },
+        )
+
+        other_job = f.create_job(self.client_obj)
+        agency_proposal.moved_from_job = self.job
+        agency_proposal.job = other_job
+        agency_proposal.save()
+        self.assertEqual(
+            self.get_counters(),
+            {'Client': {'proposals_count': 1, 'rejected_count': 1}},
+        )
+        self.assertEqual(
+            self.get_counters(other_job),
+            {
+                'Client': {'proposals_count': 1, 'interviewing_count': 1},
+                'Agency': {'proposals_count': 1, 'interviewing_count': 1},
+            },
+        )
+
+        client_proposal.delete()
+        self.assertEqual(self.get_counters(), {})
+
+    def test_save_update_fields_skips_counters(self):
+        proposal = f.create_proposal(
+            self.job, f.create_candidate(self.agency), self.recruiter
+        )
+        with CaptureQueriesContext(connection) as queries:
+            proposal.save(update_fields=['current_interview'])
+
+        self.assertFalse(
+            [
+                query
+                for query in queries.captured_queries
+                if 'FOR UPDATE' in query['sql'] or 'jobpipelinecounter' in query['sql']
+            ]
+        )
+
+    def test_decline_same_candidate_proposals(self):
+        candidate = f.create_candidate(self.agency)
+        proposal = f.create_proposal(self.job, candidate, self.recruiter)
+        other_job = f.create_job(self.client_obj)
+        other_job.assign_agency(self.agency)
+        f.create_proposal(other_job, candidate, self.recruiter)
+
+        proposal.decline_same_candidate_proposals(self.recruiter)
+        self.assertEqual(
+            self.get_counters(other_job),
+            {
+                'Client': {'proposals_count': 1, 'rejected_count': 1},
+                'Agency': {'proposals_count': 1, 'rejected_count': 1},
+            },
+        )
+        self.assertEqual(
+            self.get_counters(),
+            {
+                'Client': {'proposals_count': 1, 'submissions_count': 1},
+                'Agency': {'proposals_count': 1, 'submissions_count': 1},
+            },
+        )
+
+    def test_sync_counter_created_concurrently(self):
+        """Counter created after the lock should be overwritten by sync."""
+        f.create_proposal(self.job, f.create_candidate(self.agency), self.recruiter)
+        m.JobPipelineCounter.objects.all().delete()
+        get_expected = m.JobPipelineCounter.get_expected
+
+        def create_counter_and_get_expected(job_ids):
+            # created by a Proposal change committed after the counters are locked
+            m.JobPipelineCounter.objects.create(
+                job=self.job, organization=self.agency, proposals_count=5
+            )
+            return get_expected(job_ids)
+
+        with patch.object(
+            m.JobPipelineCounter,
+            'get_expected',
+            side_effect=create_counter_and_get_expected,
+        ):
+            m.JobPipelineCounter.sync([self.job.id])
+
+        self.assertEqual(
+            self.get_counters(),
+            {
+                'Client': {'proposals_count': 1, 'submissions_count': 1},
+                'Agency': {'proposals_count': 1, 'submissions_count': 1},
+            },
+        )
+
+    def test_annotate_job_proposal_pipeline(self):
+        f.create_proposal(self.job, f.create_candidate(self.agency), self.recruiter)
+        other_job = f.create_job(self.client_obj)
+
+        jobs = annotate_job_proposal_pipeline(
+            m.Job.objects.filter(id__in=[self.job.id, other_job.id]),
+            self.recruiter.profile,
+        )
+        self.assertEqual(
+            {
+                job.id: (job.proposals_count, job.proposals_submissions_count)
+                for job in jobs
+            },
+            {self.job.id: (1, 1), other_job.id: (0, 0)},
+        )
+
+    def test_verify_command(self):
+        proposal = f.create_proposal(
+            self.job, f.create_candidate(self.agency), self.recruiter
+        )
+        m.Proposal.objects.filter(id=proposal.id).update(is_rejected=True)
+
+        with self.assertRaises(CommandError):
+            call_command('verify_job_pipeline_counters', stdout=StringIO())
+
+        stdout = StringIO()
+        call_command('verify_job_pipeline_counters', fix=True, stdout=stdout)
+        self.assertIn('2 pipeline counters differ', stdout.getvalue())
+        self.assertEqual(
+            self.get_counters(),
+            {
+                'Client': {'proposals_count': 1, 'rejected_count': 1},
+                'Agency': {'proposals_count': 1, 'rejected_count': 1},
+            },
+        )
+
+        call_command('verify_job_pipeline_counters', stdout=StringIO())
+
+
+class BaseCurrencySalaryTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.agency = f.create_agency()
+        backend = ExchangeBackend.objects.create(name='test', base_currency='JPY')
+        self.rate = CurrencyRate.objects.create(
+            currency='USD', value=Decimal('0.01'), backend=backend
+        )
+
+    def test_candidate_save(self):
+        candidate = f.create_candidate(self.agency, current_salary=Money(1000, 'USD'))
+        self.assertEqual(candidate.current_salary_base, 100000)
+
+        candidate.current_salary = Money(1000, 'JPY')
+        candidate.save()
+        candidate.refresh_from_db()
+        self.assertEqual(candidate.current_salary_base, 1000)
+
+        candidate.current_salary = None
+        candidate.save()
+        candidate.refresh_from_db()
+        self.assertIsNone(candidate.current_salary_base)
+
+    def test_candidate_save_update_fields(self):
+        candidate = f.create_candidate(self.agency, current_salary=Money(1000, 'USD'))
+
+        candidate.current_salary = Money(2000, 'USD')
+        candidate.save(update_fields=['current_salary'])
+        candidate.refresh_from_db()
+        self.assertEqual(candidate.current_salary_base, 200000)
+
+        candidate.current_salary_currency = 'JPY'
+        candidate.save(update_fields=['current_salary_currency'])
+        candidate.refresh_from_db()
+        self.assertEqual(candidate.current_salary_base, 2000)
+
+    def test_update_base_salaries(self):
+        """Base salaries should follow updated exchange rates."""
+        candidate = f.create_candidate(self.agency, current_salary=Money(1000, 'USD'))
+        job = f.create_job(self.agency)
+        user = f.create_agency_administrator(self.agency)
+        placement = f.create_placement(
+            f.create_proposal(job, candidate, user), offered_salary=Money(2000, 'USD'),
+        )
+        self.assertEqual(placement.offered_salary_base, 200000)
+
+        self.rate.value = Decimal('0.02')
+        self.rate.save()
+        m.Candidate.update_base_salaries()
+        m.Placement.update_base_salaries()
+
+        candidate.refresh_from_db()
+        placement.refresh_from_db()
+        self.assertEqual(candidate.current_salary_base, 50000)
+        self.assertEqual(placement.offered_salary_base, 100000)
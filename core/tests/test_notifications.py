@@ -1,13 +1,13 @@
 from unittest.mock import patch, call, MagicMock
 from unittest import skip
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.timezone import datetime, utc
 
 from core import fixtures as f
 from core import models as m
-from core.constants import NotificationLinkText
+from core.constants import NotificationLinkText, QuickActionVerb
 from core.factories import ClientFactory, UserFactory
 from core.notifications import (
     notify_candidate_proposed_for_job,
@@ -28,6 +28,9 @@ from core.notifications import (
     notify_fee_pending,
     get_interview_notification_email_context,
     notify_agency_assigned_job_member,
+    MAX_PROPOSAL_EVENT_ATTEMPTS,
+    dispatch_proposal_event,
+    process_proposal_events,
 )
 from core.utils import compare_model_dicts, poly_relation_filter
 
@@ -85,6 +88,16 @@ class MockCallsMixin:
         self.assertEqual(len(calls), mock.call_count)
         mock.assert_has_calls(calls, any_order=True)
 
+    def assert_has_only_send_many_calls(self, mock, calls):
+        """Compare Notification.send_many calls with recipients as lists."""
+        self.assertCountEqual(
+            [
+                call(list(recipients), *args, **kwargs)
+                for (recipients, *args), kwargs in mock.call_args_list
+            ],
+            calls,
+        )
+
 
 class NotificationsTestCase(TestCase, MockCallsMixin):
     def setUp(self):
@@ -1143,17 +1156,17 @@ class TestNotifyProposalInterviewConfirmed(TestCase, MockCallsMixin):
         }
 
     def assert_staff_notified(self, send_notification_mock):
-        self.assert_has_only_calls(
+        self.assert_has_only_send_many_calls(
             send_notification_mock,
             [
                 call(
-                    self.recruiter,
+                    [self.recruiter],
                     m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CONFIRMED_PROPOSER,
                     **self.expected_send_notification_kwargs,
                     email_attachments=None,
                 ),
                 call(
-                    self.interview.interviewer,
+                    [self.interview.interviewer],
                     m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CONFIRMED_INTERVIEWER,
                     **self.expected_send_notification_kwargs,
                     email_attachments=[self.interview.ics_attachment],
@@ -1162,7 +1175,7 @@ class TestNotifyProposalInterviewConfirmed(TestCase, MockCallsMixin):
         )
 
     @patch('core.notifications.send_email')
-    @patch('core.models.Notification.send')
+    @patch('core.models.Notification.send_many')
     def test_proposed_interview(self, send_notification_mock, send_email_mock):
         notify_proposal_interview_confirmed(None, self.interview)
 
@@ -1186,7 +1199,7 @@ class TestNotifyProposalInterviewConfirmed(TestCase, MockCallsMixin):
         )
 
     @patch('core.notifications.send_email')
-    @patch('core.models.Notification.send')
+    @patch('core.models.Notification.send_many')
     def test_simple_schedule(self, send_notification_mock, send_email_mock):
         self.interview.scheduling_type = (
             m.ProposalInterviewSchedule.SchedulingType.SIMPLE_SCHEDULING
@@ -1228,18 +1241,18 @@ class TestNotifyProposalInterviewCanceled(TestCase, MockCallsMixin):
         }
 
     def assert_staff_notified(self, send_notification_mock):
-        self.assert_has_only_calls(
+        self.assert_has_only_send_many_calls(
             send_notification_mock,
             [
                 call(
-                    self.recruiter,
+                    [self.recruiter],
                     m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CANCELED,
                     **self.expected_send_notification_kwargs,
                     send_via_email=False,
                     email_attachments=None,
                 ),
                 call(
-                    self.interview.interviewer,
+                    [self.interview.interviewer],
                     m.NotificationTypeEnum.INTERVIEW_PROPOSAL_CANCELED,
                     **self.expected_send_notification_kwargs,
                     send_via_email=True,
@@ -1249,7 +1262,7 @@ class TestNotifyProposalInterviewCanceled(TestCase, MockCallsMixin):
         )
 
     @patch('core.notifications.send_email')
-    @patch('core.models.Notification.send')
+    @patch('core.models.Notification.send_many')
     def test_proposed_interview(self, send_notification_mock, send_email_mock):
         notify_proposal_interview_canceled(None, self.interview)
 
@@ -1273,7 +1286,7 @@ class TestNotifyProposalInterviewCanceled(TestCase, MockCallsMixin):
         )
 
     @patch('core.notifications.send_email')
-    @patch('core.models.Notification.send')
+    @patch('core.models.Notification.send_many')
     def test_simple_schedule(self, send_notification_mock, send_email_mock):
         self.interview.scheduling_type = (
             m.ProposalInterviewSchedule.SchedulingType.SIMPLE_SCHEDULING
@@ -1284,3 +1297,119 @@ class TestNotifyProposalInterviewCanceled(TestCase, MockCallsMixin):
         self.assert_staff_notified(send_notification_mock)
 
         self.assertEqual(0, send_email_mock.call_count)
+
+
+class ProposalNotificationEventTests(TestCase):
+    def setUp(self):
+        client = ClientFactory.create()
+        self.sender = client.primary_contact
+        client.assign_administrator(self.sender)
+
+        self.recruiter = UserFactory.create()
+        client.assign_internal_recruiter(self.recruiter)
+
+        self.proposal = f.create_proposal_with_candidate(
+            job=f.create_job(client), created_by=self.recruiter
+        )
+        self.proposal.job.recruiters.add(self.recruiter)
+
+    def get_notifications(self):
+        return m.Notification.objects.filter(
+            recipient=self.recruiter,
+            verb=m.NotificationTypeEnum.PROPOSAL_IS_REJECTED.name.lower(),
+        )
+
+    def test_dispatch_sync(self):
+        """Events should be processed at once if dispatch is synchronous."""
+        dispatch_proposal_event(
+            'proposal_is_rejected', self.proposal, self.sender, change_id=1
+        )
+
+        self.assertEqual(self.get_notifications().count(), 1)
+        self.assertFalse(
+            m.ProposalNotificationEvent.objects.filter(
+                processed_at__isnull=True
+            ).exists()
+        )
+
+    def test_idempotency_key(self):
+        """Event of already queued change should be ignored."""
+        for i in range(2):
+            dispatch_proposal_event(
+                'proposal_is_rejected', self.proposal, self.sender, change_id=1
+            )
+
+        self.assertEqual(m.ProposalNotificationEvent.objects.count(), 1)
+        self.assertEqual(self.get_notifications().count(), 1)
+
+    def test_reject_action_retried(self):
+        """Retried reject action should not queue the event again."""
+        for i in range(2):
+            proposal = m.Proposal.objects.get(id=self.proposal.id)
+            proposal.do_action(QuickActionVerb.REJECT.key, self.sender)
+
+        self.assertEqual(self.get_notifications().count(), 1)
+
+    @override_settings(NOTIFICATION_EVENTS_ASYNC=True)
+    @patch('core.notifications.transaction.on_commit')
+    def test_dispatch_async(self, on_commit_mock):
+        """Events should be processed in order by a task after commit."""
+        handled = []
+        handlers = {
+            'first': lambda sender, proposal, **data: handled.append(('first', data)),
+            'second': lambda sender, proposal, **data: handled.append(('second', data)),
+        }
+
+        with patch.dict('core.notifications.PROPOSAL_EVENT_HANDLERS', handlers):
+            dispatch_proposal_event(
+                'first', self.proposal, self.sender, change_id=1, value=1
+            )
+            dispatch_proposal_event(
+                'second', self.proposal, self.sender, change_id=1, value=2
+            )
+
+            self.assertEqual(handled, [])
+            self.assertEqual(on_commit_mock.call_count, 2)
+
+            for (callback,), _ in on_commit_mock.call_args_list:
+                callback()
+
+        self.assertEqual(handled, [('first', {'value': 1}), ('second', {'value': 2})])
+
+    def test_failed_event(self):
+        """Failed event should stay pending with the next ones, to keep order."""
+        handlers = {'failing': MagicMock(side_effect=ValueError('failed'))}
+
+        with patch.dict('core.notifications.PROPOSAL_EVENT_HANDLERS', handlers):
+            failing = m.ProposalNotificationEvent.objects.create(
+                idempotency_key='failing', proposal=self.proposal, verb='failing'
+            )
+            rejected = m.ProposalNotificationEvent.objects.create(
+                idempotency_key='rejected',
+                proposal=self.proposal,
+                sender=self.sender,
+                verb='proposal_is_rejected',
+            )
+
+            with self.assertLogs('core.notifications', 'ERROR'):
+                self.assertEqual(process_proposal_events(self.proposal.id), 0)
+
+            self.assertEqual(self.get_notifications().count(), 0)
+            rejected.refresh_from_db()
+            self.assertIsNone(rejected.processed_at)
+            failing.refresh_from_db()
+            self.assertIsNone(failing.processed_at)
+            self.assertEqual(failing.attempts, 1)
+            self.assertEqual(failing.error, "ValueError('failed')")
+
+            with self.assertLogs('core.notifications', 'ERROR'):
+                for i in range(MAX_PROPOSAL_EVENT_ATTEMPTS - 2):
+                    self.assertEqual(process_proposal_events(self.proposal.id), 0)
+
+                # dropped after the last attempt, the next one is sent
+                self.assertEqual(process_proposal_events(self.proposal.id), 2)
+
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, MAX_PROPOSAL_EVENT_ATTEMPTS)
+        self.assertIsNotNone(failing.processed_at)
+        self.assertEqual(self.get_notifications().count(), 1)
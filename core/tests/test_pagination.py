@@ -0,0 +1,217 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core import fixtures as f
+from core import models as m
+from core.pagination import get_keyset_condition, order_by_keyset
+
+
+class CursorPaginationTests(APITestCase):
+    """Tests related to the opt-in cursor pagination."""
+
+    def setUp(self):
+        super().setUp()
+        self.client_obj = f.create_client()
+        self.user = f.create_client_administrator(self.client_obj)
+        self.client.force_login(self.user)
+
+    def get_all_pages(self, url, params, limit=2):
+        ids = []
+        response = self.client.get(url, {**params, 'cursor': '', 'limit': limit})
+        while True:
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertLessEqual(len(response.data['results']), limit)
+            ids.extend(item['id'] for item in response.data['results'])
+
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_notifications(self):
+        """Pages should follow each other in order, including equal timestamps."""
+        notifications = [
+            f.create_notification(
+                self.user, m.NotificationTypeEnum.JOB_IS_FILLED, actor=self.user
+            )
+            for _ in range(5)
+        ]
+        timestamp = timezone.now()
+        m.Notification.objects.filter(
+            id__in=[notification.id for notification in notifications[:3]]
+        ).update(timestamp=timestamp)
+
+        expected = list(
+            m.Notification.objects.filter(recipient=self.user)
+            .order_by('-timestamp', 'id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(self.get_all_pages(reverse('notification-list'), {}), expected)
+
+    def test_offset_pagination_by_default(self):
+        """Response without the cursor parameter should not change."""
+        f.create_notification(
+            self.user, m.NotificationTypeEnum.JOB_IS_FILLED, actor=self.user
+        )
+
+        response = self.client.get(reverse('notification-list'))
+
+        self.assertEqual(list(response.data), ['count', 'next', 'previous', 'results'])
+        self.assertEqual(response.data['count'], 1)
+
+    def test_approximate_count(self):
+        """Total should be returned only if requested."""
+        f.create_notification(
+            self.user, m.NotificationTypeEnum.JOB_IS_FILLED, actor=self.user
+        )
+        url = reverse('notification-list')
+
+        response = self.client.get(url, {'cursor': ''})
+        self.assertIsNone(response.data['count'])
+
+        response = self.client.get(url, {'cursor': '', 'count': 'approximate'})
+        self.assertIsInstance(response.data['count'], int)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('notification-list'), {'cursor': 'abc'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_of_other_ordering(self):
+        """Cursor should not be used with a different ordering."""
+        for _ in range(3):
+            f.create_notification(
+                self.user, m.NotificationTypeEnum.JOB_IS_FILLED, actor=self.user
+            )
+        url = reverse('notification-list')
+
+        response = self.client.get(url, {'cursor': '', 'limit': 1})
+        response = self.client.get(
+            response.data['next'].replace('cursor=', 'ordering=verb&cursor=')
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_proposals(self):
+        """Proposals should be paginated in the group and activity order."""
+        job = f.create_job(self.client_obj)
+        for group in ('interviewing', 'offer', 'interviewing', 'associated', 'offer'):
+            proposal = f.create_proposal_with_candidate(job, self.user)
+            f.create_proposal_status_history(proposal, group)
+            proposal.status = f.get_or_create_proposal_status(group)
+            proposal.save()
+        f.create_proposal_with_candidate(job, self.user)
+
+        url = reverse('proposal-list')
+        response = self.client.get(url, {'job': job.id})
+        expected = [item['id'] for item in response.data['results']]
+
+        self.assertEqual(len(expected), 6)
+        self.assertEqual(self.get_all_pages(url, {'job': job.id}), expected)
+
+    def test_equal_search_ranks(self):
+        """Pages of equally ranked search results should follow each other."""
+        candidates = [
+            f.create_candidate(self.client_obj, current_company='Initech')
+            for _ in range(5)
+        ]
+
+        self.assertEqual(
+            self.get_all_pages(reverse('candidate-list'), {'search': 'initech'}),
+            [candidate.id for candidate in candidates],
+        )
+
+    def test_candidate_comments(self):
+        """Merged comments should be paginated without gaps or repetitions."""
+        job = f.create_job(self.client_obj)
+        candidate = f.create_candidate(self.client_obj)
+        proposal = f.create_proposal(job, candidate, self.user)
+
+        created_at = timezone.now()
+        for i in range(3):
+            comment = m.CandidateComment.objects.create(
+                author=self.user, candidate=candidate, text='Comment', public=True
+            )
+            proposal_comment = f.create_proposal_comment(self.user, proposal)
+            for model, obj in (
+                (m.CandidateComment, comment),
+                (m.ProposalComment, proposal_comment),
+            ):
+                model.objects.filter(id=obj.id).update(
+                    created_at=created_at - timedelta(minutes=i % 2)
+                )
+
+        url = reverse('candidatecomment-list')
+        expected = self.client.get(url, {'candidate': candidate.id}).data['results']
+
+        results = []
+        response = self.client.get(
+            url, {'candidate': candidate.id, 'cursor': '', 'limit': 4}
+        )
+        while True:
+            results.extend(response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(results), len(expected))
+        self.assertEqual(
+            {(item['type'], item['id']) for item in results},
+            {(item['type'], item['id']) for item in expected},
+        )
+
+
+class KeysetConditionTests(APITestCase):
+    """Tests related to the filter of rows following the cursor position."""
+
+    def setUp(self):
+        super().setUp()
+        agency = f.create_agency()
+        self.candidates = [
+            f.create_candidate(agency, current_salary=salary)
+            for salary in (None, 100, 100, None, 200)
+        ]
+
+    def get_following_ids(self, ordering, position, constants=None):
+        condition = get_keyset_condition(ordering, position, constants)
+        if condition is None:
+            return []
+
+        queryset = order_by_keyset(m.Candidate.objects.all(), ordering, constants)
+        return list(queryset.filter(condition).values_list('id', flat=True))
+
+    def test_nulls_last(self):
+        ordering = [('current_salary', False, False), ('pk', False, False)]
+        ids = [candidate.id for candidate in self.candidates]
+
+        self.assertEqual(
+            self.get_following_ids(ordering, [100, ids[1]]),
+            [ids[2], ids[4], ids[0], ids[3]],
+        )
+        self.assertEqual(self.get_following_ids(ordering, [None, ids[0]]), [ids[3]])
+
+    def test_nulls_first(self):
+        ordering = [('current_salary', True, True), ('pk', False, False)]
+        ids = [candidate.id for candidate in self.candidates]
+
+        self.assertEqual(
+            self.get_following_ids(ordering, [None, ids[3]]), [ids[4], ids[1], ids[2]],
+        )
+
+    def test_constants(self):
+        """Constant fields should include or skip rows with equal values."""
+        ordering = [
+            ('current_salary', False, False),
+            ('type', False, False),
+            ('pk', False, False),
+        ]
+        ids = [candidate.id for candidate in self.candidates]
+
+        self.assertEqual(
+            self.get_following_ids(ordering, [100, 'A', 0], {'type': 'B'}),
+            [ids[1], ids[2], ids[4], ids[0], ids[3]],
+        )
+        self.assertEqual(
+            self.get_following_ids(ordering, [100, 'C', 0], {'type': 'B'}),
+            [ids[4], ids[0], ids[3]],
+        )
@@ -1,10 +1,12 @@
 import time
 
 from django.conf import settings
+from django.contrib.auth import authenticate
 from django.urls.base import reverse
 from rest_framework.test import APITestCase
 
 from core import factories as fa
+from core.authentication import ProfileModelBackend
 
 
 class SessionTests(APITestCase):
@@ -71,3 +73,22 @@ class SessionTests(APITestCase):
         response4 = self.client.get(reverse('job-list'))
         self.assertEqual(response4.status_code, 200)
         self.assertNotEqual(response4.cookies['sessionid']['expires'], expire_time)
+
+    def test_session_user_profile_is_selected(self):
+        ca = fa.ClientAdministratorFactory()
+
+        with self.assertNumQueries(1):
+            user = ProfileModelBackend().get_user(ca.user.pk)
+            self.assertEqual(user.profile, ca)
+            self.assertEqual(user.profile.org, ca.client)
+
+    def test_session_user_inactive(self):
+        user = fa.UserFactory(is_active=False)
+
+        self.assertIsNone(ProfileModelBackend().get_user(user.pk))
+
+    def test_failed_login_authenticates_once(self):
+        user = fa.UserFactory(password='thisistestingpassword!')
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(authenticate(email=user.email, password='wrong'))
@@ -14,6 +14,7 @@ from core.converter import PDFConverter
 from core.tasks import (
     remove_unactivated_accounts,
     convert_resume,
+    convert_resume_field,
     convert_job_file,
     create_candidate_file_preview_and_thumbnail,
     set_pending_feedback_status,
@@ -152,6 +153,62 @@ class RemoveUnactivatedAccountsTaskTestCase(TestCase):
 
         convert.assert_called_once_with(c.resume)
 
+    @patch('core.tasks.PDFConverter.convert')
+    @override_settings(MEDIA_ROOT=tempfile.gettempdir())
+    def test_convert_resume_fields(self, convert):
+        """Every resume file should be converted by its own task."""
+        convert.side_effect = lambda file: (
+            File(open(dummy_pdf_path, 'rb')),
+            f'{dummy_pdf_name}.pdf',
+            'pdf',
+        )
+
+        c = f.create_candidate(f.create_agency())
+        c.resume.save('resume.docx', File(open(dummy_pdf_path, 'rb')))
+        c.cv_ja.save('cv_ja.docx', File(open(dummy_pdf_path, 'rb')))
+
+        with patch('core.tasks.create_resume_thumbnail.delay') as delay:
+            convert_resume(c.pk)
+
+        self.assertEqual(convert.call_count, 2)
+        self.assertEqual(
+            {call.args[2] for call in delay.call_args_list}, {'resume', 'cv_ja'}
+        )
+        c.refresh_from_db()
+        self.assertTrue(c.resume.name.endswith('.pdf'))
+        self.assertTrue(c.cv_ja.name.endswith('.pdf'))
+
+    @patch('core.tasks.PDFConverter.convert')
+    @override_settings(MEDIA_ROOT=tempfile.gettempdir())
+    def test_convert_resume_replaced_during_conversion(self, convert):
+        """Converted file should be discarded if the file was replaced."""
+        c = f.create_candidate(f.create_agency())
+        c.resume.save('resume.docx', File(open(dummy_pdf_path, 'rb')))
+
+        def replace_resume(file):
+            m.Candidate.objects.filter(pk=c.pk).update(resume='replaced.docx')
+            return File(open(dummy_pdf_path, 'rb')), 'resume.pdf', 'pdf'
+
+        convert.side_effect = replace_resume
+
+        with patch('core.tasks.create_resume_thumbnail.delay') as delay:
+            convert_resume_field(c.pk, 'resume', 'resume_thumbnail', c.resume.name)
+
+        delay.assert_not_called()
+        c.refresh_from_db()
+        self.assertEqual(c.resume.name, 'replaced.docx')
+
+    @patch('core.tasks.PDFConverter.convert')
+    @override_settings(MEDIA_ROOT=tempfile.gettempdir())
+    def test_convert_replaced_resume_field(self, convert):
+        """Task queued for a replaced file should do nothing."""
+        c = f.create_candidate(f.create_agency())
+        c.resume.save(dummy_pdf_name, File(open(dummy_pdf_path, 'rb')))
+
+        convert_resume_field(c.pk, 'resume', 'resume_thumbnail', 'old.docx')
+
+        convert.assert_not_called()
+
     @staticmethod
     def get_dummy_file(filename):
         return File(open(dummy_pdf_path, 'rb'))
@@ -1,9 +1,10 @@
+import tempfile
 from collections import OrderedDict
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db.models import QuerySet
 from django.db.models.fields.files import FieldFile
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
 from unittest.mock import patch
 
 from ..models import User
@@ -17,10 +18,12 @@ from core.utils import (
     send_email,
     parse_linkedin_slug,
     format_serializer_as_response,
+    get_candidate_fuzzy_names,
     pick,
 )
 from core.utils.file import get_filename_from_path
 from core.utils.view import create_file_download_response
+from core import fixtures as f
 from core.fixtures import get_jpeg_image_content
 
 
@@ -275,6 +278,33 @@ class UtilParseLinkedinSlugTestCase(TestCase):
         self.assertEqual(self.parse_linkedin_slug('https://www.linkedin.com/'), None)
 
 
+class GetCandidateFuzzyNamesTestCase(TestCase):
+    def test_names(self):
+        """Names should be normalized for every key type."""
+        self.assertEqual(
+            get_candidate_fuzzy_names(
+                {
+                    'first_name': ' Taro ',
+                    'last_name': 'YAMADA',
+                    'first_name_kanji': '太郎',
+                    'last_name_kanji': '山田 ',
+                    'first_name_katakana': 'ﾀﾛｳ',
+                    'last_name_katakana': 'ヤマダ',
+                }
+            ),
+            {'name': 'taro yamada', 'name_kanji': '山田太郎', 'name_katakana': 'やまだたろう',},
+        )
+
+    def test_empty_names(self):
+        """Key types without names should be skipped."""
+        self.assertEqual(
+            get_candidate_fuzzy_names(
+                {'first_name': '', 'last_name': 'Yamada', 'last_name_kanji': None}
+            ),
+            {'name': 'yamada'},
+        )
+
+
 class LinkedInProfileTestCase(UtilParseLinkedinSlugTestCase):
     @staticmethod
     def parse_linkedin_slug(url):
@@ -430,3 +460,77 @@ class TestGetFilenameFromPath(TestCase):
     def test_plain_path(self):
 
         self.assertEqual(get_filename_from_path('filename.txt'), 'filename.txt')
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir())
+class CreateFileDownloadResponseTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.candidate = f.create_candidate(f.create_agency())
+        self.candidate.photo = SimpleUploadedFile('file.txt', b'0123456789')
+        self.candidate.save()
+        self.factory = RequestFactory()
+
+    def get_response(self, redirect=False, **headers):
+        return create_file_download_response(
+            self.candidate.photo, self.factory.get('/', **headers), redirect=redirect
+        )
+
+    def test_whole_file(self):
+        response = self.get_response()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(
+            response['Content-Disposition'].startswith('inline; filename="')
+        )
+
+    def test_range(self):
+        response = self.get_response(HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_suffix_range(self):
+        response = self.get_response(HTTP_RANGE='bytes=-3')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+    def test_unsatisfiable_range(self):
+        response = self.get_response(HTTP_RANGE='bytes=20-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_no_file(self):
+        self.candidate.photo = None
+
+        self.assertEqual(self.get_response().status_code, 404)
+
+    def test_redirect(self):
+        storage_class = type(self.candidate.photo.storage)
+        with patch.object(
+            storage_class,
+            'get_download_url',
+            create=True,
+            return_value='https://storage/file.txt?signature',
+        ) as get_download_url:
+            response = self.get_response(redirect=True)
+            not_redirected = self.get_response()
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], 'https://storage/file.txt?signature')
+        get_download_url.assert_called_once()
+        self.assertEqual(not_redirected.status_code, 200)
+
+    def test_redirect_not_supported(self):
+        """Files of storages without presigned URLs should be streamed."""
+        response = self.get_response(redirect=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
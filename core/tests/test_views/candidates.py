@@ -1,5 +1,7 @@
 from datetime import date
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from djangorestframework_camel_case.util import camelize, underscoreize
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
@@ -28,6 +30,45 @@ class CandidateTests(APITestCase):
         self.client.force_login(self.user)
         self.maxDiff = None
 
+    def create_listed_candidate(self, user, job):
+        candidate = f.create_candidate(
+            self.client_org, created_by=user, updated_by=user, owner=user
+        )
+        candidate.languages.add(
+            m.Language.objects.get_or_create(language='en', level=1)[0]
+        )
+        candidate.set_note(self.client_org, 'Note')
+        f.create_proposal(job, candidate, user)
+        tag = m.Tag.objects.create(
+            name=f'Tag {candidate.id}', organization=self.client_org
+        )
+        m.CandidateTag.objects.create(candidate=candidate, tag=tag)
+
+    def test_list_candidates_number_of_queries(self):
+        """Number of queries should not depend on the number of Candidates."""
+        user = f.create_client_administrator(self.client_org)
+        self.client.force_login(user)
+        job = f.create_job(self.client_org)
+        url = reverse('candidate-list')
+
+        numbers_of_queries = []
+        for _ in range(2):
+            for _ in range(3):
+                self.create_listed_candidate(user, job)
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, {'check_proposed_to': job.id})
+
+            self.assertEqual(response.status_code, 200)
+            numbers_of_queries.append(len(context.captured_queries))
+
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(numbers_of_queries[0], numbers_of_queries[1])
+        for candidate in response.data['results']:
+            self.assertTrue(candidate['proposed'])
+            self.assertEqual(candidate['note'], 'Note')
+            self.assertEqual(len(candidate['tags']), 1)
+
     def test_get_candidates_with_placement_approved_at(self):
         user = f.create_agency_administrator(self.agency)
         self.client.force_login(user)
@@ -209,6 +250,122 @@ class CandidateTests(APITestCase):
         self.assertEqual(candidate.archived, False)
         self.assertEqual(response.json(), {'detail': 'Candidate is not archived.'})
 
+    def test_check_duplication_batch(self):
+        """Should return duplication check results for every candidate"""
+        duplicate = f.create_candidate(self.agency, email='duplicate@localhost')
+
+        url = reverse('candidate-check-duplication-batch')
+        response = self.client.post(
+            url,
+            {
+                'candidates': [
+                    {'first_name': 'New', 'last_name': 'One', 'email': 'new@localhost'},
+                    {'email': 'Duplicate@localhost'},
+                ]
+            },
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            underscoreize(response.json()),
+            {
+                'results': [
+                    {
+                        'submitted_by_others': None,
+                        'last_submitted': None,
+                        'duplicates': [],
+                        'to_restore': [],
+                        'possible_duplicates': [],
+                    },
+                    {
+                        'submitted_by_others': None,
+                        'last_submitted': None,
+                        'duplicates': [
+                            {
+                                'id': duplicate.id,
+                                'first_name': duplicate.first_name,
+                                'last_name': duplicate.last_name,
+                                'email': duplicate.email,
+                                'linkedin_url': '',
+                                'is_absolute': True,
+                                'is_submitted': False,
+                            }
+                        ],
+                        'to_restore': [],
+                        'possible_duplicates': [],
+                    },
+                ]
+            },
+        )
+
+    def test_check_duplication_batch_possible_duplicates(self):
+        """Should return Candidates with similar names"""
+        candidate = f.create_candidate(
+            self.agency, first_name='Jane', last_name='Smith'
+        )
+
+        url = reverse('candidate-check-duplication-batch')
+        response = self.client.post(
+            url,
+            {
+                'candidates': [
+                    {'first_name': 'Jayne', 'last_name': 'Smith', 'email': ''}
+                ]
+            },
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        [possible_duplicate] = response.json()['results'][0]['possibleDuplicates']
+        self.assertEqual(possible_duplicate['id'], candidate.id)
+        self.assertGreaterEqual(possible_duplicate['similarity'], 0.5)
+
+    def test_check_duplication_batch_jobs(self):
+        """Should check all Jobs at once and reject Jobs of other organizations"""
+        job = f.create_job(self.agency, owner=self.user)
+        other_job = f.create_job(f.create_client())
+
+        url = reverse('candidate-check-duplication-batch')
+
+        numbers_of_queries = []
+        for count in (1, 10):
+            candidates = [
+                {'email': f'candidate{i}@localhost', 'job': job.id}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    url, {'candidates': candidates}, format='json'
+                )
+
+            self.assertEqual(response.status_code, 200)
+            numbers_of_queries.append(len(context.captured_queries))
+
+        self.assertEqual(numbers_of_queries[0], numbers_of_queries[1])
+
+        response = self.client.post(
+            url,
+            {
+                'candidates': [
+                    {'email': 'new@localhost', 'job': job.id},
+                    {'email': 'other@localhost', 'job': other_job.id},
+                ]
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {
+                'candidates': {
+                    '1': {
+                        'job': [f'Invalid pk "{other_job.id}" - object does not exist.']
+                    }
+                }
+            },
+        )
+
     def test_get_candidates_wuth_superuser(self):
         """Should return 403 once Admin request candidates"""
         admin = f.create_admin()
@@ -352,6 +509,22 @@ class ClientCandidateTests(APITestCase):
             [dict(item) for item in camelize(candidates_json)],
         )
 
+    def test_list_search_name_similarity(self):
+        """Searched Candidates should have similarity of their names."""
+        candidate = ClientCandidateFactory.create(
+            client=self.client_org, first_name='Taro', last_name='Yamada'
+        )
+
+        response = self.client.get(reverse('candidate-list'), {'search': 'taro yamda'})
+
+        self.assertEqual(response.status_code, 200)
+        [candidate_data] = response.data['results']
+        self.assertEqual(candidate_data['id'], candidate.id)
+        self.assertGreater(candidate_data['name_similarity'], 0)
+
+        response = self.client.get(reverse('candidate-list'))
+        self.assertNotIn('name_similarity', response.data['results'][0])
+
     def test_retrieve_archived(self):
         """Should return archived candidate"""
 
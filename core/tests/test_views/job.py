@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from djangorestframework_camel_case.util import camelize
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
@@ -79,6 +81,39 @@ class JobTests(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['results'], [])
 
+    def test_get_jobs_checked_flags_number_of_queries(self):
+        """Number of queries should not depend on the number of Jobs."""
+        manager = f.create_hiring_manager(self.client_obj, email='manager@test.com')
+        candidate = f.create_candidate(self.client_obj)
+        url = reverse('job-list')
+        params = {
+            'check_candidate_proposed': candidate.id,
+            'check_user_has_access': manager.id,
+        }
+
+        expected = {}
+        numbers_of_queries = []
+        for _ in range(2):
+            for i in range(4):
+                job = f.create_job(org=self.client_obj)
+                if i % 2:
+                    job.assign_manager(manager)
+                    f.create_proposal(job, candidate, self.user)
+                expected[job.id] = bool(i % 2)
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, params)
+
+            self.assertEqual(response.status_code, 200)
+            numbers_of_queries.append(len(context.captured_queries))
+
+        self.assertEqual(numbers_of_queries[0], numbers_of_queries[1])
+        results = response.json()['results']
+        self.assertEqual(len(results), 8)
+        for job in results:
+            self.assertEqual(job['candidateProposed'], expected[job['id']])
+            self.assertEqual(job['userHasAccess'], expected[job['id']])
+
     def test_get_job(self):
         """Should return Job details."""
         job = f.create_job(org=self.client_obj)
@@ -7,7 +7,9 @@ from django.contrib.auth import get_user_model
 from django.core import mail
 from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from djangorestframework_camel_case.util import camelize, underscoreize
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
@@ -16,6 +18,7 @@ from rest_framework.serializers import FileField
 from core import fixtures as f
 from core import models as m
 from core import serializers as s
+from core.analytics_cache import get_cache as get_analytics_cache
 from core.converter import PDFConverter
 from core.views.user_activate_account import get_activation_token
 from core.views.user_activate_account import get_user_from_activation_token
@@ -892,7 +895,7 @@ class JobFileTests(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content, b'contents')
+        self.assertEqual(b''.join(response.streaming_content), b'contents')
         self.assertTrue(
             response.get('Content-Disposition').startswith('inline; filename="')
         )
@@ -1151,7 +1154,7 @@ class CandidateFileTests(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content, b'contents')
+        self.assertEqual(b''.join(response.streaming_content), b'contents')
         self.assertTrue(
             response.get('Content-Disposition').startswith('inline; filename="')
         )
@@ -1488,6 +1491,29 @@ class NotificationsTests(APITestCase):
         self.assertEqual(response.json(), {})
         self.assertFalse(notification.unread)
 
+    def test_update_unread(self):
+        """Should change the unread count only when the flag is flipped."""
+        notification = f.create_notification(
+            self.user,
+            verb=m.NotificationTypeEnum.CLIENT_CREATED_CONTRACT,
+            actor=self.client_obj,
+        )
+        url = reverse('notification-detail', kwargs={'pk': notification.pk})
+
+        for unread, unread_count in ((False, 0), (False, 0), (True, 1), (True, 1)):
+            response = self.client.patch(url, {'unread': unread}, format='json')
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['unread'], unread)
+            self.assertEqual(self.user.unread_notifications_count, unread_count)
+
+        # already marked as read by another request
+        m.Notification.objects.filter(pk=notification.pk).mark_as_read()
+        response = self.client.patch(url, {'unread': False}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user.unread_notifications_count, 0)
+
     def test_mark_as_read_without_notification(self):
         """Should mark User notification as read."""
         url = reverse('notification-mark-as-read', kwargs={'pk': f.NOT_EXISTING_PK})
@@ -1943,6 +1969,7 @@ class CandidateLinkedinDataViewSetTests(APITestCase):
 
 class DashboardViewSetTests(APITestCase):
     def setUp(self):
+        get_analytics_cache().clear()
         self.client_obj = f.create_client()
         self.client_admin = f.create_client_administrator(self.client_obj)
         self.client.force_login(self.client_admin)
@@ -1966,6 +1993,60 @@ class DashboardViewSetTests(APITestCase):
         self.assertEqual(required_keys, set(response.data))
         self.assertTrue(None not in response.data.values())
 
+    def get_statistics(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('dashboard-get-statistics'))
+
+        self.assertEqual(response.status_code, 200)
+        proposal_queries = [
+            query
+            for query in context.captured_queries
+            if 'core_proposal' in query['sql']
+        ]
+        return response.data, len(proposal_queries)
+
+    def get_status(self, group):
+        status = f.create_proposal_status(group)
+        status.stage = m.ProposalStatusStage.OFFERING.key
+        status.save()
+        return status
+
+    def test_dashboard_statistics_cached(self):
+        job = f.create_job(self.client_obj, published=True)
+        proposals = [
+            f.create_proposal_with_candidate(job, self.client_admin) for _ in range(3)
+        ]
+        for proposal, group in zip(proposals, ('interviewing', 'offer')):
+            proposal.status = self.get_status(group)
+            proposal.save()
+
+        statistics, proposal_queries = self.get_statistics()
+        self.assertEqual(
+            statistics,
+            {
+                'total_candidates_submitted': 3,
+                'pending_cv_review': 0,
+                'interviewing': 1,
+                'offer_stage': 1,
+                'wins': 0,
+                'live_jobs': 1,
+            },
+        )
+        self.assertEqual(proposal_queries, 1)
+
+        self.assertEqual(self.get_statistics(), (statistics, 0))
+
+        proposals[0].status = self.get_status('offer_accepted')
+        proposals[0].save()
+
+        statistics, proposal_queries = self.get_statistics()
+        self.assertEqual(statistics['interviewing'], 0)
+        self.assertEqual(statistics['wins'], 1)
+
+        job.published = False
+        job.save()
+        self.assertEqual(self.get_statistics()[0]['live_jobs'], 0)
+
 
 class ZohoViewSetTests(APITestCase):
     def setUp(self):
@@ -2106,7 +2187,7 @@ class GetPublicJobFiles(APITestCase):
         response = self.client.get(self.get_url())
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content, b'contents')
+        self.assertEqual(b''.join(response.streaming_content), b'contents')
 
     def test_wrong_job_id(self):
         self.assert_not_found(
@@ -0,0 +1,42 @@
+from django.core.cache import caches
+
+# hits and misses of application caches are counted in a shared cache,
+# so serving a cached response doesn't write to the database
+STATS_CACHE_ALIAS = 'stats'
+
+
+def get_stats_cache():
+    return caches[STATS_CACHE_ALIAS]
+
+
+def get_counter_key(name, hit):
+    return 'stats:{}:{}'.format(name, 'hits' if hit else 'misses')
+
+
+def count_cache_access(name, hit):
+    """Count the cache access with an atomic increment of the stats cache."""
+    cache = get_stats_cache()
+    key = get_counter_key(name, hit)
+
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted after it was added
+        cache.add(key, 1, None)
+
+
+def get_cache_access_stats(names):
+    """Return dict of hits and misses of every name, zeros if not counted."""
+    keys = {
+        name: (get_counter_key(name, True), get_counter_key(name, False))
+        for name in names
+    }
+    values = get_stats_cache().get_many(
+        [key for name_keys in keys.values() for key in name_keys]
+    )
+
+    return {
+        name: {'hits': values.get(hits_key, 0), 'misses': values.get(misses_key, 0)}
+        for name, (hits_key, misses_key) in keys.items()
+    }
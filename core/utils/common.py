@@ -3,6 +3,7 @@ import pytz
 import random
 import re
 import string
+import unicodedata
 
 from datetime import date
 from functools import wraps
@@ -21,7 +22,7 @@ from djangorestframework_camel_case.util import (
     camelize,
 )
 
-from core.constants import NOT_SET
+from core.constants import NOT_SET, CandidateDuplicationKeyType
 from core import tasks
 from core import datasets
 
@@ -200,6 +201,97 @@ def parse_linkedin_slug(url):
         return None
 
 
+def normalize_duplication_value(value):
+    """Normalize width, case and whitespace of a duplication key value."""
+    if value is None:
+        return ''
+
+    value = unicodedata.normalize('NFKC', str(value)).casefold()
+    return ' '.join(value.split())
+
+
+def get_candidate_duplication_keys(data):
+    """
+    Return a set of (key_type, value) pairs identifying the Candidate.
+
+    `data` is a mapping of Candidate field names, e.g. request data of
+    the duplication check or values of the Candidate instance.
+    """
+    keys = set()
+    key_type = CandidateDuplicationKeyType
+
+    for field in ('email', 'secondary_email'):
+        email = normalize_duplication_value(data.get(field))
+        if email:
+            keys.add((key_type.EMAIL.key, email))
+
+    linkedin_url = (data.get('linkedin_url') or '').strip()
+    if linkedin_url:
+        linkedin = parse_linkedin_slug(linkedin_url) or linkedin_url.rstrip('/')
+        keys.add((key_type.LINKEDIN.key, normalize_duplication_value(linkedin)))
+
+    zoho_id = normalize_duplication_value(data.get('zoho_id'))
+    if zoho_id:
+        keys.add((key_type.ZOHO.key, zoho_id))
+
+    name_fields = (
+        (key_type.NAME, 'first_name', 'last_name'),
+        (key_type.NAME_KANJI, 'first_name_kanji', 'last_name_kanji'),
+    )
+    for name_key_type, first_name_field, last_name_field in name_fields:
+        first_name = normalize_duplication_value(data.get(first_name_field))
+        last_name = normalize_duplication_value(data.get(last_name_field))
+        if name_key_type == key_type.NAME_KANJI and not (first_name and last_name):
+            continue
+        if first_name or last_name:
+            keys.add((name_key_type.key, f'{first_name}\t{last_name}'))
+
+    return keys
+
+
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord('ァ'), ord('ヶ') + 1)}
+
+
+def normalize_fuzzy_name(value, key_type):
+    """
+    Normalize a name of the given CandidateDuplicationKeyType for fuzzy matching.
+
+    Katakana is folded to hiragana, kanji and kana names lose spaces
+    between the family and the given name.
+    """
+    value = normalize_duplication_value(value).translate(KATAKANA_TO_HIRAGANA)
+    if key_type != CandidateDuplicationKeyType.NAME.key:
+        value = ''.join(value.split())
+
+    return value
+
+
+def get_candidate_fuzzy_names(data):
+    """
+    Return a dict of names of the Candidate for fuzzy matching by key type.
+
+    `data` is a mapping of Candidate field names, like for
+    `get_candidate_duplication_keys`. Romaji names are in the given
+    name first order, kanji and katakana names in the family name first.
+    """
+    names = {}
+    key_type = CandidateDuplicationKeyType
+
+    name_fields = (
+        (key_type.NAME, 'first_name', 'last_name'),
+        (key_type.NAME_KANJI, 'last_name_kanji', 'first_name_kanji'),
+        (key_type.NAME_KATAKANA, 'last_name_katakana', 'first_name_katakana'),
+    )
+    for name_key_type, *fields in name_fields:
+        name = normalize_fuzzy_name(
+            ' '.join(data.get(field) or '' for field in fields), name_key_type.key
+        )
+        if name:
+            names[name_key_type.key] = name
+
+    return names
+
+
 def send_email(to, folder, context, extension='txt', attachments=None):
     send_email_kwargs = {
         'to': [to],
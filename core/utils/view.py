@@ -1,4 +1,6 @@
-from django.http import HttpResponse
+import re
+
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect
 from django.utils.translation import gettext_lazy as _
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
@@ -6,17 +8,103 @@ from rest_framework.status import HTTP_400_BAD_REQUEST
 from core.utils.file import get_filename_from_path
 from core.utils.image import OpenRequestImageError, upload_image_and_fit_to_jpg
 
+DOWNLOAD_CONTENT_TYPE = 'application/force-download'
+
+BYTE_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """File-like object reading at most `length` bytes of the file."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def get_byte_range(range_header, size):
+    """
+    Return first and last byte of a single range of the Range header.
 
-def create_file_download_response(field_file):
-    logo_file = getattr(field_file, 'file', None)
+    Returns None if the header is missing or not a single byte range,
+    so the whole file is sent, and raises ValueError if the range
+    can't be satisfied.
+    """
+    match = BYTE_RANGE_RE.match(range_header or '')
+    if not match or match.groups() == ('', ''):
+        return None
 
-    if not logo_file:
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end) if end else size - 1, size - 1)
+
+    if start > end:
+        raise ValueError('Range not satisfiable')
+
+    return start, end
+
+
+def create_file_download_response(
+    field_file, request=None, redirect=False, content_type=DOWNLOAD_CONTENT_TYPE
+):
+    """
+    Return response with the file, streamed in chunks with Range support.
+
+    With `redirect`, files of storages able to issue presigned URLs
+    are redirected to instead, so they aren't passed through the worker.
+    Permissions should be checked before.
+    """
+    if not field_file:
         return Response({'detail': _('File not found.')}, 404)
 
-    response = HttpResponse(logo_file, content_type='application/force-download')
-    response['Content-Disposition'] = 'inline; filename="{}"'.format(
-        get_filename_from_path(logo_file.name)
-    )
+    filename = get_filename_from_path(field_file.name)
+    storage = field_file.storage
+    if redirect and hasattr(storage, 'get_download_url'):
+        return HttpResponseRedirect(
+            storage.get_download_url(
+                field_file.name, f'inline; filename="{filename}"', content_type
+            )
+        )
+
+    size = field_file.size
+    try:
+        byte_range = get_byte_range(request and request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    field_file.open('rb')
+    if byte_range is None:
+        response = FileResponse(
+            field_file, filename=filename, content_type=content_type
+        )
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        field_file.seek(start)
+        response = FileResponse(
+            FileRange(field_file, end - start + 1),
+            filename=filename,
+            content_type=content_type,
+            status=206,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+
+    response['Accept-Ranges'] = 'bytes'
     return response
 
 
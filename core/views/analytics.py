@@ -1,10 +1,13 @@
-from collections import namedtuple, OrderedDict
+from collections import namedtuple, OrderedDict, defaultdict
 from datetime import timedelta, datetime
 
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q, F, Avg, DurationField, Count, FloatField, Case
-from django.db.models import When, CharField, Value, Max, Min, Subquery
+from django.db.models import Q, F, Avg, DurationField, Count, Case
+from django.db.models import When, CharField, Value, Max, Min, OuterRef, Subquery
 from django.db.models.functions import ExtractDay, Cast, TruncDay, TruncMonth, TruncWeek
 from django.utils import timezone
 from drf_yasg.utils import swagger_auto_schema
@@ -16,7 +19,8 @@ from rest_framework.response import Response
 from core import models as m
 from core import serializers as s
 from core import filters as f
-from core.annotations import aggregate_proposals_stats, annotate_count_by_date
+from core.analytics_cache import cache_analytics_response
+from core.annotations import aggregate_proposals_stats
 from core.models import User, Proposal
 from core.permissions import (
     IsTalentAssociate,
@@ -27,6 +31,8 @@ from core.utils import require_user_profile, fix_for_yasg
 
 
 class BaseGranularity(object):
+    unit = None
+
     @staticmethod
     def add(d):
         raise NotImplementedError
@@ -59,6 +65,8 @@ class BaseGranularity(object):
 
 
 class MonthGranularity(BaseGranularity):
+    unit = 'month'
+
     @staticmethod
     def add(d):
         if d.month == 12:
@@ -83,6 +91,8 @@ class MonthGranularity(BaseGranularity):
 
 
 class WeekGranularity(BaseGranularity):
+    unit = 'week'
+
     @staticmethod
     def add(d):
         return d + timedelta(weeks=1)
@@ -103,6 +113,8 @@ class WeekGranularity(BaseGranularity):
 
 
 class DayGranularity(BaseGranularity):
+    unit = 'day'
+
     @staticmethod
     def add(d):
         return d + timedelta(days=1)
@@ -137,41 +149,109 @@ def count_overlapping_periods(granularity, date_ranges, start_date=None, end_dat
     }
     """
 
-    periods = [
-        (
-            granularity.floor(period_start.date()),
-            # checks if not closed
-            (
-                granularity.floor(period_end.date())
-                if period_end
-                else granularity.floor(timezone.now().date())
-            ),
-        )
-        for period_start, period_end in date_ranges
-    ]
+    today = granularity.floor(timezone.now().date())
+
+    # +1 at the first period of a range and -1 at the one after its last
+    deltas = defaultdict(int)
+    min_start = max_end = None
+
+    for period_start, period_end in date_ranges:
+        period_start = granularity.floor(period_start.date())
+        # checks if not closed
+        period_end = granularity.floor(period_end.date()) if period_end else today
+
+        min_start = period_start if min_start is None else min(min_start, period_start)
+        max_end = period_end if max_end is None else max(max_end, period_end)
+
+        if period_start <= period_end:
+            deltas[period_start] += 1
+            deltas[granularity.add(period_end)] -= 1
 
-    if start_date is None and periods:
-        start_date = min(i[0] for i in periods)
+    if start_date is None:
+        start_date = min_start
 
-    if end_date is None and periods:
-        end_date = max(i[1] for i in periods)
+    if end_date is None:
+        end_date = max_end
 
     if start_date is None or end_date is None:
         return []
 
-    result = {
-        d: 0
-        for d in granularity.range(
-            granularity.floor(start_date), granularity.ceil(end_date)
-        )
-    }
+    chart_points = list(
+        granularity.range(granularity.floor(start_date), granularity.ceil(end_date))
+    )
+    if not chart_points:
+        return []
+
+    # ranges started before the chart
+    value = sum(delta for date, delta in deltas.items() if date < chart_points[0])
 
-    for period_start, period_end in periods:
-        for chart_point in granularity.range(period_start, granularity.add(period_end)):
-            if chart_point in result:
-                result[chart_point] += 1
+    result = []
+    for chart_point in chart_points:
+        value += deltas.get(chart_point, 0)
+        result.append((chart_point, value))
+
+    return result
 
-    return sorted(result.items(), key=lambda x: x[0])
+
+COUNT_OVERLAPPING_PERIODS_SQL = '''
+    WITH period AS (
+        SELECT
+            date_trunc(%s, started_at AT TIME ZONE 'UTC')::date AS start_date,
+            date_trunc(
+                %s, COALESCE(ended_at AT TIME ZONE 'UTC', %s::timestamp)
+            )::date AS end_date
+        FROM ({periods}) AS source (id, started_at, ended_at)
+    )
+    SELECT chart_point::date, COUNT(period.start_date)
+    FROM generate_series(
+        COALESCE(%s, (SELECT MIN(start_date) FROM period))::timestamp,
+        COALESCE(%s, (SELECT MAX(end_date) FROM period))::timestamp,
+        %s::interval
+    ) AS chart_point
+    LEFT JOIN period
+        ON period.start_date <= chart_point AND period.end_date >= chart_point
+    GROUP BY chart_point
+    ORDER BY chart_point
+'''
+
+EMPTY_PERIODS_SQL = (
+    'SELECT NULL::integer, NULL::timestamptz, NULL::timestamptz WHERE false'
+)
+
+
+def count_overlapping_periods_in_db(
+    granularity, queryset, start_field, end_field, start_date=None, end_date=None
+):
+    """
+    Same as count_overlapping_periods, but computed by the database.
+
+    Ranges are (`start_field`, `end_field`) values of the queryset objects,
+    chart points are made with generate_series, so only counts are fetched.
+    """
+    try:
+        # pk keeps objects with equal ranges apart if .distinct() is used
+        periods_sql, periods_params = queryset.values_list(
+            'pk', start_field, end_field
+        ).query.sql_with_params()
+    except EmptyResultSet:
+        periods_sql, periods_params = EMPTY_PERIODS_SQL, ()
+
+    unit = granularity.unit
+    params = (
+        unit,
+        unit,
+        timezone.now().date(),
+        *periods_params,
+        granularity.floor(start_date) if start_date else None,
+        granularity.floor(end_date) if end_date else None,
+        f'1 {unit}',
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            COUNT_OVERLAPPING_PERIODS_SQL.format(periods=periods_sql), params
+        )
+        return [tuple(row) for row in cursor.fetchall()]
 
 
 def get_jobs_of_owner(user):
@@ -296,42 +376,38 @@ def get_hiring_managers(user):
     return User.objects.filter(manager_for_jobs__client=user.profile.client).distinct()
 
 
+def count_proposals_by_status_group(proposals, groups):
+    """Count Proposals which have ever been in each of status groups."""
+    counts = dict.fromkeys(groups, 0)
+    counts.update(
+        m.ProposalStatusFact.objects.filter(
+            proposal__in=proposals, status_group__in=counts
+        )
+        .values_list('status_group')
+        .annotate(count=Count('proposal', distinct=True))
+        .order_by()
+    )
+
+    return counts
+
+
 def get_conversion_ratios(proposals, table_description):
+    groups = {
+        status_group
+        for initial_status, status_list in table_description
+        for status_group in (initial_status, *status_list)
+    }
+    counts = count_proposals_by_status_group(proposals, groups)
+
     result = []
 
     for initial_status, status_list in table_description:
         row = {'id': initial_status, 'from_status': initial_status}
         result.append(row)
 
+        total = counts[initial_status]
         for proposal_status in status_list:
-            passed = Cast(
-                Count(
-                    'id',
-                    distinct=True,
-                    filter=Q(status_history__status__group=proposal_status),
-                ),
-                FloatField(),
-            )
-            total = Cast(
-                Count(
-                    'id',
-                    distinct=True,
-                    filter=Q(status_history__status__group=initial_status),
-                ),
-                FloatField(),
-            )
-
-            r = proposals.aggregate(
-                passed_ann=passed,
-                total_ann=total,
-                result_ann=Case(
-                    When(Q(total_ann=0), then=0),
-                    default=passed / total,
-                    output_field=FloatField(),
-                ),
-            )
-
-            row[proposal_status] = r['result_ann']
+            row[proposal_status] = counts[proposal_status] / total if total else 0.0
 
     return result
 
@@ -340,61 +416,40 @@ STATUS_GROUPS = ('new', 'approved', 'interviewing', 'offer', 'offer_accepted')
 
 
 def get_conversion_ratio(proposals, groups=STATUS_GROUPS):
-    result = []
-
-    for status_group in groups:
-        passed = Cast(
-            Count(
-                'id',
-                distinct=True,
-                filter=Q(status_history__status__group=status_group),
-            ),
-            FloatField(),
-        )
-
-        result.append(
-            {
-                'status_group': status_group,
-                'value': proposals.aggregate(result_ann=passed)['result_ann'],
-            }
-        )
+    counts = count_proposals_by_status_group(proposals, groups)
 
-    return result
-
-
-def take_of_period(qs, func):
-    return qs.filter(
-        changed_at__in=Subquery(
-            qs.values('proposal',)
-            .annotate(date=func('changed_at'))
-            .values('date',)
-            .order_by('date')
-        )
-    )
-
-
-def take_first_of_period(qs):
-    return take_of_period(qs, Min)
-
-
-def take_last_of_period(qs):
-    return take_of_period(qs, Max)
+    return [
+        {'status_group': status_group, 'value': float(counts[status_group])}
+        for status_group in groups
+    ]
 
 
 def get_candidate_statuses_stats(qs, params):
-    return list(
-        annotate_count_by_date(
-            take_first_of_period(qs), 'proposal', 'changed_at', params.granularity.trunc
-        )
+    """Count Proposals by the period they first entered one of statuses."""
+    first_entered_at = (
+        qs.filter(proposal=OuterRef('proposal'))
+        .order_by()
+        .values('proposal')
+        .annotate(first_entered_at=Min('entered_at'))
+        .values('first_entered_at')
+    )
+    first_entered_dates = (
+        qs.filter(entered_at=Subquery(first_entered_at))
+        .annotate(date=params.granularity.trunc('entered_at'))
+        .order_by('date')
+        .values('date')
+        .annotate(value=Count('proposal', distinct=True))
     )
 
+    return [{'date': row['date'], 'value': row['value']} for row in first_entered_dates]
+
 
-def get_changed_at_filter(date_start, date_end):
+def get_entered_at_filter(date_start, date_end):
     date_filter = {}
     if date_start:
-        date_filter['changed_at__range'] = (date_start, date_end)
+        date_filter['entered_at__range'] = (date_start, date_end)
     else:
-        date_filter['changed_at__lte'] = date_end
+        date_filter['entered_at__lte'] = date_end
 
     return date_filter
 
@@ -416,56 +471,59 @@ SHORTLISTED_STATUS_GROUPS = (
 
 
 def get_identified_stats(params, date_end, proposals):
-    identified_stats = m.ProposalStatusHistory.objects.filter(
+    identified_stats = m.ProposalStatusFact.objects.filter(
         proposal__in=proposals,
-        proposal__job=params.job,
-        status__group__in=IDENTIFIED_STATUS_GROUPS,
-        changed_at__lte=date_end,
+        job=params.job,
+        status_group__in=IDENTIFIED_STATUS_GROUPS,
+        entered_at__lte=date_end,
     )
 
     return get_candidate_statuses_stats(identified_stats, params)
 
 
 def get_contacted_stats(params, date_end, proposals):
-    contacted_stats = m.ProposalStatusHistory.objects.filter(
+    contacted_stats = m.ProposalStatusFact.objects.filter(
         proposal__in=proposals,
-        status__group__in=CONTACTED_STATUS_GROUPS,
-        proposal__job=params.job,
-        changed_at__lte=date_end,
+        status_group__in=CONTACTED_STATUS_GROUPS,
+        job=params.job,
+        entered_at__lte=date_end,
     )
 
     return get_candidate_statuses_stats(contacted_stats, params)
 
 
 def get_interviewed_stats(params, date_end, proposals):
-    interviewed_stats = m.ProposalStatusHistory.objects.filter(
+    interviewed_stats = m.ProposalStatusFact.objects.filter(
         proposal__in=proposals,
-        proposal__job=params.job,
-        status__group__in=INTERVIEWED_STATUS_GROUPS,
-        changed_at__lte=date_end,
+        job=params.job,
+        status_group__in=INTERVIEWED_STATUS_GROUPS,
+        entered_at__lte=date_end,
     )
 
     return get_candidate_statuses_stats(interviewed_stats, params)
 
 
 def get_shortlisted_stats(params, date_end, proposals):
-    shortlist_stats = m.ProposalStatusHistory.objects.filter(
+    shortlist_stats = m.ProposalStatusFact.objects.filter(
         proposal__in=proposals,
-        proposal__job=params.job,
-        status__group__in=SHORTLISTED_STATUS_GROUPS,
-        changed_at__lte=date_end,
+        job=params.job,
+        status_group__in=SHORTLISTED_STATUS_GROUPS,
+        entered_at__lte=date_end,
     )
 
     return get_candidate_statuses_stats(shortlist_stats, params)
 
 
 def get_proposals_snapshot(apply_proposals_filter, job, date_start, date_end):
-    return take_last_of_period(
-        apply_proposals_filter(
-            m.ProposalStatusHistory.objects.filter(
-                proposal__job=job, **get_changed_at_filter(date_start, date_end)
-            )
-        )
+    """Return the last status history item of every Proposal by `date_end`."""
+    facts = m.ProposalStatusFact.objects.filter(
+        Q(exited_at__isnull=True) | Q(exited_at__gt=date_end),
+        job=job,
+        **get_entered_at_filter(date_start, date_end),
+    )
+
+    return apply_proposals_filter(
+        m.ProposalStatusHistory.objects.filter(id__in=facts.values('history_id'))
     )
 
 
@@ -657,6 +715,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(methods=['get'], detail=False)
     @swagger_auto_schema(query_serializer=s.StatsQuerySerializer)
     @add_permissions([IsTalentAssociate()])
+    @cache_analytics_response(s.StatsQuerySerializer)
     def job_average_open(self, request, *args, **kwargs):
         params = parse_default_parameters(request)
 
@@ -701,6 +760,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(methods=['get'], detail=False)
     @swagger_auto_schema(query_serializer=s.StatsChartQuerySerializer)
     @add_permissions([IsTalentAssociate()])
+    @cache_analytics_response(s.StatsChartQuerySerializer)
     def open_jobs(self, request, *args, **kwargs):
         params = parse_default_parameters(request, s.StatsChartQuerySerializer)
 
@@ -712,23 +772,37 @@ class AnalyticsViewSet(viewsets.ViewSet):
         else:
             job_queryset = request.user.profile.apply_jobs_filter(m.Job.objects)
 
-        job_published_ranges = (
-            i[1:]
-            for i in filter_jobs_open(
-                jobs=job_queryset,
-                start_date=params.date_start,
-                end_date=params.date_end,
-            ).values_list('id', 'published_at', 'closed_at')
-        )  # id to force add if .distinct() is used
+        open_jobs_queryset = filter_jobs_open(
+            jobs=job_queryset, start_date=params.date_start, end_date=params.date_end,
+        )
 
-        result = [
-            {'date': d.isoformat(), 'value': open_jobs}
-            for d, open_jobs in count_overlapping_periods(
+        if settings.ANALYTICS_COUNT_PERIODS_IN_DB:
+            open_jobs_counts = count_overlapping_periods_in_db(
+                params.granularity,
+                open_jobs_queryset,
+                'published_at',
+                'closed_at',
+                params.date_start,
+                params.date_end,
+            )
+        else:
+            job_published_ranges = (
+                i[1:]
+                for i in open_jobs_queryset.values_list(
+                    'id', 'published_at', 'closed_at'
+                )
+            )  # id to force add if .distinct() is used
+
+            open_jobs_counts = count_overlapping_periods(
                 params.granularity,
                 job_published_ranges,
                 params.date_start,
                 params.date_end,
             )
+
+        result = [
+            {'date': d.isoformat(), 'value': open_jobs}
+            for d, open_jobs in open_jobs_counts
         ]
 
         return Response(result)
@@ -747,6 +821,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(methods=['get'], detail=False)
     @swagger_auto_schema(query_serializer=s.AnalyticsSourcesQuerySerializer)
     @add_permissions([IsTalentAssociate()])
+    @cache_analytics_response(s.AnalyticsSourcesQuerySerializer)
     def sources(self, request, *args, **kwargs):
         params = parse_default_parameters(request, s.AnalyticsSourcesQuerySerializer)
 
@@ -794,6 +869,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(methods=['get'], detail=False)
     @swagger_auto_schema(query_serializer=s.StatsChartQuerySerializer)
     @add_permissions([IsTalentAssociate()])
+    @cache_analytics_response(s.StatsChartQuerySerializer)
     def candidates_hired(self, request, *args, **kwargs):
         params = parse_default_parameters(request, s.StatsChartQuerySerializer)
 
@@ -840,6 +916,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(methods=['get'], detail=False)
     @swagger_auto_schema(query_serializer=s.StatsQuerySerializer)
     @add_permissions([IsTalentAssociate()])
+    @cache_analytics_response(s.StatsQuerySerializer)
     def candidate_decline_reason(self, request, *args, **kwargs):
         params = parse_default_parameters(request)
 
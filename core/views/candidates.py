@@ -5,7 +5,6 @@ from django.db.models import (
     Prefetch,
     F,
 )
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext_lazy as _
@@ -24,7 +23,10 @@ from reversion.models import Version
 from core import filters as f
 from core import models as m
 from core import serializers as s
-from core.annotations import annotate_candidate_has_jobs_proposed_to
+from core.annotations import (
+    annotate_candidate_has_jobs_proposed_to,
+    annotate_candidate_proposed_to,
+)
 from core.constants import (
     CREATE_ACTIONS,
     UPDATE_ACTIONS,
@@ -35,7 +37,7 @@ from core.constants import (
 
 from core.mixins import ValidateModelMixin
 from core.notifications import notify_mentioned_users_in_comment
-from core.pagination import MultipleModelLimitPagination
+from core.pagination import CursorLimitOffsetPagination, MultipleModelLimitPagination
 from core.permissions import (
     BaseAccessPolicy,
     CandidateCommentsAccessPolicy,
@@ -49,8 +51,12 @@ from core.utils import (
     LinkedinProfile,
     poly_relation_filter,
 )
+from core.utils.view import create_file_download_response
 from core.views.views import FileViewSet
-from core.check_candidate_duplication import check_candidate_duplication
+from core.check_candidate_duplication import (
+    check_candidate_duplication,
+    check_candidates_duplication,
+)
 from talentai import ordering_filters
 
 
@@ -265,10 +271,12 @@ class CandidateCommentViewSet(
         if self._sorting_fields:
             results = self.sort_results(results)
 
-        try:
-            results = results[: int(request.query_params.get('limit'))]
-        except TypeError:
-            pass
+        # pages of cursor pagination are cut by the paginator
+        if not self.paginator.cursor_mode:
+            try:
+                results = results[: int(request.query_params.get('limit'))]
+            except TypeError:
+                pass
 
         if request.accepted_renderer.format == 'html':
             # Makes the the results available to the template context by transforming to a dict
@@ -357,34 +365,13 @@ class CandidateViewSet(viewsets.ModelViewSet):
     )
     serializer_class = s.CandidateSerializer
     permission_classes = (CandidatesAccessPolicy,)
+    pagination_class = CursorLimitOffsetPagination
     filter_backends = [
         drf_filters.DjangoFilterBackend,
         f.CandidateSearchFilter,
         ordering_filters.CamelCaseOrderingFilter,
     ]
     filterset_class = f.CandidateFilterSet
-    search_fields = (
-        'id',
-        'first_name',
-        'middle_name',
-        'last_name',
-        'first_name_kanji',
-        'last_name_kanji',
-        'first_name_katakana',
-        'last_name_katakana',
-        'current_country',
-        'email',
-        'secondary_email',
-        'current_position',
-        'current_company',
-        'certifications__certification',
-        'certifications__certification_other',
-        'experience_details__occupation',
-        'experience_details__company',
-        'experience_details__summary',
-        'education_details__institute',
-        'education_details__department',
-    )
     ordering_fields_mapping = {'name': ('first_name', 'last_name')}
 
     @fix_for_yasg
@@ -410,6 +397,56 @@ class CandidateViewSet(viewsets.ModelViewSet):
             )
         )
 
+        if self.action in ['list', 'retrieve']:
+            queryset = self.prefetch_serialized_fields(queryset, profile)
+
+        return queryset
+
+    def prefetch_serialized_fields(self, queryset, profile):
+        """Prefetch data of serialized fields to avoid queries per Candidate."""
+        org_users = m.User.objects.with_profile()
+        queryset = queryset.prefetch_related(
+            'organization',
+            'languages',
+            'certifications',
+            Prefetch(
+                'candidatetag_set',
+                queryset=m.CandidateTag.objects.select_related('tag'),
+            ),
+            Prefetch(
+                'proposals',
+                queryset=m.Proposal.objects.select_related('job__client', 'status'),
+            ),
+            Prefetch('created_by', queryset=org_users),
+            Prefetch('updated_by', queryset=org_users),
+            Prefetch(
+                'notes',
+                queryset=m.CandidateNote.objects.filter(
+                    content_type=ContentType.objects.get_for_model(profile.org),
+                    object_id=profile.org.pk,
+                ),
+                to_attr='org_notes',
+            ),
+        )
+
+        if self.action == 'retrieve':
+            return queryset.prefetch_related(
+                Prefetch(
+                    'files',
+                    queryset=m.CandidateFile.objects.filter(
+                        Q(is_shared=True)
+                        | poly_relation_filter(
+                            'org_id', 'org_content_type', profile.org
+                        )
+                    ),
+                    to_attr='visible_files',
+                )
+            )
+
+        job_id = self.request.query_params.get('check_proposed_to')
+        if job_id and job_id.isdigit():
+            queryset = annotate_candidate_proposed_to(queryset, job_id)
+
         return queryset
 
     def get_serializer_class(self):
@@ -462,6 +499,9 @@ class CandidateViewSet(viewsets.ModelViewSet):
                 'to_restore': s.DuplicatedCandidateSerializer(
                     check_results['to_restore'], many=True
                 ).data,
+                'possible_duplicates': s.PossibleDuplicatedCandidateSerializer(
+                    check_results['possible_duplicates'], many=True
+                ).data,
             }
         )
 
@@ -475,6 +515,40 @@ class CandidateViewSet(viewsets.ModelViewSet):
 
         return self.get_duplication_check_response(data)
 
+    @action(methods=['post'], detail=False)
+    @swagger_auto_schema(
+        operation_id='candidate_check_duplication_batch',
+        request_body=s.PossibleDuplicateCandidateBatchSerializer,
+    )
+    def check_duplication_batch(self, request, **kwargs):
+        """Check duplication of many candidates, e.g. before an import."""
+        data = self.get_serialized_data(s.PossibleDuplicateCandidateBatchSerializer)
+
+        check_results = check_candidates_duplication(
+            data['candidates'], self.request.user.profile
+        )
+
+        return Response(
+            {
+                'results': [
+                    {
+                        'submitted_by_others': result['submitted_by_others'],
+                        'last_submitted': result['last_submitted'],
+                        'duplicates': s.DuplicatedCandidateSerializer(
+                            result['duplicates'], many=True
+                        ).data,
+                        'to_restore': s.DuplicatedCandidateSerializer(
+                            result['to_restore'], many=True
+                        ).data,
+                        'possible_duplicates': s.PossibleDuplicatedCandidateSerializer(
+                            result['possible_duplicates'], many=True
+                        ).data,
+                    }
+                    for result in check_results
+                ]
+            }
+        )
+
     @action(methods=['post'], detail=False)
     @swagger_auto_schema(
         operation_id='candidate_linkedin_data_check_duplication',
@@ -608,16 +682,9 @@ class CandidateFileViewSet(viewsets.GenericViewSet):
         )
         candidate = get_object_or_404(available_candidates, pk=pk)
 
-        if getattr(candidate, ftype) and getattr(candidate, ftype).file:
-            filename = getattr(candidate, ftype).name.split('/')[-1]
-            response = HttpResponse(
-                getattr(candidate, ftype).file,
-                content_type='application/force-download',
-            )
-            response['Content-Disposition'] = 'inline; filename="{}"'.format(filename)
-            return response
-
-        return Response({'detail': _('File not found.')}, 404)
+        return create_file_download_response(
+            getattr(candidate, ftype), request, redirect=True
+        )
 
     @action(methods=['post'], detail=True, parser_classes=(MultiPartParser,))
     @swagger_auto_schema(
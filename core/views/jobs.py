@@ -1,5 +1,4 @@
 from django.db.models import Prefetch
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.decorators import method_decorator
@@ -16,6 +15,8 @@ from core import models as m
 from core import serializers as s
 from core.annotations import (
     annotate_job_agency_member_have_access_since,
+    annotate_job_candidate_proposed,
+    annotate_job_user_has_access,
     annotate_job_live_proposals,
     annotate_job_proposal_pipeline,
     annotate_job_hired_count,
@@ -44,6 +45,7 @@ from core.utils import (
     fix_for_yasg,
     require_user_profile,
 )
+from core.utils.view import create_file_download_response
 from core.views.views import FileViewSet
 
 
@@ -99,7 +101,8 @@ class JobViewSet(viewsets.ModelViewSet):
                 Prefetch(
                     'agencies',
                     queryset=m.Agency.objects.filter(job_contracts__is_active=True),
-                )
+                ),
+                'agency_contracts',
             )
 
         if self.action == 'list':
@@ -113,6 +116,8 @@ class JobViewSet(viewsets.ModelViewSet):
             if show_live_proposal_count == 'true':
                 jobs = annotate_job_live_proposals(jobs, user.profile)
 
+            jobs = self.prefetch_list_fields(jobs)
+
         else:
             show_pipeline = self.request.query_params.get('show_pipeline')
             if show_pipeline == 'true':
@@ -122,6 +127,42 @@ class JobViewSet(viewsets.ModelViewSet):
 
         return jobs
 
+    def get_query_data(self):
+        """Return validated query parameters of the list action."""
+        if not hasattr(self, 'query_data'):
+            query_serializer = s.JobQuerySerializer(
+                data=self.request.GET, context=super().get_serializer_context()
+            )
+            query_serializer.is_valid(raise_exception=True)
+            self.query_data = query_serializer.validated_data
+
+        return self.query_data
+
+    def prefetch_list_fields(self, jobs):
+        """Resolve serialized fields of the listed Jobs in constant queries."""
+        org_users = m.User.objects.with_profile()
+        jobs = jobs.prefetch_related(
+            'organization',
+            '_managers',
+            'hiring_criteria',
+            Prefetch('jobskill_set', queryset=m.JobSkill.objects.select_related('tag')),
+            Prefetch('owner', queryset=org_users),
+            Prefetch('recruiters', queryset=org_users),
+        )
+        query_data = self.get_query_data()
+
+        candidate = query_data.get('check_candidate_proposed')
+        if candidate:
+            jobs = annotate_job_candidate_proposed(jobs, candidate)
+
+        checked_profile = getattr(
+            query_data.get('check_user_has_access'), 'profile', None
+        )
+        if checked_profile and hasattr(self.request.user.profile, 'client'):
+            jobs = annotate_job_user_has_access(jobs, checked_profile)
+
+        return jobs
+
     def get_serializer_class(self):
         """Return different serializer if the action is create or update."""
         if self.action in CREATE_UPDATE_ACTIONS:
@@ -137,11 +178,7 @@ class JobViewSet(viewsets.ModelViewSet):
         context = super().get_serializer_context()
 
         if self.action == 'list':
-            query_serializer = s.JobQuerySerializer(
-                data=self.request.GET, context=context
-            )
-            query_serializer.is_valid(raise_exception=True)
-            return {**context, **query_serializer.validated_data}
+            return {**context, **self.get_query_data()}
         elif self.action == 'retrieve':
             query_serializer = s.JobDetailQuerySerializer(
                 data=self.request.GET, context=context
@@ -312,10 +349,7 @@ def get_job_file_public(request, uuid, pk):
     if job_file.file.name == '':
         return Response({'detail': _('Not found.')}, 404)
 
-    filename = job_file.file.name.split('/')[-1]
-    response = HttpResponse(job_file.file, content_type='application/force-download')
-    response['Content-Disposition'] = 'inline; filename="{}"'.format(filename)
-    return response
+    return create_file_download_response(job_file.file, request)
 
 
 class JobFileViewSet(FileViewSet, mixins.UpdateModelMixin):
@@ -12,18 +12,16 @@ from rest_framework.response import Response
 from core import filters as f
 from core import models as m
 from core import serializers as s
+from core.pagination import CursorLimitOffsetPagination
 from core.tasks import email_public_candidate_application_confirmation
 
 from core.notifications import (
-    notify_candidate_proposed_for_job,
-    notify_client_changed_proposal_status,
+    dispatch_proposal_event,
     notify_interview_assessment_added,
     notify_proposal_interview_canceled,
     notify_proposal_interview_confirmed,
     notify_proposal_interview_rejected,
     notify_proposal_moved,
-    notify_job_is_filled,
-    notify_client_candidate_public_application,
     notify_interview_schedule_sent,
 )
 from core.permissions import (
@@ -65,6 +63,7 @@ class ProposalViewSet(viewsets.ModelViewSet):
         .all()
     )
     permission_classes = (ProposalsAccessPolicy,)
+    pagination_class = CursorLimitOffsetPagination
     filterset_class = f.ProposalFilterSet
     search_fields = ('candidate__first_name', 'candidate__last_name')
 
@@ -107,7 +106,7 @@ class ProposalViewSet(viewsets.ModelViewSet):
                         for pos, group in enumerate(group_order)
                     ],
                 ),
-            ).order_by('group_order', 'last_activity_at',)
+            ).order_by('group_order', 'last_activity_at', 'id')
 
         return queryset
 
@@ -164,6 +163,7 @@ class ProposalViewSet(viewsets.ModelViewSet):
         serializer.save(
             moved_from_job=proposal.job, moved_by=request.user,
         )
+        m.ProposalStatusFact.sync([proposal.id])
 
         notify_proposal_moved(self.request.user, proposal)
 
@@ -249,7 +249,7 @@ class ProposalViewSet(viewsets.ModelViewSet):
 
             proposal.save()
 
-            m.ProposalStatusHistory.objects.create(
+            history = m.ProposalStatusHistory.objects.create(
                 proposal=proposal,
                 status=proposal.status,
                 changed_at=proposal.created_at,
@@ -258,13 +258,19 @@ class ProposalViewSet(viewsets.ModelViewSet):
 
             proposal.update_activity(user, updated='stage')
             if posting:
-                notify_client_candidate_public_application(proposal)
+                dispatch_proposal_event(
+                    'client_candidate_public_application',
+                    proposal,
+                    change_id=history.id,
+                )
                 # allow delay for possible file uploads
                 email_public_candidate_application_confirmation.apply_async(
                     (proposal.id,), countdown=60
                 )
             else:
-                notify_candidate_proposed_for_job(user, proposal)
+                dispatch_proposal_event(
+                    'candidate_proposed_for_job', proposal, user, change_id=history.id
+                )
 
     def perform_update(self, serializer):
         user = self.request.user
@@ -285,7 +291,7 @@ class ProposalViewSet(viewsets.ModelViewSet):
 
         diff = compare_model_dicts(old, new, ['status'])
         if 'status' in diff:
-            m.ProposalStatusHistory.objects.create(
+            history = m.ProposalStatusHistory.objects.create(
                 proposal=proposal, status=proposal.status, changed_by=user,
             )
 
@@ -307,9 +313,20 @@ class ProposalViewSet(viewsets.ModelViewSet):
             ):
                 is_filled = proposal.job.set_filled_if_no_openings()
                 if is_filled:
-                    notify_job_is_filled(user, proposal.job)
+                    dispatch_proposal_event(
+                        'job_is_filled',
+                        proposal,
+                        user,
+                        change_id=history.id,
+                    )
 
-            notify_client_changed_proposal_status(user, proposal, diff)
+            dispatch_proposal_event(
+                'client_changed_proposal_status',
+                proposal,
+                user,
+                change_id=history.id,
+                diff=diff,
+            )
 
 
 class ProposalQuestionViewSet(viewsets.ModelViewSet):
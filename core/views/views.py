@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model, login, logout
 from django.contrib.auth import update_session_auth_hash
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, transaction
 from django.db.models import (
     Q,
     F,
@@ -8,8 +10,12 @@ from django.db.models import (
     Exists,
     OuterRef,
     Count,
+    Window,
+    Case,
+    When,
+    BooleanField,
 )
-from django.db.models.functions import Concat
+from django.db.models.functions import Concat, RowNumber
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import translation
@@ -27,6 +33,11 @@ from rest_framework.serializers import Serializer
 from core import filters as f
 from core import models as m
 from core import serializers as s
+from core.analytics_cache import (
+    DASHBOARD_STATISTICS_TIMEOUT,
+    get_cache as get_analytics_cache,
+    get_dashboard_statistics_key,
+)
 from core.annotations import annotate_proposal_deal_pipeline_metrics
 from core.constants import (
     CREATE_ACTIONS,
@@ -40,6 +51,7 @@ from core.notifications import (
     notify_client_created_contract,
     notify_client_admin_assigned_manager,
 )
+from core.pagination import CursorLimitOffsetPagination
 from core.permissions import (
     AgencyBaseAccessPolicy,
     BaseAccessPolicy,
@@ -611,11 +623,7 @@ class FileViewSet(
         if file is None or file.name == '':
             return Response({'detail': _('Not found.')}, 404)
 
-        filename = file.name.split('/')[-1]
-        response = HttpResponse(file, content_type='application/force-download')
-        response['Content-Disposition'] = 'inline; filename="{}"'.format(filename)
-
-        return response
+        return create_file_download_response(file, self.request, redirect=True)
 
     def retrieve(self, request, *args, **kwargs):
         return self.generic_retrieve_file_view(kwargs['pk'], 'file')
@@ -774,12 +782,30 @@ class NotificationsViewSet(viewsets.ModelViewSet):
     serializer_class = s.NotificationSerializer
     permission_classes = (IsAuthenticated,)
     filterset_fields = ('unread', 'verb')
+    pagination_class = CursorLimitOffsetPagination
 
     @fix_for_yasg
     def get_queryset(self):
         """Return Notification objects only for current user."""
         return self.queryset.filter(recipient=self.request.user)
 
+    def perform_update(self, serializer):
+        unread = serializer.validated_data.get('unread')
+        with transaction.atomic():
+            # conditional update, so of concurrent requests only the one
+            # which flips the flag changes the counter
+            flipped = 0
+            if unread is not None:
+                flipped = m.Notification.objects.filter(
+                    pk=serializer.instance.pk, unread=not unread
+                ).update(unread=unread)
+
+            notification = serializer.save()
+            if flipped == 1:
+                m.NotificationCounter.change(
+                    notification.recipient_id, 1 if unread else -1
+                )
+
     @action(methods=['post'], detail=False)
     @swagger_auto_schema(
         operation_id='notifications_mark_all_as_read',
@@ -788,7 +814,7 @@ class NotificationsViewSet(viewsets.ModelViewSet):
     )
     def mark_all_as_read(self, request, format=None):
         """Mark all User notifications as read."""
-        self.get_queryset().update(unread=False)
+        self.get_queryset().mark_as_read()
         return Response({})
 
     @action(methods=['post'], detail=True)
@@ -800,8 +826,7 @@ class NotificationsViewSet(viewsets.ModelViewSet):
     def mark_as_read(self, request, pk=None):
         """Mark the given Notification as read."""
         notification = get_object_or_404(self.get_queryset(), pk=pk)
-        notification.unread = False
-        notification.save()
+        self.get_queryset().filter(pk=notification.pk).mark_as_read()
         return Response({})
 
 
@@ -812,23 +837,34 @@ class DashboardViewSet(viewsets.ViewSet):
 
     @action(methods=['get'], detail=False)
     def get_statistics(self, request, *args, **kwargs):
-        proposals = request.user.profile.apply_proposals_filter(
-            m.Proposal.shortlist.all()
-        )
-        jobs = request.user.profile.apply_jobs_filter(m.Job.objects)
-
-        return Response(
-            {
-                'total_candidates_submitted': proposals.count(),
-                'pending_cv_review': proposals.filter(status__group='new').count(),
-                'interviewing': proposals.filter(status__group='interviewing').count(),
-                'offer_stage': proposals.filter(status__group='offer').count(),
-                'wins': proposals.filter(status__group='offer_accepted').count(),
-                'live_jobs': jobs.filter(
-                    published=True, status=m.JobStatus.OPEN.key
-                ).count(),
-            }
-        )
+        profile = request.user.profile
+        cache = get_analytics_cache()
+        key = get_dashboard_statistics_key(profile)
+
+        statistics = cache.get(key)
+        if statistics is None:
+            statistics = self.compute_statistics(profile)
+            cache.set(key, statistics, DASHBOARD_STATISTICS_TIMEOUT)
+
+        return Response(statistics)
+
+    @staticmethod
+    def compute_statistics(profile):
+        proposals = profile.apply_proposals_filter(m.Proposal.shortlist.all())
+        jobs = profile.apply_jobs_filter(m.Job.objects)
+
+        return {
+            **proposals.aggregate(
+                total_candidates_submitted=Count('id'),
+                pending_cv_review=Count('id', filter=Q(status__group='new')),
+                interviewing=Count('id', filter=Q(status__group='interviewing')),
+                offer_stage=Count('id', filter=Q(status__group='offer')),
+                wins=Count('id', filter=Q(status__group='offer_accepted')),
+            ),
+            'live_jobs': jobs.filter(
+                published=True, status=m.JobStatus.OPEN.key
+            ).count(),
+        }
 
 
 class ZohoViewSet(viewsets.ViewSet):
@@ -1073,13 +1109,53 @@ class FeeSplitAllocationViewSet(
         instance = self.get_object()
         file = instance.file
 
-        if not (file and file.file):
-            return Response({'detail': _('File not found.')}, 404)
+        return create_file_download_response(file, request)
+
+
+DEAL_PIPELINE_VALUES_SQL = '''
+    SELECT deal_stage, SUM(salary)
+    FROM ({deals}) AS deal (deal_stage, salary, job_rank, openings_count, counted)
+    WHERE job_rank <= openings_count AND counted
+    GROUP BY deal_stage
+'''
+
+
+def sum_deal_pipeline_values(proposals, counted_proposals):
+    """
+    Return sums of converted salaries of deals by deal stage.
+
+    Only first deals of every Job up to its openings count are summed,
+    in order of `annotate_proposal_deal_pipeline_metrics`, and of them
+    only ones in `counted_proposals`, e.g. filtered by the request.
+    """
+    deals = proposals.annotate(
+        deal_stage=F('status__deal_stage'),
+        salary=F('converted_current_salary'),
+        job_rank=Window(
+            RowNumber(),
+            partition_by=[F('job_id')],
+            order_by=[
+                F('org_status_order').desc(),
+                F('converted_current_salary').desc(),
+                F('pk').asc(),
+            ],
+        ),
+        openings_count=F('job__openings_count'),
+        counted=Case(
+            When(Exists(counted_proposals.filter(pk=OuterRef('pk'))), then=True),
+            default=False,
+            output_field=BooleanField(),
+        ),
+    ).values_list('deal_stage', 'salary', 'job_rank', 'openings_count', 'counted')
 
-        filename = file.name.split('/')[-1]
-        response = HttpResponse(file.file, content_type='application/force-download',)
-        response['Content-Disposition'] = 'inline; filename="{}"'.format(filename)
-        return response
+    try:
+        deals_sql, params = deals.query.sql_with_params()
+    except EmptyResultSet:
+        return {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(DEAL_PIPELINE_VALUES_SQL.format(deals=deals_sql), params)
+        return {stage: float(value) for stage, value in cursor.fetchall()}
 
 
 class DealPipelineViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
@@ -1123,22 +1199,12 @@ class DealPipelineViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
             'offer': 0,
         }
 
-        proposals = self.get_queryset()
-        filtered_ids = {item.id for item in self.filter_queryset(self.get_queryset())}
-
-        job_opening_counters = {
-            item['job']: item['job__openings_count']
-            for item in list(proposals.values('job', 'job__openings_count').distinct())
-        }
-
-        for proposal in proposals:
-            # The max number of candidates is equal to max openings value
-            if job_opening_counters[proposal.job.pk] > 0:
-                if proposal.id in filtered_ids:
-                    value = proposal.converted_current_salary
-                    deal_metrics[proposal.status.deal_stage] += value
-
-                job_opening_counters[proposal.job.pk] -= 1
+        # The max number of candidates is equal to max openings value
+        deal_metrics.update(
+            sum_deal_pipeline_values(
+                self.get_queryset(), self.filter_queryset(self.get_queryset())
+            )
+        )
 
         total = {}
         realistic = {}
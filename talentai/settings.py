@@ -3,6 +3,7 @@ from os import getenv, path
 import sentry_sdk
 
 from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 from sentry_sdk.integrations.django import DjangoIntegration
 from sentry_sdk.integrations.celery import CeleryIntegration
 
@@ -63,6 +64,25 @@ DATABASES = {
     }
 }
 
+# Shared by all workers to invalidate cached analytics of all of them,
+# kept out of the database to not add queries to cached reads and writes.
+# Local environments without Redis keep them in memory of each process
+REDIS_CACHE_URL = getenv(PREFIX + 'REDIS_CACHE_URL')
+if REDIS_CACHE_URL:
+    CACHES['analytics'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+        'KEY_PREFIX': 'analytics',
+    }
+    # hit and miss counters of the analytics and conversion caches
+    CACHES['stats'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+        'KEY_PREFIX': 'stats',
+    }
+elif ENVIRONMENT in ['dev', 'staging', 'production']:
+    raise ImproperlyConfigured(f'{PREFIX}REDIS_CACHE_URL is not set')
+
 STATICFILES_DIRS = [path.join(BASE_DIR, './dashboard/build/static/')]
 STATIC_ROOT = path.join(BASE_DIR, 'django_static')
 
@@ -89,6 +109,14 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'core.tasks.mark_expired_contracts',
         'schedule': crontab(minute=0, hour=0),
     },
+    'process_stale_notification_events': {
+        'task': 'core.tasks.process_stale_notification_events',
+        'schedule': crontab(minute='*/10'),
+    },
+    'reconcile_notification_counters': {
+        'task': 'core.tasks.reconcile_notification_counters',
+        'schedule': crontab(minute=30, hour=3),
+    },
     # TODO(ZOO-1157): wait for updated API key
     # 'update_currency_rates': {
     #     'task': 'core.tasks.update_currency_rates',
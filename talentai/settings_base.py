@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.sitemaps',
+    'django.contrib.postgres',
     'django.contrib.staticfiles',
     'reversion',
     'rest_framework',
@@ -163,6 +164,8 @@ SWAGGER_SETTINGS = {'DEFAULT_INFO': 'talentai.urls.openapi_info'}
 
 AUTH_USER_MODEL = 'core.User'
 
+AUTHENTICATION_BACKENDS = ['core.authentication.ProfileModelBackend']
+
 
 # Django Filters
 # https://django-filter.readthedocs.io/en/master/
@@ -213,8 +216,35 @@ CSRF_COOKIE_SAMESITE = None
 
 EXT_ORIGIN = getenv('EXT_ORIGIN', '')
 
+# seconds presigned redirects of file downloads are valid for
+FILE_DOWNLOAD_URL_EXPIRE = 60
+
 CLOUDCONVERT_API_KEY = getenv('CLOUDCONVERT_API_KEY', None)
+# 'core.converter.LocalBackend' converts with LibreOffice and poppler
+PDF_CONVERTER_BACKEND = getenv(
+    'PDF_CONVERTER_BACKEND', 'core.converter.CloudConvertBackend'
+)
+# Total size in bytes of cached conversion outputs, 0 disables the cache
+CONVERSION_CACHE_MAX_SIZE = int(getenv('CONVERSION_CACHE_MAX_SIZE', 2 * 1024 ** 3))
 
 PENDING_CONTRACT_EXPIRATION_TIME = 14  # days
 
 ZENDESK_SSO_JWT_ENCODING = 'HS256'
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'analytics',
+    },
+    'stats': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'stats',
+    },
+}
+
+# Count overlapping periods of analytics charts with SQL generate_series
+ANALYTICS_COUNT_PERIODS_IN_DB = getenv('ANALYTICS_COUNT_PERIODS_IN_DB') == 'true'
+
+# Send Proposal notifications from a Celery task after the request is committed
+NOTIFICATION_EVENTS_ASYNC = getenv('NOTIFICATION_EVENTS_ASYNC', 'true') == 'true'
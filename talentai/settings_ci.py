@@ -16,6 +16,8 @@ DATABASES = {
 }
 
 CELERY_TASK_ALWAYS_EAGER = True
+# test cases run in transactions which are never committed
+NOTIFICATION_EVENTS_ASYNC = False
 
 STATICFILES_DIRS = [path.join(BASE_DIR, './dashboard/build/static/')]
 STATIC_ROOT = path.join(BASE_DIR, 'django_static')
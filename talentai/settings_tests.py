@@ -7,3 +7,15 @@ DEBUG = False
 PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 
 CELERY_TASK_ALWAYS_EAGER = True
+# test cases run in transactions which are never committed
+NOTIFICATION_EVENTS_ASYNC = False
+
+# cleared by test cases, not shared with the Redis cache of the environment
+CACHES['analytics'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'analytics',
+}
+CACHES['stats'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'stats',
+}
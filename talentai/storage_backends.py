@@ -6,6 +6,17 @@ class MediaStorage(S3Boto3Storage):
     location = 'media'
     file_overwrite = False
 
+    def get_download_url(self, name, content_disposition, content_type):
+        """Return short-lived presigned URL to download the file from S3."""
+        return self.url(
+            name,
+            parameters={
+                'ResponseContentDisposition': content_disposition,
+                'ResponseContentType': content_type,
+            },
+            expire=settings.FILE_DOWNLOAD_URL_EXPIRE,
+        )
+
 
 class PublicMediaStorage(S3Boto3Storage):
     location = 'media'